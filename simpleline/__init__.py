@@ -87,6 +87,14 @@ class App(object):
         """Get instance of class responsible for processing asynchronous events."""
         return cls.__app.event_loop
 
+    @classmethod
+    def run_in_executor(cls, func, *args, callback=None, use_process=False):
+        """Run the function in a worker thread or process and pass the result to the callback.
+
+        This is shortcut to `App.get_event_loop().run_in_executor()`.
+        """
+        return App.get_event_loop().run_in_executor(func, *args, callback=callback, use_process=use_process)
+
     @classmethod
     def run(cls):
         """Run event loop.
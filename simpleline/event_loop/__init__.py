@@ -22,15 +22,22 @@
 #
 
 from abc import ABCMeta, abstractmethod
-from collections import namedtuple
+from collections import namedtuple, deque
+from copy import copy
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from enum import Enum
+from threading import Lock
+from time import monotonic
 
 from simpleline.errors import SimplelineError
+from simpleline.event_loop.metrics import EventLoopMetrics
 from simpleline.event_loop.ticket_machine import TicketMachine
 from simpleline.logging import get_simpleline_logger
 
 log = get_simpleline_logger()
 
-__all__ = ["AbstractEventLoop", "AbstractSignal", "ExitMainLoop"]
+__all__ = ["AbstractEventLoop", "AbstractSignal", "ExitMainLoop", "ScheduledSignal", "ExecutorTask",
+           "IdleCallback", "CoalescePolicy"]
 
 QuitCallback = namedtuple("QuitCallback", ["callback", "args"])
 
@@ -45,11 +52,28 @@ class AbstractEventLoop(metaclass=ABCMeta):
     def __init__(self):
         super().__init__()
         self._handlers = {}
+        # compiled handlers for every concrete signal class; reset on registration
+        self._dispatch_table = {}
         self._processed_signals = TicketMachine()
         self._quit_callback = None
+        self._metrics = EventLoopMetrics()
         # end most inner loop politely by setting to False
         self._run_loop = True
         self._force_quit = False
+        # executors created by the run_in_executor() method; shut down when the loop quits
+        self._executors = {}
+        self._executor_handler_registered = False
+        # callbacks called when there are no signals to process; rotated after every call
+        self._idle_callbacks = deque()
+        self._idle_time_slice = 0.01
+
+    @property
+    def metrics(self):
+        """Return counters describing the work of this event loop.
+
+        :rtype: `simpleline.event_loop.metrics.EventLoopMetrics` instance.
+        """
+        return self._metrics
 
     def register_signal_handler(self, signal, callback, data=None):
         """Register a callback which will be called when message "event"
@@ -59,6 +83,9 @@ class AbstractEventLoop(metaclass=ABCMeta):
         - the received message in the form of (type, [arguments])
         - the data registered with the handler
 
+        The callback is also called for signals which are subclasses of the `signal` class.
+        Handlers of the most derived classes are called first.
+
         :param signal: Signal class we want to react on.
         :type signal: Class based on the simpleline.event_loop.AbstractSignal class.
 
@@ -73,6 +100,7 @@ class AbstractEventLoop(metaclass=ABCMeta):
 
         event_handler = self._create_event_handler(callback, data)
         self._handlers[signal].append(event_handler)
+        self._dispatch_table = {}
 
     @abstractmethod
     def register_signal_source(self, signal_source):
@@ -89,8 +117,240 @@ class AbstractEventLoop(metaclass=ABCMeta):
 
         :param signal: Signal which you want to add to the event queue for processing.
         :type signal: Instance based on AbstractEvent class.
+
+        :return: The enqueued signal; call its `cancel()` method to withdraw it from the queue.
         """
         log.debug("New signal %s enqueued with source %s", signal, signal.source.__class__.__name__)
+        return signal
+
+    def enqueue_signals(self, signals):
+        """Enqueue multiple signals for processing.
+
+        This default implementation calls the `enqueue_signal()` method for every signal. Event loops can
+        override it to enqueue the whole batch more effectively.
+
+        :param signals: Signals which you want to add to the event queue for processing.
+        :type signals: Iterable of instances based on AbstractEvent class.
+        """
+        for signal in signals:
+            self.enqueue_signal(signal)
+
+    def enqueue_signal_buffered(self, signal):
+        """Enqueue new event for processing from a producer thread.
+
+        This default implementation calls the `enqueue_signal()` method. Event loops can override it
+        to avoid locking when many threads enqueue signals at once.
+
+        This method is thread safe.
+
+        :param signal: Signal which you want to add to the event queue for processing.
+        :type signal: Instance based on AbstractEvent class.
+
+        :return: The enqueued signal; call its `cancel()` method to withdraw it from the queue.
+        """
+        return self.enqueue_signal(signal)
+
+    def enqueue_signal_at(self, deadline, signal):
+        """Enqueue new event for processing at the given time.
+
+        This method is thread safe.
+
+        :param deadline: Time when the signal should be enqueued; value of the `time.monotonic()` clock.
+        :type deadline: float
+
+        :param signal: Signal which you want to add to the event queue for processing.
+        :type signal: Instance based on AbstractEvent class.
+
+        :returns: Handle which can be used to cancel the scheduled signal.
+        :rtype: `ScheduledSignal` instance.
+        """
+        scheduled = ScheduledSignal(self, signal, deadline)
+        self._schedule_signal(scheduled)
+        return scheduled
+
+    def enqueue_signal_after(self, delay, signal):
+        """Enqueue new event for processing after `delay` seconds.
+
+        See the `enqueue_signal_at()` method.
+        """
+        return self.enqueue_signal_at(monotonic() + delay, signal)
+
+    def enqueue_signal_periodically(self, interval, signal):
+        """Enqueue the `signal` every `interval` seconds until the returned handle is cancelled.
+
+        A copy of the `signal` is enqueued every time, so cancelling a queued signal doesn't affect signals
+        of the next periods and their time to live starts again. Missed periods are skipped when the loop
+        is busy.
+
+        This method is thread safe.
+
+        :param interval: Period in seconds.
+        :type interval: float
+
+        :param signal: Signal which you want to add to the event queue periodically.
+        :type signal: Instance based on AbstractEvent class.
+
+        :returns: Handle which can be used to cancel the periodic signal.
+        :rtype: `ScheduledSignal` instance.
+        """
+        scheduled = ScheduledSignal(self, signal, monotonic() + interval, interval)
+        self._schedule_signal(scheduled)
+        return scheduled
+
+    def _schedule_signal(self, scheduled):
+        """Start timer which calls the `_fire_scheduled_signal()` method at `scheduled.deadline`.
+
+        Event loops supporting timers have to implement this method.
+
+        :param scheduled: Signal scheduled for later processing.
+        :type scheduled: `ScheduledSignal` instance.
+        """
+        raise NotImplementedError("Event loop %s doesn't support timers." % self.__class__.__name__)
+
+    def _cancel_scheduled_signal(self, scheduled):
+        """Stop the timer of the cancelled `scheduled` signal.
+
+        Event loops which remove cancelled timers lazily don't need to implement this method.
+        """
+        pass
+
+    def _fire_scheduled_signal(self, scheduled):
+        """Enqueue signal of the expired timer.
+
+        :param scheduled: Expired scheduled signal.
+        :type scheduled: `ScheduledSignal` instance.
+
+        :returns: True if the timer is periodic and it should be started again with the new deadline.
+        :rtype: bool
+        """
+        signal = scheduled._take_signal()  # pylint: disable=protected-access
+        if signal is None:
+            return False
+
+        self.enqueue_signal(signal)
+
+        if scheduled.interval is None:
+            return False
+
+        # skip missed periods
+        now = monotonic()
+        deadline = scheduled.deadline + scheduled.interval
+        if deadline <= now:
+            missed = (now - deadline) // scheduled.interval + 1
+            deadline += missed * scheduled.interval
+
+        scheduled.deadline = deadline
+        return True
+
+    def run_in_executor(self, func, *args, callback=None, use_process=False):
+        """Call `func(*args)` in a worker thread or process and pass the result to `callback`.
+
+        The `callback` is called with the returned `ExecutorTask` as the only parameter when the `func` ends.
+        Get the return value by the `ExecutorTask.result()` method, which raises the exception raised by
+        the `func`. The callback is called in the event loop thread from the loop which was active when
+        this method was called (or from the nearest outer loop if that loop is closed already).
+
+        If the `func` raises an exception and no `callback` is set, the exception is emitted by
+        the `simpleline.event_loop.signals.ExceptionSignal` signal.
+
+        The executors are created on demand and they are shut down when the event loop quits.
+
+        This method is NOT thread safe!
+
+        :param func: Function to call.
+        :type func: Callable; it has to be picklable if `use_process` is True.
+
+        :param args: Arguments passed to the `func`.
+
+        :param callback: Function called when the `func` ends; not called for cancelled tasks.
+        :type callback: func(task)
+
+        :param use_process: Use process pool instead of thread pool.
+        :type use_process: bool
+
+        :returns: Handle which can be used to cancel the task.
+        :rtype: `ExecutorTask` instance.
+        """
+        # circular import
+        from simpleline.event_loop.signals import ExecutorTaskDoneSignal
+
+        if not self._executor_handler_registered:
+            self.register_signal_handler(ExecutorTaskDoneSignal, self._executor_task_done_handler)
+            self._executor_handler_registered = True
+
+        future = self._get_executor(use_process).submit(func, *args)
+        task = ExecutorTask(future, callback)
+
+        # the task is source of the result signal to deliver the result to the loop active now
+        self.register_signal_source(task)
+        future.add_done_callback(lambda f: self.enqueue_signal(ExecutorTaskDoneSignal(task)))
+
+        return task
+
+    def _get_executor(self, use_process):
+        executor = self._executors.get(use_process)
+
+        if executor is None:
+            if use_process:
+                executor = ProcessPoolExecutor()
+            else:
+                executor = ThreadPoolExecutor(thread_name_prefix="SimplelineExecutor")
+            self._executors[use_process] = executor
+
+        return executor
+
+    def _shutdown_executors(self):
+        """Shut down executors used by the `run_in_executor()` method.
+
+        Waiting tasks are cancelled; running tasks can't be interrupted so they are left to finish.
+        Executors of Python older than 3.9 can't cancel the waiting tasks so these tasks will run too.
+        """
+        for executor in self._executors.values():
+            try:
+                executor.shutdown(wait=False, cancel_futures=True)
+            except TypeError:
+                executor.shutdown(wait=False)
+
+        self._executors.clear()
+
+    def _executor_task_done_handler(self, signal, data):
+        task = signal.source
+        self._unregister_signal_source(task)
+
+        if task.cancelled:
+            return
+
+        if task.callback is not None:
+            task.callback(task)
+            return
+
+        exception = task.future.exception()
+        if exception is not None:
+            # circular import
+            from simpleline.event_loop.signals import ExceptionSignal
+
+            exception_info = (type(exception), exception, exception.__traceback__)
+            self.enqueue_signal(ExceptionSignal(self, exception_info=exception_info))
+
+    def cancel_signals(self, signal_source):
+        """Cancel all queued signals emitted by the `signal_source`.
+
+        Cancelled signals are skipped when they are taken from the queue. Signals waiting in timers or
+        enqueued later are not affected.
+
+        This method is thread safe.
+
+        :param signal_source: Source of the signals.
+        :type signal_source: Anything.
+        """
+        pass
+
+    def _unregister_signal_source(self, signal_source):
+        """Remove the `signal_source` registered by the `register_signal_source()` method.
+
+        Signals of the source are not routed anymore to the loop where the source was registered.
+        """
+        pass
 
     @abstractmethod
     def run(self):
@@ -106,6 +366,7 @@ class AbstractEventLoop(metaclass=ABCMeta):
         """
         log.debug("Force quit called. Killing all loops!")
         self._force_quit = True
+        self._shutdown_executors()
 
     @abstractmethod
     def execute_new_loop(self, signal):
@@ -127,7 +388,7 @@ class AbstractEventLoop(metaclass=ABCMeta):
         log.debug("Closing inner loop")
 
     @abstractmethod
-    def process_signals(self, return_after=None):
+    def process_signals(self, return_after=None, max_signals=None, max_time=None):
         """This method processes incoming async messages.
 
         Process signals enqueued by the `self.enqueue_signal()` method. Call handlers registered to the signals by
@@ -136,15 +397,171 @@ class AbstractEventLoop(metaclass=ABCMeta):
         When `return_after` is specified then wait to the point when this signal is processed.
         NO warranty that this method will return immediately after the signal was processed!
 
-        Without `return_after` parameter this method will return after all queued signals with the highest priority
+        When `max_signals` or `max_time` is specified then process queued signals in the priority order until
+        there is none or until the budget is spent. This never waits, so a host event loop can call it as one
+        step when the fd returned by `get_ready_fd()` is readable or after the callback set by
+        `set_ready_callback()` is called.
+
+        Without these parameters this method will return after all queued signals with the highest priority
         will be processed.
 
         The method is NOT thread safe!
 
         :param return_after: Wait on this signal to be processed.
         :type return_after: Class of the signal.
+
+        :param max_signals: Process at most this number of signals.
+        :type max_signals: int or None
+
+        :param max_time: Don't start processing of other signals after this number of seconds.
+        :type max_time: float or None
+
+        :return: True if there are signals left after a step limited by `max_signals` or `max_time`.
+        :rtype: bool or None
         """
-        pass
+        if return_after is not None and (max_signals is not None or max_time is not None):
+            raise ValueError("Can't wait on a signal in the limited processing of signals.")
+
+    def get_ready_fd(self):
+        """Return file descriptor which is readable when there are signals to process.
+
+        Use it to drive this event loop from a host event loop instead of running it. Watch the descriptor
+        together with other descriptors of the host and call `process_signals(max_signals=...)` or
+        `process_signals(max_time=...)` when it is readable. The descriptor stays readable until the next
+        call. Never read from it or close it.
+
+        Event loops which can't be driven this way raise `NotImplementedError`.
+
+        :rtype: int
+        """
+        raise NotImplementedError("Event loop %s has no readiness file descriptor." % self.__class__.__name__)
+
+    def set_ready_callback(self, callback):
+        """Call `callback` when there are new signals to process.
+
+        The callback is called once for all the signals enqueued until the next `process_signals()` call.
+        It can be called from any thread which enqueues signals so it has to be thread safe, e.g. it can
+        schedule the `process_signals()` call in the host event loop.
+
+        Event loops which can't be driven this way raise `NotImplementedError`.
+
+        :param callback: The callback function; None removes the callback.
+        :type callback: func()
+        """
+        raise NotImplementedError("Event loop %s has no readiness callback." % self.__class__.__name__)
+
+    def add_reader(self, fd, callback, data=None):
+        """Call `callback` when the file descriptor `fd` is ready for reading.
+
+        The callback is called from the event loop thread. Signals emitted by the callback are
+        processed the same way as signals from handlers.
+
+        Event loops which can't watch file descriptors raise `NotImplementedError`.
+
+        This method is NOT thread safe!
+
+        :param fd: File descriptor to watch.
+        :type fd: int
+
+        :param callback: The callback function.
+        :type callback: func(fd, data)
+
+        :param data: Optional data to pass to callback.
+        :type data: Anything.
+        """
+        raise NotImplementedError("Event loop %s can't watch file descriptors." % self.__class__.__name__)
+
+    def remove_reader(self, fd):
+        """Stop watching the file descriptor `fd` registered by the `add_reader()` method.
+
+        This method is NOT thread safe!
+
+        :param fd: Watched file descriptor.
+        :type fd: int
+        """
+        raise NotImplementedError("Event loop %s can't watch file descriptors." % self.__class__.__name__)
+
+    @property
+    def idle_time_slice(self):
+        """Maximal time in seconds spent by calling idle callbacks before the loop checks its other sources."""
+        return self._idle_time_slice
+
+    @idle_time_slice.setter
+    def idle_time_slice(self, time_slice):
+        self._idle_time_slice = time_slice
+
+    def add_idle_callback(self, callback, data=None):
+        """Call `callback` repeatedly when there are no signals to process.
+
+        The callback should do only a small piece of work and return. Return True to be called again or False
+        when the work is done. Idle callbacks are called in turns until a signal is enqueued or until
+        the `idle_time_slice` is over. Pending signals always take precedence.
+
+        An exception raised by the callback removes it and it is processed as an `ExceptionSignal`.
+
+        Event loops which can't call idle callbacks raise `NotImplementedError`.
+
+        This method is NOT thread safe!
+
+        :param callback: The callback function.
+        :type callback: func(data) returning bool
+
+        :param data: Optional data to pass to callback.
+        :type data: Anything.
+
+        :returns: Handle which can be used to remove the idle callback.
+        :rtype: `IdleCallback` instance.
+        """
+        idle = IdleCallback(self, callback, data)
+        self._add_idle_callback(idle)
+        return idle
+
+    def _add_idle_callback(self, idle):
+        """Start calling the idle callback.
+
+        Event loops supporting idle callbacks have to implement this method. Use the `_run_idle_callbacks()`
+        method to call them.
+
+        :param idle: Added idle callback.
+        :type idle: `IdleCallback` instance.
+        """
+        raise NotImplementedError("Event loop %s doesn't support idle callbacks." % self.__class__.__name__)
+
+    def _remove_idle_callback(self, idle):
+        """Stop calling the cancelled idle callback."""
+        try:
+            self._idle_callbacks.remove(idle)
+        except ValueError:
+            pass
+
+    def _run_idle_callbacks(self, signals_pending):
+        """Call idle callbacks in turns during one time slice.
+
+        :param signals_pending: Return True if the loop has signals to process.
+        :type signals_pending: func()
+
+        :raises: Exception raised by a callback; the callback is removed.
+        """
+        end_time = monotonic() + self._idle_time_slice
+        callbacks = self._idle_callbacks
+
+        while callbacks and not signals_pending():
+            idle = callbacks[0]
+            callbacks.rotate(-1)
+
+            try:
+                call_again = idle.callback(idle.data)
+            except ExitMainLoop:
+                raise
+            except Exception:
+                idle.cancel()
+                raise
+
+            if not call_again:
+                idle.cancel()
+
+            if monotonic() >= end_time:
+                break
 
     def set_quit_callback(self, callback, args=None):
         """Call this callback when event loop quits.
@@ -157,6 +574,30 @@ class AbstractEventLoop(metaclass=ABCMeta):
         """
         self._quit_callback = QuitCallback(callback, args)
 
+    def _get_signal_handlers(self, signal_class):
+        """Return handlers which should be called for the `signal_class`.
+
+        Handlers are resolved along the MRO of the signal class and cached until a new handler is
+        registered. The returned tuple is not affected by registrations made during the dispatch.
+
+        :param signal_class: Class of the dispatched signal.
+        :type signal_class: Class based on `simpleline.event_loop.AbstractSignal`.
+
+        :returns: Tuple of `EventHandler` instances.
+        """
+        table = self._dispatch_table
+
+        try:
+            return table[signal_class]
+        except KeyError:
+            handlers = []
+            for cls in signal_class.__mro__:
+                handlers.extend(self._handlers.get(cls, ()))
+
+            handlers = tuple(handlers)
+            table[signal_class] = handlers
+            return handlers
+
     def _create_event_handler(self, callback, data):
         """Create event handler data object and return it."""
         return EventHandler(callback=callback, data=data)
@@ -169,7 +610,7 @@ class AbstractEventLoop(metaclass=ABCMeta):
         :param wait_on_signal: Signal we are waiting for.
         :type wait_on_signal: Class based on `simpleline.event_loop.AbstractSignal`.
         """
-        return self._processed_signals.take_ticket(wait_on_signal.__name__)
+        return self._processed_signals.take_ticket(wait_on_signal)
 
     def _mark_signal_processed(self, signal):
         """Mark that processes waiting on this signal that they are able to go.
@@ -177,7 +618,7 @@ class AbstractEventLoop(metaclass=ABCMeta):
         :param signal: Signal which was processed.
         :type signal: Class based on `simpleline.event_loop.AbstractSignal`.
         """
-        self._processed_signals.mark_line_to_go(signal.__class__.__name__)
+        self._processed_signals.mark_line_to_go(signal.__class__)
 
     def _check_if_signal_processed(self, wait_on_signal, unique_id):
         """Check if the signal was processed.
@@ -188,7 +629,7 @@ class AbstractEventLoop(metaclass=ABCMeta):
         :param unique_id: Unique id returned by the `self._register_wait_on_signal()` method.
         :type unique_id: int
         """
-        return self._processed_signals.check_ticket(wait_on_signal.__name__, unique_id)
+        return self._processed_signals.check_ticket(wait_on_signal, unique_id)
 
 
 class EventHandler(object):
@@ -199,17 +640,177 @@ class EventHandler(object):
         self.data = data
 
 
+class ScheduledSignal(object):
+    """Handle of a signal which will be enqueued later.
+
+    Instances are returned by the `AbstractEventLoop.enqueue_signal_at()` method and similar.
+    """
+
+    def __init__(self, event_loop, signal, deadline, interval=None):
+        self._event_loop = event_loop
+        self.signal = signal
+        self.deadline = deadline
+        self.interval = interval
+        self._cancelled = False
+        self._fired = False
+        self._lock = Lock()
+
+    @property
+    def cancelled(self):
+        """Was this scheduled signal cancelled?"""
+        return self._cancelled
+
+    def replace_signal(self, signal):
+        """Enqueue `signal` instead of the scheduled one.
+
+        This method is thread safe.
+
+        :param signal: New signal for the timer.
+        :type signal: Instance based on AbstractSignal class.
+
+        :return: False if the signal can't be replaced because it was cancelled or already enqueued.
+        :rtype: bool
+        """
+        # TODO: Remove when python3-astroid 1.5.3 will be in Fedora
+        # pylint: disable=not-context-manager
+        with self._lock:
+            if self._cancelled or self._fired:
+                return False
+
+            self.signal = signal
+            return True
+
+    def _take_signal(self):
+        """Return signal which should be enqueued now or None if it was cancelled."""
+        # TODO: Remove when python3-astroid 1.5.3 will be in Fedora
+        # pylint: disable=not-context-manager
+        with self._lock:
+            if self._cancelled:
+                return None
+
+            # one-shot signal can't be replaced anymore
+            if self.interval is None:
+                self._fired = True
+                return self.signal
+
+            # every period gets its own signal which can be cancelled separately
+            return self.signal._copy_for_enqueue()  # pylint: disable=protected-access
+
+    def cancel(self):
+        """Do not enqueue the signal anymore.
+
+        This method is thread safe.
+        """
+        if not self._cancelled:
+            self._cancelled = True
+            self._event_loop._cancel_scheduled_signal(self)  # pylint: disable=protected-access
+
+
+class IdleCallback(object):
+    """Handle of a callback called when the event loop is idle.
+
+    Instances are returned by the `AbstractEventLoop.add_idle_callback()` method.
+    """
+
+    def __init__(self, event_loop, callback, data):
+        self._event_loop = event_loop
+        self.callback = callback
+        self.data = data
+        self._cancelled = False
+
+    @property
+    def cancelled(self):
+        """Was this idle callback removed?"""
+        return self._cancelled
+
+    def cancel(self):
+        """Do not call the callback anymore.
+
+        This method is NOT thread safe!
+        """
+        if not self._cancelled:
+            self._cancelled = True
+            self._event_loop._remove_idle_callback(self)  # pylint: disable=protected-access
+
+
+class ExecutorTask(object):
+    """Handle of a function running in an executor.
+
+    Instances are returned by the `AbstractEventLoop.run_in_executor()` method.
+    """
+
+    def __init__(self, future, callback):
+        self._future = future
+        self.callback = callback
+        self._cancelled = False
+
+    @property
+    def future(self):
+        """Return `concurrent.futures.Future` of the running function."""
+        return self._future
+
+    @property
+    def cancelled(self):
+        """Was this task cancelled?"""
+        return self._cancelled
+
+    def cancel(self):
+        """Cancel the task; the callback won't be called.
+
+        The function is not started if it is still waiting in the executor. A running function
+        can't be interrupted but its result is ignored.
+
+        This method is thread safe.
+        """
+        self._cancelled = True
+        self._future.cancel()
+
+    def result(self):
+        """Return value of the finished function.
+
+        :raises: Exception raised by the function.
+        """
+        return self._future.result(timeout=0)
+
+
+class CoalescePolicy(Enum):
+    """How to merge a new signal with the same signal already waiting in the queue."""
+    KEEP_FIRST = "keep_first"
+    KEEP_LATEST = "keep_latest"
+
+
 class AbstractSignal(metaclass=ABCMeta):
     """This class is base class for signals.
 
+    Set the `coalesce_policy` class attribute to merge signals waiting in the queue. Queued signals
+    of the same class and priority with equal `coalescing_key()` are processed only once. Merged
+    signals are counted by the event loop metrics.
+
+    Set the `time_to_live` class attribute or call `expire_at()` for signals which are useful only for
+    a short time. Expired signals are dropped by the event loop instead of processing and counted by
+    the event loop metrics.
+
     .. NOTE:
     Ordering and equality is based on priority.
     """
 
+    # `CoalescePolicy` of queued signals of this class; None means the signals are never merged
+    coalesce_policy = None
+
+    # seconds after the creation when signals of this class expire; None means the signals never expire
+    time_to_live = None
+
+    _cancelled = False
+
     def __init__(self, source, priority=0):
         self._source = source
         self._priority = priority
 
+        if self.time_to_live is None:
+            self._deadline = None
+        else:
+            self._deadline = monotonic() + self.time_to_live
+
     def __lt__(self, other):
         """Order Signal classes by priority."""
         return self._priority < other.priority
@@ -222,6 +823,61 @@ class AbstractSignal(metaclass=ABCMeta):
         """For easier logging."""
         return self.__class__.__name__
 
+    @property
+    def cancelled(self):
+        """Was this signal cancelled?"""
+        return self._cancelled
+
+    def cancel(self):
+        """Do not process this signal.
+
+        The queued signal is skipped when the event loop takes it from the queue. Processes waiting
+        on this signal by `process_signals(return_after)` are released as if it was processed.
+
+        This method is thread safe.
+        """
+        self._cancelled = True
+
+    @property
+    def deadline(self):
+        """Time when this signal expires; value of the `time.monotonic()` clock or None."""
+        return self._deadline
+
+    def expire_at(self, deadline):
+        """Drop this signal if it is not processed before the `deadline`.
+
+        :param deadline: Value of the `time.monotonic()` clock; None means the signal never expires.
+        :type deadline: float or None
+
+        :return: This signal.
+        """
+        self._deadline = deadline
+        return self
+
+    @property
+    def expired(self):
+        """Is the deadline of this signal over?"""
+        return self._deadline is not None and monotonic() >= self._deadline
+
+    def _copy_for_enqueue(self):
+        """Return not cancelled copy of this signal with the time to live started again."""
+        signal = copy(self)
+        signal._cancelled = False
+
+        if self.time_to_live is not None:
+            signal._deadline = monotonic() + self.time_to_live
+
+        return signal
+
+    def coalescing_key(self):
+        """Return key identifying duplicates of this signal.
+
+        Used only when the `coalesce_policy` is set. Signals from the same source are merged by default.
+
+        :returns: Hashable object; signals with unhashable keys are never merged.
+        """
+        return self._source
+
     @property
     def priority(self):
         """Priority of this event.
@@ -0,0 +1,235 @@
+# Asyncio event loop used by Simpleline application.
+#
+# This class is thread safe.
+#
+# Copyright (C) 2017  Red Hat, Inc.
+#
+# This copyrighted material is made available to anyone wishing to use,
+# modify, copy, or redistribute it subject to the terms and conditions of
+# the GNU General Public License v.2, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY expressed or implied, including the implied warranties of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+# Public License for more details.  You should have received a copy of the
+# GNU General Public License along with this program; if not, write to the
+# Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+# 02110-1301, USA.  Any Red Hat trademarks that are incorporated in the
+# source code or documentation are not subject to the GNU General Public
+# License and may only be used or replicated with the express permission of
+# Red Hat, Inc.
+#
+
+import asyncio
+
+from simpleline.event_loop import ExitMainLoop
+from simpleline.event_loop.event_queue import OverflowPolicy
+from simpleline.event_loop.main_loop import MainLoop
+from simpleline.logging import get_simpleline_logger
+
+log = get_simpleline_logger()
+
+__all__ = ["AsyncioEventLoop"]
+
+
+class AsyncioEventLoop(MainLoop):
+    """Event loop processing Simpleline signals in an asyncio event loop.
+
+    Signals of the outermost loop are processed by callbacks scheduled on the asyncio loop, so one thread
+    can serve the text UI together with other asyncio tasks of the application.
+
+    Nested loops started by `execute_new_loop()` and waiting in `process_signals(return_after)` are processed
+    synchronously in the asyncio loop thread. Other asyncio tasks will wait until they end.
+    """
+
+    def __init__(self, loop=None, batch_size=64, queue_capacity=None, overflow_policy=OverflowPolicy.BLOCK,
+                 max_signal_wait=None):
+        """Create the event loop.
+
+        :param loop: Asyncio loop used for processing; if not specified the running loop is used or
+                     a new loop is created.
+        :type loop: `asyncio.AbstractEventLoop` instance
+
+        See `simpleline.event_loop.main_loop.MainLoop` for the other parameters.
+        """
+        super().__init__(batch_size=batch_size, queue_capacity=queue_capacity, overflow_policy=overflow_policy,
+                         max_signal_wait=max_signal_wait)
+        if loop is None:
+            loop = self._get_default_loop()
+
+        self._loop = loop
+        self._processing_scheduled = False
+        self._quit_future = None
+        self._timer_handle = None
+        log.debug("Asyncio event loop is used!")
+
+    @staticmethod
+    def _get_default_loop():
+        try:
+            return asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.new_event_loop()
+
+    @property
+    def asyncio_loop(self):
+        """Return asyncio loop used by this event loop."""
+        return self._loop
+
+    def _wakeup(self):
+        """Wake up the nested loop waiting on file descriptors and schedule processing in the asyncio loop.
+
+        This is called for every enqueued signal.
+        """
+        super()._wakeup()
+        self._schedule_processing()
+
+    def add_reader(self, fd, callback, data=None):
+        """Call `callback` when the file descriptor `fd` is ready for reading.
+
+        The descriptor is watched by the asyncio loop and also during the nested loops.
+
+        This method is NOT thread safe!
+
+        :param fd: File descriptor to watch.
+        :type fd: int
+
+        :param callback: The callback function.
+        :type callback: func(fd, data)
+
+        :param data: Optional data to pass to callback.
+        :type data: Anything.
+        """
+        super().add_reader(fd, callback, data)
+        handler = self._create_event_handler(callback, data)
+        self._loop.add_reader(fd, self._run_asyncio_reader_callback, handler, fd)
+
+    def remove_reader(self, fd):
+        """Stop watching the file descriptor `fd` registered by the `add_reader()` method.
+
+        This method is NOT thread safe!
+
+        :param fd: Watched file descriptor.
+        :type fd: int
+        """
+        super().remove_reader(fd)
+        self._loop.remove_reader(fd)
+
+    def _run_asyncio_reader_callback(self, handler, fd):
+        try:
+            self._run_reader_callback(handler, fd)
+        except ExitMainLoop:
+            self._finish()
+
+    def run(self):
+        """Starts the event loop.
+
+        Run the asyncio loop until the application quits. Use `run_async()` if the asyncio loop is
+        already running.
+        """
+        self._loop.run_until_complete(self.run_async())
+
+    async def run_async(self):
+        """Run the event loop as a coroutine on the running asyncio loop.
+
+        The coroutine returns when the application quits.
+        """
+        # skip the blocking MainLoop implementation
+        super(MainLoop, self).run()  # pylint: disable=bad-super-call
+        self._run_loop = True
+        self._quit_future = self._loop.create_future()
+        self._schedule_processing()
+
+        try:
+            await self._quit_future
+        finally:
+            self._quit_future = None
+
+        self._shutdown_executors()
+        log.debug("Main loop ended. Running callback if set.")
+
+        if self._quit_callback:
+            cb = self._quit_callback.callback
+            cb(self._quit_callback.args)
+
+    def force_quit(self):
+        """Force quit all running event loops.
+
+        Kill all loop including inner loops (modal window).
+        None of the Simpleline events will be processed anymore.
+        """
+        super().force_quit()
+        self._call_soon_threadsafe(self._finish)
+
+    def _add_idle_callback(self, idle):
+        """Call the idle callback from the asyncio loop when there are no signals to process.
+
+        Other asyncio tasks run between the time slices of the idle callbacks.
+        """
+        super()._add_idle_callback(idle)
+        self._schedule_processing()
+
+    def _schedule_signal(self, scheduled):
+        """Add the scheduled signal to the timer heap and wake up the asyncio loop at its deadline.
+
+        The timer heap is used directly by nested loops.
+        """
+        super()._schedule_signal(scheduled)
+        self._call_soon_threadsafe(self._arm_timer)
+
+    def _arm_timer(self):
+        """Set asyncio timer to the nearest deadline in the timer heap."""
+        if self._timer_handle is not None:
+            self._timer_handle.cancel()
+            self._timer_handle = None
+
+        timeout = self._run_expired_timers()
+        if timeout is not None:
+            self._timer_handle = self._loop.call_at(self._loop.time() + timeout, self._arm_timer)
+
+    def _schedule_processing(self):
+        if not self._processing_scheduled:
+            self._processing_scheduled = True
+            self._call_soon_threadsafe(self._process_scheduled_signals)
+
+    def _call_soon_threadsafe(self, callback, *args):
+        try:
+            self._loop.call_soon_threadsafe(callback, *args)
+        except RuntimeError:
+            # the asyncio loop is already closed
+            log.debug("Asyncio loop is closed, callback %s is ignored", callback)
+
+    def _process_scheduled_signals(self):
+        """Process the highest priority signals and give control back to the asyncio loop.
+
+        Idle callbacks are called when there are no signals to process.
+        """
+        self._processing_scheduled = False
+
+        if self._quit_future is None or self._quit_future.done():
+            return
+
+        try:
+            if self._active_queue.empty() and self._idle_callbacks:
+                self._run_idle_slice(self._active_queue)
+            else:
+                self._process_signals_iteration()
+        except ExitMainLoop:
+            self._finish()
+            return
+        except BaseException as e:  # pylint: disable=broad-except
+            self._finish(e)
+            return
+
+        if not self._run_loop:
+            self._finish()
+        elif not self._active_queue.empty() or self._idle_callbacks:
+            self._schedule_processing()
+
+    def _finish(self, exception=None):
+        """End the `run_async()` coroutine."""
+        if self._quit_future is None or self._quit_future.done():
+            return
+
+        if exception is not None:
+            self._quit_future.set_exception(exception)
+        else:
+            self._quit_future.set_result(None)
@@ -22,10 +22,21 @@
 #
 
 
-from queue import PriorityQueue
-from threading import Lock
+from bisect import insort
+from collections import deque
+from enum import Enum
+from threading import Lock, Condition, get_ident
+from time import monotonic
 
 from simpleline.errors import SimplelineError
+from simpleline.event_loop import CoalescePolicy
+from simpleline.event_loop.metrics import EventLoopMetrics
+from simpleline.logging import get_simpleline_logger
+
+log = get_simpleline_logger()
+
+# priority of `simpleline.event_loop.signals.ExceptionSignal`; bands with this or higher priority are never aged
+URGENT_PRIORITY = -20
 
 
 class EventQueueError(SimplelineError):
@@ -36,6 +47,24 @@ class EventQueueError(SimplelineError):
     pass
 
 
+class EventQueueFullError(EventQueueError):
+    """Signal can't be enqueued because the queue is full."""
+    pass
+
+
+class OverflowPolicy(Enum):
+    """What to do when a signal is enqueued to the full queue."""
+    # wait until the consumer takes some signals
+    BLOCK = "block"
+    # drop the oldest queued signal with the same priority (or the oldest signal with the lowest priority);
+    # signals with higher priority and urgent signals are never dropped, the new signal is dropped instead
+    DROP_OLDEST = "drop_oldest"
+    # drop the new signal
+    DROP_NEWEST = "drop_newest"
+    # raise `EventQueueFullError`
+    RAISE = "raise"
+
+
 class EventQueue(object):
     """Class for managing signal queue.
 
@@ -43,10 +72,58 @@ class EventQueue(object):
     * sorting by priority of signals
     * managing sources for this event queue
     * enqueuing signals
+
+    Signals are stored in buckets, one FIFO deque for every priority. Sorted list of priorities which have
+    some signals queued is kept beside. Enqueue and dequeue are done in constant time for the number of
+    different priorities used by the application (which is small).
+
+    Signals with `coalesce_policy` are merged with their queued duplicates when enqueued. The queued
+    signals are found by their coalescing keys in a dictionary, so merging is done in constant time too.
+
+    The queue can have limited capacity. When it is full the `overflow_policy` is applied to signals enqueued
+    by producer threads. Signals enqueued by the consumer (the thread which took signals from this queue
+    the last time) are never limited, the consumer would wait on itself otherwise.
+
+    Signals with lower priority can starve when signals with higher priority are enqueued faster than they are
+    processed. Set `max_wait` to age the waiting signals; the band with the oldest signal waiting longer than
+    `max_wait` is served first. Urgent signals (`ExceptionSignal`) always go first. The time signals spent in
+    the queue is measured for every priority in the metrics.
     """
 
-    def __init__(self):
-        self._queue = PriorityQueue()
+    def __init__(self, metrics=None, capacity=None, overflow_policy=OverflowPolicy.BLOCK, max_wait=None):
+        """Create event queue.
+
+        :param metrics: Metrics updated by this queue; a new instance is created if not specified.
+        :type metrics: `simpleline.event_loop.metrics.EventLoopMetrics` instance.
+
+        :param capacity: Maximal number of queued signals; None means unlimited.
+        :type capacity: int or None
+
+        :param overflow_policy: What to do with signals enqueued to the full queue.
+        :type overflow_policy: `OverflowPolicy` enum.
+
+        :param max_wait: Seconds after which a waiting signal is taken before signals with higher priority;
+                         None disables aging.
+        :type max_wait: float or None
+        """
+        self._bands = {}
+        self._priorities = []
+        self._size = 0
+        self._capacity = capacity
+        self._overflow_policy = overflow_policy
+        self._max_wait = max_wait
+        self._high_water_mark = 0
+        self._consumer = None
+        self._closed = False
+        # queued entries of signals which can be merged by their coalescing keys
+        self._coalesced = {}
+        # entries of the signals returned by the last drain(); requeue() keeps their enqueue time
+        self._drained_entries = {}
+        self._metrics = metrics or EventLoopMetrics()
+        lock = Lock()
+        self._not_empty = Condition(lock)
+        self._not_full = Condition(lock)
+        self._interrupted = False
         self._contained_screens = set()
         self._lock = Lock()
 
@@ -55,15 +132,126 @@ class EventQueue(object):
 
         :return: True if empty, False otherwise.
         """
-        return self._queue.empty()
+        return self._size == 0
+
+    def size(self):
+        """Return number of queued signals.
 
-    def enqueue(self, signal):
+        :rtype: int
+        """
+        return self._size
+
+    @property
+    def capacity(self):
+        """Maximal number of queued signals or None if unlimited."""
+        return self._capacity
+
+    @property
+    def high_water_mark(self):
+        """The highest number of signals queued at once."""
+        return self._high_water_mark
+
+    def enqueue(self, signal, block=True):
         """Enqueue signal to this queue.
 
         :param signal: Signal which should be enqueued to this queue.
         :type signal: Signal class based on `simpleline.event_loop.signals.AbstractSignal`.
+
+        :param block: Wait for free space if the queue is full and the overflow policy is `OverflowPolicy.BLOCK`.
+        :type block: bool
+
+        :return: False if the queue is full and `block` is False, True otherwise.
+        :rtype: bool
+
+        :raise: EventQueueFullError if the queue is full and the overflow policy is `OverflowPolicy.RAISE`.
+        """
+        # TODO: Remove when python3-astroid 1.5.3 will be in Fedora
+        # pylint: disable=not-context-manager
+        with self._not_empty:
+            if not self._wait_for_space(block):
+                return False
+
+            self._put(signal)
+            self._not_empty.notify()
+            return True
+
+    def enqueue_signals(self, signals, block=True):
+        """Enqueue multiple signals to this queue at once.
+
+        The queue lock is taken only once for all the signals if the queue is not full.
+
+        :param signals: Signals which should be enqueued to this queue.
+        :type signals: Iterable of signals based on `simpleline.event_loop.signals.AbstractSignal`.
+
+        :param block: See the `enqueue()` method.
+        :type block: bool
+
+        :return: Signals which were not enqueued because the queue is full and `block` is False.
+        :rtype: list
+
+        :raise: EventQueueFullError if the queue is full and the overflow policy is `OverflowPolicy.RAISE`.
+        """
+        signals = list(signals)
+
+        # TODO: Remove when python3-astroid 1.5.3 will be in Fedora
+        # pylint: disable=not-context-manager
+        with self._not_empty:
+            try:
+                for i, signal in enumerate(signals):
+                    if not self._wait_for_space(block):
+                        return signals[i:]
+
+                    self._put(signal)
+            finally:
+                self._not_empty.notify_all()
+
+        return []
+
+    def wait_for_space(self, timeout=None):
+        """Wait until a signal can be enqueued without blocking.
+
+        :param timeout: Wait at most `timeout` seconds; None means wait until there is a free space.
+        :type timeout: float or None
+
+        :return: False if the `timeout` expired.
+        :rtype: bool
+        """
+        # TODO: Remove when python3-astroid 1.5.3 will be in Fedora
+        # pylint: disable=not-context-manager
+        with self._not_full:
+            return self._not_full.wait_for(lambda: not self._is_full(), timeout)
+
+    def close(self):
+        """Remove the capacity limit of this queue and wake up all waiting producers.
+
+        Call this when the queue won't be processed anymore.
         """
-        self._queue.put(signal)
+        # TODO: Remove when python3-astroid 1.5.3 will be in Fedora
+        # pylint: disable=not-context-manager
+        with self._not_empty:
+            self._closed = True
+            self._not_full.notify_all()
+
+    def _is_full(self):
+        """Should be the overflow policy applied? Must be called with the lock held."""
+        return self._capacity is not None and self._size >= self._capacity and not self._closed \
+            and self._consumer != get_ident()
+
+    def _wait_for_space(self, block):
+        """Apply the overflow policy if the queue is full. Must be called with the lock held.
+
+        :return: False if the caller should not enqueue the signal now.
+        """
+        if not self._is_full() or self._overflow_policy is not OverflowPolicy.BLOCK:
+            return True
+
+        if not block:
+            return False
+
+        # queued signals have to be processed to get some space
+        self._not_empty.notify_all()
+        self._not_full.wait_for(lambda: not self._is_full())
+        return True
 
     def enqueue_if_source_belongs(self, signal, source):
         """Enqueue signal to this queue if the signal source belongs to this queue.
@@ -78,38 +266,326 @@ class EventQueue(object):
         :rtype: bool
         """
         if self.contains_source(source):
-            self._queue.put(signal)
+            self.enqueue(signal)
             return True
         else:
             return False
 
-    def get(self):
+    def get(self, timeout=None):
         """Return enqueued signal with the highest priority.
 
         This is FIFO implementation for the same priority.
         If the queue is empty this method will wait for the input signal.
 
-        :return: Queued signal.
+        :param timeout: Wait at most `timeout` seconds; None means wait until a signal arrives.
+        :type timeout: float or None
+
+        :return: Queued signal or None if the `timeout` expired or the wait was interrupted.
         :rtype: Signal based on class `simpleline.event_loop.signals.AbstractSignal`.
         """
-        return self._queue.get()
+        # TODO: Remove when python3-astroid 1.5.3 will be in Fedora
+        # pylint: disable=not-context-manager
+        with self._not_empty:
+            self._consumer = get_ident()
+
+            if not self._wait_not_empty(timeout):
+                return None
+
+            return self._pop(self._next_priority())
+
+    def interrupt(self):
+        """Interrupt the waiting in the `get()` method.
+
+        The waiting `get()` call returns None. If nobody is waiting the next wait is interrupted.
+        """
+        # TODO: Remove when python3-astroid 1.5.3 will be in Fedora
+        # pylint: disable=not-context-manager
+        with self._not_empty:
+            self._interrupted = True
+            self._not_empty.notify_all()
+
+    def _wait_not_empty(self, timeout):
+        """Wait until the queue is not empty. Must be called with the lock held.
+
+        :return: False if the `timeout` expired or the wait was interrupted.
+        """
+        end_time = None if timeout is None else monotonic() + timeout
+
+        while not self._size:
+            if self._interrupted:
+                self._interrupted = False
+                return False
+
+            if end_time is None:
+                self._not_empty.wait()
+            else:
+                remaining = end_time - monotonic()
+                if remaining <= 0:
+                    return False
+                self._not_empty.wait(remaining)
+
+        return True
 
     def get_top_event_if_priority(self, priority):
         """Return top enqueued signal if priority is equal to `priority`. Otherwise `None`.
 
+        If the queue is empty this method will wait for the input signal.
+
         :param priority: Requested event priority.
         :type priority: int
 
         :return: Queued signal if it has requested priority. Otherwise `None`.
         :rtype: Signal based on class `simpleline.event_loop.signals.AbstractSignal` or `None`.
         """
-        event = self._queue.get()
-        if event.priority == priority:
-            return event
-        else:
-            self._queue.put(event)
+        # TODO: Remove when python3-astroid 1.5.3 will be in Fedora
+        # pylint: disable=not-context-manager
+        with self._not_empty:
+            while not self._size:
+                self._not_empty.wait()
+
+            if self._next_priority() == priority:
+                return self._pop(priority)
+            else:
+                return None
+
+    def top_priority(self):
+        """Return the highest priority of queued signals.
+
+        When aging is enabled this can be priority of a signal waiting too long instead.
+
+        :return: Priority of the signal which will be returned by `get()` or None if the queue is empty.
+        :rtype: int or None
+        """
+        # TODO: Remove when python3-astroid 1.5.3 will be in Fedora
+        # pylint: disable=not-context-manager
+        with self._not_empty:
+            if self._priorities:
+                return self._next_priority()
             return None
 
+    def _next_priority(self):
+        """Return priority of the band which should be served now. Must be called with the lock held.
+
+        The queue must not be empty.
+        """
+        top_priority = self._priorities[0]
+
+        if self._max_wait is None or top_priority <= URGENT_PRIORITY or len(self._priorities) == 1:
+            return top_priority
+
+        # the oldest signal waiting longer than max_wait goes first
+        oldest = monotonic() - self._max_wait
+        aged_priority = top_priority
+
+        for priority in self._priorities[1:]:
+            enqueued = self._bands[priority][0].enqueued
+            if enqueued < oldest:
+                oldest = enqueued
+                aged_priority = priority
+
+        return aged_priority
+
+    def _is_aged(self, priority):
+        """Is the signal with the `priority` taken before signals with higher priority because of aging?
+
+        Must be called with the lock held.
+        """
+        return self._max_wait is not None and bool(self._priorities) and priority > self._priorities[0]
+
+    def drain(self, priority, max_items=None):
+        """Remove and return queued signals with the `priority`.
+
+        This method never waits. Signals are returned in the FIFO order.
+
+        :param priority: Priority band which should be drained.
+        :type priority: int
+
+        :param max_items: Maximal number of returned signals; None means all signals with the `priority`.
+        :type max_items: int or None
+
+        :return: Signals with the requested priority. Empty list if there are none.
+        :rtype: list
+        """
+        # TODO: Remove when python3-astroid 1.5.3 will be in Fedora
+        # pylint: disable=not-context-manager
+        with self._not_empty:
+            self._consumer = get_ident()
+
+            band = self._bands.get(priority)
+            if band is None:
+                return []
+
+            if max_items is None or max_items >= len(band):
+                entries = list(band)
+                band.clear()
+            else:
+                entries = [band.popleft() for _ in range(max_items)]
+
+            self._size -= len(entries)
+            signals = [self._take_signal(entry) for entry in entries]
+            self._drained_entries = {id(entry.signal): entry for entry in entries}
+
+            if not band:
+                del self._bands[priority]
+                self._priorities.remove(priority)
+
+            if self._capacity is not None:
+                self._not_full.notify_all()
+
+            return signals
+
+    def cancel_signals(self, signal_source):
+        """Cancel all queued signals emitted by the `signal_source`.
+
+        The signals stay in the queue until they are taken; the consumer should skip them.
+
+        :param signal_source: Source of the signals.
+        :type signal_source: Anything.
+
+        :return: Number of cancelled signals.
+        :rtype: int
+        """
+        cancelled = 0
+
+        # TODO: Remove when python3-astroid 1.5.3 will be in Fedora
+        # pylint: disable=not-context-manager
+        with self._not_empty:
+            for band in self._bands.values():
+                for entry in band:
+                    if entry.signal.source is signal_source and not entry.signal.cancelled:
+                        entry.signal.cancel()
+                        cancelled += 1
+
+        return cancelled
+
+    def requeue(self, signals):
+        """Return signals back to the front of their priority bands.
+
+        Use this to give back signals taken by `drain()` which were not processed.
+        The order of the given signals is preserved and they will be returned before
+        the signals which are already queued. Returned signals are not merged with the queued ones.
+        Signals from the last `drain()` keep their original enqueue time, so they are aged correctly.
+
+        :param signals: Signals to return to the queue.
+        :type signals: Sequence of signals based on `simpleline.event_loop.signals.AbstractSignal`.
+        """
+        # TODO: Remove when python3-astroid 1.5.3 will be in Fedora
+        # pylint: disable=not-context-manager
+        with self._not_empty:
+            for signal in reversed(signals):
+                self._put(signal, to_front=True, entry=self._drained_entries.get(id(signal)))
+
+            self._drained_entries = {}
+            self._not_empty.notify_all()
+
+    def _put(self, signal, to_front=False, entry=None):
+        """Put signal to the bucket of its priority. Must be called with the lock held.
+
+        The `entry` of the requeued signal is reused instead of creating a new one.
+        """
+        key = None
+
+        if not to_front and signal.coalesce_policy is not None:
+            key = get_coalescing_key(signal)
+            entry = self._coalesced.get(key)
+
+            if entry is not None:
+                # the cancelled or expired signal is replaced, it won't be processed
+                if signal.coalesce_policy is CoalescePolicy.KEEP_LATEST or entry.signal.cancelled \
+                        or entry.signal.expired:
+                    entry.signal = signal
+
+                self._metrics.signal_coalesced()
+                return
+
+        priority = signal.priority
+
+        if not to_front and self._is_full():
+            if self._overflow_policy is OverflowPolicy.RAISE:
+                raise EventQueueFullError("Event queue is full, signal {} can't be enqueued!".format(signal))
+            elif self._overflow_policy is OverflowPolicy.DROP_NEWEST:
+                self._metrics.signal_dropped()
+                return
+            elif self._overflow_policy is OverflowPolicy.DROP_OLDEST and not self._drop_oldest(priority):
+                self._metrics.signal_dropped()
+                log.debug("Event queue is full, signal %s was dropped", signal)
+                return
+
+        if entry is None:
+            entry = _QueueEntry(signal, key, monotonic())
+        else:
+            entry.key = None
+            entry.requeued = True
+
+        if key is not None:
+            self._coalesced[key] = entry
+        band = self._bands.get(priority)
+
+        if band is None:
+            band = deque()
+            self._bands[priority] = band
+            insort(self._priorities, priority)
+
+        if to_front:
+            band.appendleft(entry)
+        else:
+            band.append(entry)
+
+        self._size += 1
+
+        if self._size > self._high_water_mark:
+            self._high_water_mark = self._size
+            self._metrics.queue_size_reached(self._size)
+
+    def _drop_oldest(self, priority):
+        """Drop the oldest signal with the `priority` or with the lowest priority if there is none.
+
+        Signals with priority higher than `priority` and urgent signals are not dropped.
+        Must be called with the lock held.
+
+        :return: True if a queued signal was dropped, False otherwise.
+        :rtype: bool
+        """
+        victim_priority = priority if priority in self._bands else self._priorities[-1]
+
+        if victim_priority < priority or victim_priority <= URGENT_PRIORITY:
+            return False
+
+        signal = self._pop(victim_priority, dropped=True)
+        self._metrics.signal_dropped()
+        log.debug("Event queue is full, signal %s was dropped", signal)
+        return True
+
+    def _pop(self, priority, dropped=False):
+        """Pop the oldest signal from the non-empty `priority` bucket. Must be called with the lock held."""
+        band = self._bands[priority]
+        entry = band.popleft()
+        self._size -= 1
+
+        if not band:
+            del self._bands[priority]
+            self._priorities.remove(priority)
+
+        if self._capacity is not None:
+            self._not_full.notify()
+
+        return self._take_signal(entry, dropped)
+
+    def _take_signal(self, entry, dropped=False):
+        """Return signal of the entry removed from the queue. Must be called with the lock held."""
+        if entry.key is not None:
+            del self._coalesced[entry.key]
+
+        if dropped:
+            return entry.signal
+
+        # signals taken before signals with higher priority were aged; requeued signals are counted once
+        priority = entry.signal.priority
+        self._metrics.signal_waited(priority, monotonic() - entry.enqueued,
+                                    aged=not entry.requeued and self._is_aged(priority))
+
+        return entry.signal
+
     def add_source(self, signal_source):
         """Add new source of signals to this queue.
 
@@ -138,6 +614,17 @@ class EventQueue(object):
         except KeyError:
             raise EventQueueError("Can't remove non-existing event source!")
 
+    @property
+    def sources(self):
+        """Return copy of all sources which belong to this queue.
+
+        :rtype: frozenset
+        """
+        # TODO: Remove when python3-astroid 1.5.3 will be in Fedora
+        # pylint: disable=not-context-manager
+        with self._lock:
+            return frozenset(self._contained_screens)
+
     def contains_source(self, signal_source):
         """Test if `signal_source` belongs to this queue.
 
@@ -150,3 +637,36 @@ class EventQueue(object):
         # pylint: disable=not-context-manager
         with self._lock:
             return signal_source in self._contained_screens
+
+
+class _QueueEntry(object):
+    """Signal waiting in the queue."""
+
+    __slots__ = ["signal", "key", "enqueued", "requeued"]
+
+    def __init__(self, signal, key, enqueued):
+        self.signal = signal
+        # coalescing key or None if the signal can't be merged
+        self.key = key
+        # monotonic time when the signal was enqueued
+        self.enqueued = enqueued
+        # was the signal returned to the queue by requeue()?
+        self.requeued = False
+
+
+def get_coalescing_key(signal):
+    """Return key of the queued `signal` used for merging of its duplicates.
+
+    :param signal: Signal with the `coalesce_policy` set.
+    :type signal: Signal based on class `simpleline.event_loop.signals.AbstractSignal`.
+
+    :return: Hashable key or None if the signal can't be merged.
+    """
+    key = (signal.__class__, signal.priority, signal.coalescing_key())
+
+    try:
+        hash(key)
+    except TypeError:
+        return None
+
+    return key
@@ -21,11 +21,15 @@
 # Author(s): Jiri Konecny <jkonecny@redhat.com>
 #
 
+import math
 import sys
 
 from collections import namedtuple
+from threading import Lock
+from time import monotonic
 
 from simpleline.event_loop import AbstractEventLoop, ExitMainLoop
+from simpleline.event_loop.event_queue import EventQueue, OverflowPolicy
 from simpleline.event_loop.signals import ExceptionSignal
 
 import gi
@@ -33,10 +37,11 @@ gi.require_version("GLib", "2.0")
 
 from gi.repository import GLib
 from simpleline.logging import get_simpleline_logger
+from simpleline.tracing import trace_span, CATEGORY_HANDLER, CATEGORY_LOOP, CATEGORY_SIGNAL
 
 log = get_simpleline_logger()
 
-CallbackArgs = namedtuple("CallbackArgs", ["signal", "source", "handlers"])
+Reader = namedtuple("Reader", ["handler", "source"])
 
 
 __all__ = ["GLibEventLoop"]
@@ -44,11 +49,47 @@ __all__ = ["GLibEventLoop"]
 
 class GLibEventLoop(AbstractEventLoop):
 
-    def __init__(self):
+    def __init__(self, blocking_wait=True, batch_size=64, queue_capacity=None,
+                 overflow_policy=OverflowPolicy.BLOCK):
+        """Create GLib event loop.
+
+        Every GLib loop has its own event queue. The queue is processed by one dispatcher source attached
+        to the context of the loop.
+
+        :param blocking_wait: Block the thread in `process_signals(return_after)` until some event source
+                              is dispatched; if False the GLib context is polled in a loop.
+        :type blocking_wait: bool
+
+        :param batch_size: Maximal number of signals with the same priority processed in one dispatch
+                           of the queue. Other GLib sources are dispatched between the batches.
+        :type batch_size: int
+
+        :param queue_capacity: Maximal number of signals in every event queue; None means unlimited.
+        :type queue_capacity: int or None
+
+        :param overflow_policy: What to do with signals enqueued by other threads when the queue is full.
+        :type overflow_policy: `simpleline.event_loop.event_queue.OverflowPolicy` enum.
+        """
         super().__init__()
+        self._blocking_wait = blocking_wait
+        self._batch_size = batch_size
+        self._queue_capacity = queue_capacity
+        self._overflow_policy = overflow_policy
+        # contexts iterated by process_signals(return_after) for every awaited signal class
+        self._waiting_contexts = {}
         # Create first loop
         loop = GLib.MainLoop()
-        self._event_loops = [EventLoopData(loop)]
+        self._event_loops = [self._create_loop_data(loop)]
+        # the most inner loop data for every registered signal source
+        self._source_loops = {}
+        # GLib timeout sources of scheduled signals
+        self._timeout_sources = {}
+        # watched file descriptors; the sources are attached to the context of the active loop
+        self._readers = {}
+        # source calling idle callbacks; attached to the context of the active loop
+        self._idle_source = None
+        # destroyed custom sources which can't be released yet
+        self._retired_sources = []
         log.debug("GLib event loop is used!")
 
     @property
@@ -65,70 +106,295 @@ class GLibEventLoop(AbstractEventLoop):
         super().register_signal_source(signal_source)
         loop_data = self._event_loops[-1]
         loop_data.sources.add(signal_source)
+        self._source_loops[signal_source] = loop_data
+
+    def _unregister_signal_source(self, signal_source):
+        self._source_loops.pop(signal_source, None)
+
+        for loop_data in self._event_loops:
+            loop_data.sources.discard(signal_source)
 
     def enqueue_signal(self, signal):
         """Enqueue new event for processing.
 
         :param signal: signal which you want to add to the event queue for processing
         :type signal: instance based on AbstractEvent class
+
+        :return: the enqueued signal; call its `cancel()` method to withdraw it from the queue
         """
         if self._force_quit:
-            return
+            return signal
 
         super().enqueue_signal(signal)
 
-        loop_data = self._find_loop_data_for_source(signal.source)
-        self._register_handlers_to_loop(loop_data.loop, signal)
+        while True:
+            loop_data = self._find_loop_data_for_source(signal.source)
+            enqueued = loop_data.queue.enqueue(signal, block=False)
+            loop_data.dispatcher.update_priority()
+            loop_data.dispatcher.wakeup()
+
+            if enqueued:
+                return signal
+
+            # the queue is full; wait until the loop processes some signals, the loop could be closed meanwhile
+            loop_data.queue.wait_for_space()
+
+    def cancel_signals(self, signal_source):
+        """Cancel all queued signals emitted by the `signal_source`.
+
+        Cancelled signals are skipped when they are taken from the queue. Signals waiting in timers or
+        enqueued later are not affected.
+
+        This method is thread safe.
+
+        :param signal_source: Source of the signals.
+        :type signal_source: Anything.
+        """
+        for loop_data in list(self._event_loops):
+            loop_data.queue.cancel_signals(signal_source)
+
+    def _create_loop_data(self, loop):
+        """Create data of the GLib loop and attach the signal dispatcher to the loop context."""
+        queue = EventQueue(self._metrics, self._queue_capacity, self._overflow_policy)
+        dispatcher = SignalDispatcherSource(queue)
+        loop_data = EventLoopData(loop, queue, dispatcher)
+        dispatcher.set_callback(self._dispatch_signals, loop_data)
+        dispatcher.attach(loop.get_context())
+        return loop_data
 
     def _find_loop_data_for_source(self, source):
         """Find event loop belonging to this signal source."""
-        for loop_data in reversed(self._event_loops):
-            if source in loop_data.sources:
-                return loop_data
+        return self._source_loops.get(source, self._event_loops[-1])
+
+    def _remove_loop_routing(self, closed_loop_data):
+        """Route sources of the closed loop to the next most inner loop where they belong."""
+        for source in closed_loop_data.sources:
+            if self._source_loops.get(source) is not closed_loop_data:
+                continue
+
+            for loop_data in reversed(self._event_loops):
+                if source in loop_data.sources:
+                    self._source_loops[source] = loop_data
+                    break
+            else:
+                del self._source_loops[source]
+
+    def _schedule_signal(self, scheduled):
+        """Attach GLib timeout source for the scheduled signal.
+
+        The source is attached to the context of the loop where the signal source belongs. It fires once
+        at the deadline; periodic signals get a new source for every period. Sources of a closed loop are
+        moved by the `close_loop()` method.
+        """
+        loop_data = self._find_loop_data_for_source(scheduled.signal.source)
+        interval = scheduled.deadline - monotonic()
 
-        return self._event_loops[-1]
+        source = GLib.timeout_source_new(max(math.ceil(interval * 1000), 0))
+        source.set_callback(self._run_timeout, scheduled)
+        self._timeout_sources[scheduled] = source
+        source.attach(loop_data.loop.get_context())
 
-    def _register_handlers_to_loop(self, event_loop, signal):
-        """Register handlers to the event loop."""
-        context = event_loop.get_context()
-        handlers = []
+    def _cancel_scheduled_signal(self, scheduled):
+        source = self._timeout_sources.pop(scheduled, None)
+        if source is not None:
+            source.destroy()
 
-        if type(signal) in self._handlers:
-            handlers = self._handlers[type(signal)]
-        elif type(signal) is ExceptionSignal:
-            handler_data = self._create_event_handler(self._force_quit_with_exception, None)
-            handlers = [handler_data]
+    def _run_timeout(self, scheduled):
+        """Enqueue the scheduled signal and schedule the next period of the periodic signal."""
+        self._timeout_sources.pop(scheduled, None)
+
+        if self._fire_scheduled_signal(scheduled):
+            self._schedule_signal(scheduled)
+
+        return GLib.SOURCE_REMOVE
+
+    def _move_timeouts_from_closed_loop(self, closed_loop_data):
+        context = closed_loop_data.loop.get_context()
 
-        # GLib event source which contains handler callback
-        # Every source can hold only one callback
-        source = GLib.idle_source_new()
-        source.set_priority(signal.priority)
-        data = CallbackArgs(signal, source, handlers)
+        for scheduled, source in list(self._timeout_sources.items()):
+            if source.get_context() == context:
+                source.destroy()
+                self._schedule_signal(scheduled)
+
+    def _dispatch_signals(self, loop_data):
+        """Process a batch of the highest priority signals from the loop queue.
+
+        Signals are taken from the queue one by one, so a nested `process_signals()` called from a handler
+        continues with the rest of the batch. The batch ends after such nested processing. Signals enqueued
+        during the dispatch are left for the next iteration of the context.
+        """
+        self._release_retired_sources()
+        queue = loop_data.queue
+        priority = queue.top_priority()
+        loop_data.dispatch_count += 1
+        dispatch_id = loop_data.dispatch_count
 
-        source.set_callback(self._run_handlers, data)
-        # attach source to the event loop
-        source.attach(context)
+        for _ in range(min(self._batch_size, queue.size())):
+            if priority is None or queue.top_priority() != priority:
+                break
 
-    def _run_handlers(self, data):
-        """Run handlers attached to this signal and clean source afterwards."""
-        signal = data.signal
-        source = data.source
-        handlers = data.handlers
+            signal = queue.get(timeout=0)
+            if signal is None:
+                break
 
-        if not self._force_quit:
             try:
-                for handler in handlers:
-                    handler.callback(signal, handler.data)
+                self._run_handlers(signal)
             except ExitMainLoop:
                 self._quit_all_loops()
-            except Exception:  # pylint: disable=broad-except
-                self.enqueue_signal(ExceptionSignal(self))
+                break
 
-        # based on GLib documentation we should clean source
-        # source will be removed from event loop context this way
+            if loop_data.dispatch_count != dispatch_id:
+                break
+
+        # the dispatcher could be destroyed by closing its loop in a handler
+        if not loop_data.dispatcher.is_destroyed():
+            loop_data.dispatcher.update_priority()
+
+        return GLib.SOURCE_CONTINUE
+
+    def _run_handlers(self, signal):
+        """Run handlers attached to this signal and mark it processed."""
+        if signal.cancelled:
+            self._metrics.signal_cancelled()
+            self._mark_signal_processed(signal)
+            return
+
+        if signal.expired:
+            log.debug("Dropping expired signal %s", signal)
+            self._metrics.signal_expired()
+            self._mark_signal_processed(signal)
+            return
+
+        handlers = self._get_signal_handlers(type(signal))
+
+        if not handlers and isinstance(signal, ExceptionSignal):
+            handler_data = self._create_event_handler(self._force_quit_with_exception, None)
+            handlers = (handler_data,)
+
+        try:
+            if not self._force_quit:
+                with trace_span(signal, CATEGORY_SIGNAL):
+                    for handler in handlers:
+                        with trace_span(handler.callback, CATEGORY_HANDLER):
+                            handler.callback(signal, handler.data)
+        except ExitMainLoop:
+            raise
+        except Exception:  # pylint: disable=broad-except
+            self.enqueue_signal(ExceptionSignal(self))
+        finally:
+            self._mark_signal_processed(signal)
+
+    def add_reader(self, fd, callback, data=None):
+        """Call `callback` when the file descriptor `fd` is ready for reading.
+
+        The descriptor is watched by a GLib source attached to the context of the active loop. The source
+        is moved to the nested loop when it is started and back when the nested loop is closed.
+
+        This method is NOT thread safe!
+
+        :param fd: File descriptor to watch.
+        :type fd: int
+
+        :param callback: The callback function.
+        :type callback: func(fd, data)
+
+        :param data: Optional data to pass to callback.
+        :type data: Anything.
+        """
+        self.remove_reader(fd)
+        handler = self._create_event_handler(callback, data)
+        self._readers[fd] = Reader(handler, self._create_reader_source(fd))
+
+    def remove_reader(self, fd):
+        """Stop watching the file descriptor `fd` registered by the `add_reader()` method.
+
+        This method is NOT thread safe!
+
+        :param fd: Watched file descriptor.
+        :type fd: int
+        """
+        reader = self._readers.pop(fd, None)
+        if reader is not None:
+            self._retire_source(reader.source)
+
+    def _create_reader_source(self, fd):
+        source = FdWatchSource(fd)
+        source.set_callback(self._run_reader_callback, fd)
+        source.attach(self.active_main_loop.get_context())
+        return source
+
+    def _move_readers_to_active_loop(self):
+        for fd, reader in list(self._readers.items()):
+            self._retire_source(reader.source)
+            self._readers[fd] = Reader(reader.handler, self._create_reader_source(fd))
+
+    def _run_reader_callback(self, fd):
+        reader = self._readers.get(fd)
+        if reader is None:
+            return GLib.SOURCE_REMOVE
+
+        try:
+            reader.handler.callback(fd, reader.handler.data)
+        except ExitMainLoop:
+            self._quit_all_loops()
+        except Exception:  # pylint: disable=broad-except
+            self.enqueue_signal(ExceptionSignal(self))
+
+        return GLib.SOURCE_CONTINUE
+
+    def _add_idle_callback(self, idle):
+        """Call the idle callback from an idle GLib source.
+
+        The source is attached to the context of the active loop and it is ready only if the queue of the loop
+        is empty. It's moved to the nested loop when it is started and back when the nested loop is closed.
+        """
+        self._idle_callbacks.append(idle)
+
+        if self._idle_source is None:
+            self._idle_source = self._create_idle_source()
+
+    def _remove_idle_callback(self, idle):
+        super()._remove_idle_callback(idle)
+
+        if not self._idle_callbacks and self._idle_source is not None:
+            self._retire_source(self._idle_source)
+            self._idle_source = None
+
+    def _create_idle_source(self):
+        loop_data = self._event_loops[-1]
+        source = IdleSource(loop_data.queue)
+        source.set_callback(self._run_idle_slice, loop_data.queue)
+        source.attach(loop_data.loop.get_context())
+        return source
+
+    def _move_idle_source_to_active_loop(self):
+        if self._idle_source is not None:
+            self._retire_source(self._idle_source)
+            self._idle_source = self._create_idle_source()
+
+    def _run_idle_slice(self, queue):
+        try:
+            self._run_idle_callbacks(lambda: not queue.empty())
+        except ExitMainLoop:
+            self._quit_all_loops()
+        except Exception:  # pylint: disable=broad-except
+            self.enqueue_signal(ExceptionSignal(self))
+
+        return GLib.SOURCE_CONTINUE
+
+    def _retire_source(self, source):
+        """Destroy the custom source and release it when it is not dispatched.
+
+        PyGObject calls methods of the Python source object until the GLib source is finalized. The source
+        destroyed from its own callback is finalized after the dispatch, so keep the object alive till then.
+        """
         source.destroy()
+        self._retired_sources.append(source)
+        self._release_retired_sources()
 
-        self._mark_signal_processed(signal)
+    def _release_retired_sources(self):
+        if self._retired_sources:
+            self._retired_sources = [s for s in self._retired_sources if s.dispatching]
 
     def _force_quit_with_exception(self, signal, data):
         """Kill all loops and save the exception. Exception will be raised outside of callback."""
@@ -148,6 +414,7 @@ class GLibEventLoop(AbstractEventLoop):
             raise ValueError("Can't run event loop multiple times.")
 
         self._event_loops[0].loop.run()
+        self._shutdown_executors()
         log.debug("Main loop ended. Running callback if set.")
 
         if self._quit_callback:
@@ -163,6 +430,11 @@ class GLibEventLoop(AbstractEventLoop):
         super().force_quit()
         self._quit_all_loops()
 
+        # quit() wakes up only contexts of the running loops
+        for contexts in list(self._waiting_contexts.values()):
+            for context in contexts:
+                context.wakeup()
+
     def execute_new_loop(self, signal):
         """Starts the new event loop and pass `signal` in it.
 
@@ -178,11 +450,14 @@ class GLibEventLoop(AbstractEventLoop):
 
         new_context = GLib.MainContext()
         new_loop = GLib.MainLoop(new_context)
-        loop_data = EventLoopData(new_loop)
+        loop_data = self._create_loop_data(new_loop)
         self._event_loops.append(loop_data)
+        self._move_readers_to_active_loop()
+        self._move_idle_source_to_active_loop()
 
         self.enqueue_signal(signal)
-        new_loop.run()
+        with trace_span("nested_loop", CATEGORY_LOOP):
+            new_loop.run()
 
     def close_loop(self):
         """Close active event loop.
@@ -191,9 +466,15 @@ class GLibEventLoop(AbstractEventLoop):
         """
         super().close_loop()
         old_loop_data = self._event_loops.pop()
+        old_loop_data.queue.close()
+        self._remove_loop_routing(old_loop_data)
+        self._retire_source(old_loop_data.dispatcher)
         old_loop_data.loop.quit()
+        self._move_timeouts_from_closed_loop(old_loop_data)
+        self._move_readers_to_active_loop()
+        self._move_idle_source_to_active_loop()
 
-    def process_signals(self, return_after=None):
+    def process_signals(self, return_after=None, max_signals=None, max_time=None):
         """This method processes incoming async messages.
 
         Process signals enqueued by the `self.enqueue_signal()` method. Call handlers registered to the signals by
@@ -205,33 +486,195 @@ class GLibEventLoop(AbstractEventLoop):
         Without `return_after` parameter this method will return after all queued signals with the highest priority
         will be processed.
 
+        When `max_signals` or `max_time` is specified then process queued signals of the active loop in
+        the priority order until there is none or until the budget is spent. Other GLib sources are not
+        dispatched.
+
         The method is NOT thread safe!
 
         :param return_after: Wait on this signal to be processed.
         :type return_after: Class of the signal.
+
+        :param max_signals: Process at most this number of signals.
+        :type max_signals: int or None
+
+        :param max_time: Don't start processing of other signals after this number of seconds.
+        :type max_time: float or None
+
+        :return: True if there are signals left after a step limited by `max_signals` or `max_time`.
+        :rtype: bool or None
         """
-        super().process_signals(return_after)
+        super().process_signals(return_after, max_signals, max_time)
         loop_data = self._event_loops[-1]
 
+        if max_signals is not None or max_time is not None:
+            return self._process_signals_with_budget(loop_data, max_signals, max_time)
+
         if return_after is not None:
             ticket_id = self._register_wait_on_signal(return_after)
+            context = loop_data.loop.get_context()
+            contexts = self._waiting_contexts.setdefault(return_after, [])
+            contexts.append(context)
 
-            while not self._check_if_signal_processed(return_after, ticket_id) and not self._force_quit:
-                self._iterate_event_loop(loop_data.loop)
+            try:
+                while not self._check_if_signal_processed(return_after, ticket_id) and not self._force_quit:
+                    self._iterate_event_loop(loop_data.loop, self._blocking_wait)
+            finally:
+                contexts.remove(context)
+                if not contexts:
+                    del self._waiting_contexts[return_after]
         else:
             self._iterate_event_loop(loop_data.loop)
 
-    def _iterate_event_loop(self, event_loop):
+        return None
+
+    def _process_signals_with_budget(self, loop_data, max_signals, max_time):
+        """Process queued signals of the loop until the queue is empty or the budget is spent.
+
+        :return: True if there are signals left.
+        """
+        end_time = None if max_time is None else monotonic() + max_time
+        queue = loop_data.queue
+        processed = 0
+
+        while not self._force_quit and (max_signals is None or processed < max_signals):
+            if end_time is not None and monotonic() >= end_time:
+                break
+
+            signal = queue.get(timeout=0)
+            if signal is None:
+                break
+
+            processed += 1
+
+            try:
+                self._run_handlers(signal)
+            except ExitMainLoop:
+                self._quit_all_loops()
+                break
+
+        # the dispatcher could be destroyed by closing its loop in a handler
+        if not loop_data.dispatcher.is_destroyed():
+            loop_data.dispatcher.update_priority()
+
+        return not queue.empty()
+
+    def _mark_signal_processed(self, signal):
+        """Mark the signal processed and wake up contexts waiting on it.
+
+        The waiting context may be blocked in other thread than the one which processed the signal.
+        """
+        super()._mark_signal_processed(signal)
+
+        for context in self._waiting_contexts.get(signal.__class__, ()):
+            context.wakeup()
+
+    def _iterate_event_loop(self, event_loop, may_block=False):
         context = event_loop.get_context()
-        # This is useful for tests
-        wait_on_timeout = False
-        context.iteration(wait_on_timeout)
+        context.iteration(may_block)
 
 
 class EventLoopData(object):
 
-    def __init__(self, loop):
+    def __init__(self, loop, queue, dispatcher):
         super().__init__()
         self.loop = loop
+        self.queue = queue
+        self.dispatcher = dispatcher
+        # number of dispatches of the queue, used to detect nested processing
+        self.dispatch_count = 0
         self.sources = set()
 
+
+class CallbackSource(GLib.Source):
+    """Base of the custom GLib sources which call their callback when dispatched."""
+
+    def __init__(self):
+        super().__init__()
+        # depth of the running dispatches of this source
+        self.dispatching = 0
+
+    def dispatch(self, callback, args):
+        self.dispatching += 1
+        try:
+            return callback(*args)
+        finally:
+            self.dispatching -= 1
+
+
+class SignalDispatcherSource(CallbackSource):
+    """GLib source processing signals from one event queue.
+
+    The source is ready when the queue is not empty. Its priority follows the highest priority of
+    the queued signals, so signals are ordered with other GLib sources the same way as if every
+    signal had its own idle source.
+
+    Enqueueing from other threads is signalled by waking up the context of the source.
+    """
+
+    def __init__(self, queue):
+        super().__init__()
+        self._queue = queue
+        self._priority_lock = Lock()
+        # handlers can process signals recursively by `process_signals()`
+        self.set_can_recurse(True)
+
+    def prepare(self):
+        return not self._queue.empty(), -1
+
+    def check(self):
+        return not self._queue.empty()
+
+    def update_priority(self):
+        """Set priority of this source to the highest priority of the queued signals.
+
+        This method is thread safe.
+        """
+        # TODO: Remove when python3-astroid 1.5.3 will be in Fedora
+        # pylint: disable=not-context-manager
+        with self._priority_lock:
+            priority = self._queue.top_priority()
+            if priority is not None and priority != self.get_priority():
+                self.set_priority(priority)
+
+    def wakeup(self):
+        """Wake up the context if it is iterated by other thread.
+
+        The owner thread will check the queue before it polls the next time.
+        """
+        context = self.get_context()
+        if context is not None and not context.is_owner():
+            context.wakeup()
+
+
+class IdleSource(CallbackSource):
+    """GLib source calling idle callbacks.
+
+    The source is ready only when the event queue is empty so signals always take precedence,
+    even the ones with priority lower than the priority of this source.
+    """
+
+    def __init__(self, queue):
+        super().__init__()
+        self._queue = queue
+        self.set_priority(GLib.PRIORITY_DEFAULT_IDLE)
+
+    def prepare(self):
+        return self._queue.empty(), -1
+
+    def check(self):
+        return self._queue.empty()
+
+
+class FdWatchSource(CallbackSource):
+    """GLib source dispatched when the file descriptor is ready for reading."""
+
+    def __init__(self, fd):
+        super().__init__()
+        self._tag = self.add_unix_fd(fd, GLib.IOCondition.IN | GLib.IOCondition.HUP | GLib.IOCondition.ERR)
+
+    def prepare(self):
+        return False, -1
+
+    def check(self):
+        return bool(self.query_unix_fd(self._tag))
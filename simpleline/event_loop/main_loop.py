@@ -19,12 +19,20 @@
 # Author(s): Jiri Konecny <jkonecny@redhat.com>
 #
 
-from threading import Lock
+import os
+import selectors
+
+from collections import deque
+from heapq import heappush, heappop
+from itertools import count
+from threading import Lock, current_thread, local
+from time import monotonic
 
 from simpleline.event_loop import AbstractEventLoop, ExitMainLoop
-from simpleline.event_loop.event_queue import EventQueue
+from simpleline.event_loop.event_queue import EventQueue, OverflowPolicy
 from simpleline.event_loop.signals import ExceptionSignal
 from simpleline.logging import get_simpleline_logger
+from simpleline.tracing import trace_span, CATEGORY_HANDLER, CATEGORY_LOOP, CATEGORY_SIGNAL
 
 log = get_simpleline_logger()
 
@@ -37,11 +45,53 @@ class MainLoop(AbstractEventLoop):
     This event loop can be replaced by your event loop by implementing `simpleline.event_loop.AbstractEventLoop` class.
     """
 
-    def __init__(self):
+    def __init__(self, batch_size=64, queue_capacity=None, overflow_policy=OverflowPolicy.BLOCK,
+                 max_signal_wait=None):
+        """Create the main loop.
+
+        :param batch_size: Maximal number of signals with the same priority taken from the queue at once.
+        :type batch_size: int
+
+        :param queue_capacity: Maximal number of signals in every event queue; None means unlimited.
+        :type queue_capacity: int or None
+
+        :param overflow_policy: What to do with signals enqueued by other threads when the queue is full.
+        :type overflow_policy: `simpleline.event_loop.event_queue.OverflowPolicy` enum.
+
+        :param max_signal_wait: Age signals waiting longer than this number of seconds so they are processed
+                                before signals with higher priority; None means strict priority order.
+                                `ExceptionSignal` is always processed first. A signal can wait for this time
+                                plus processing of one batch; see the `max_queue_wait` metric.
+        :type max_signal_wait: float or None
+        """
         super().__init__()
-        self._active_queue = EventQueue()
+        self._queue_capacity = queue_capacity
+        self._overflow_policy = overflow_policy
+        self._max_signal_wait = max_signal_wait
+        self._active_queue = self._create_queue()
         self._event_queues = [self._active_queue]
+        # the most inner queue for every registered signal source
+        self._source_queues = {}
         self._lock = Lock()
+        self._batch_size = batch_size
+        # signals taken from a queue which are not yet processed; (queue, deque of signals)
+        self._held_batch = None
+        # watching of file descriptors; created by the first add_reader() call
+        self._selector = None
+        self._wakeup_fds = None
+        self._waiting_on_io = False
+        # readiness notification of a host event loop; the read end of the wakeup pipe is used as the fd
+        self._ready_fd_used = False
+        self._ready_callback = None
+        self._ready_notified = False
+        # heap of scheduled signals (deadline, sequence number, scheduled signal)
+        self._timers = []
+        self._timers_lock = Lock()
+        self._timers_counter = count()
+        # signals enqueued by `enqueue_signal_buffered()`; (thread, deque of signals) for every producer thread
+        self._producer_buffers = []
+        self._thread_buffer = local()
+        self._buffers_pending = False
 
     def register_signal_source(self, signal_source):
         """Register source of signal for actual event queue.
@@ -50,7 +100,21 @@ class MainLoop(AbstractEventLoop):
         :type signal_source: `simpleline.render.ui_screen.UIScreen`.
         """
         super().register_signal_source(signal_source)
-        self._active_queue.add_source(signal_source)
+        # TODO: Remove when python3-astroid 1.5.3 will be in Fedora
+        # pylint: disable=not-context-manager
+        with self._lock:
+            self._active_queue.add_source(signal_source)
+            self._source_queues[signal_source] = self._active_queue
+
+    def _unregister_signal_source(self, signal_source):
+        # TODO: Remove when python3-astroid 1.5.3 will be in Fedora
+        # pylint: disable=not-context-manager
+        with self._lock:
+            self._source_queues.pop(signal_source, None)
+
+            for queue in self._event_queues:
+                if queue.contains_source(signal_source):
+                    queue.remove_source(signal_source)
 
     def run(self):
         """This methods starts the application.
@@ -66,6 +130,7 @@ class MainLoop(AbstractEventLoop):
         except ExitMainLoop:
             pass
 
+        self._shutdown_executors()
         log.debug("Main loop ended. Running callback if set.")
 
         if self._quit_callback:
@@ -79,7 +144,11 @@ class MainLoop(AbstractEventLoop):
         None of the Simpleline events will be processed anymore.
         """
         super().force_quit()
+        for queue in self._event_queues:
+            queue.close()
+
         self._event_queues.clear()
+        self._source_queues.clear()
         self._run_loop = False
 
     def execute_new_loop(self, signal):
@@ -95,7 +164,8 @@ class MainLoop(AbstractEventLoop):
         if self._force_quit:
             return
 
-        self._active_queue = EventQueue()
+        self._release_batch()
+        self._active_queue = self._create_queue()
 
         # TODO: Remove when python3-astroid 1.5.3 will be in Fedora
         # pylint: disable=not-context-manager
@@ -103,7 +173,8 @@ class MainLoop(AbstractEventLoop):
             self._event_queues.append(self._active_queue)
 
         self.enqueue_signal(signal)
-        self._mainloop()
+        with trace_span("nested_loop", CATEGORY_LOOP):
+            self._mainloop()
         log.debug("Inner loop is closed")
 
     def close_loop(self):
@@ -117,7 +188,9 @@ class MainLoop(AbstractEventLoop):
         # TODO: Remove when python3-astroid 1.5.3 will be in Fedora
         # pylint: disable=not-context-manager
         with self._lock:
-            self._event_queues.pop()
+            old_queue = self._event_queues.pop()
+            old_queue.close()
+            self._remove_queue_routing(old_queue)
             try:
                 self._active_queue = self._event_queues[-1]
             except IndexError:
@@ -136,19 +209,422 @@ class MainLoop(AbstractEventLoop):
 
         :param signal: Event which you want to add to the event queue for processing.
         :type signal: Instance based on AbstractEvent class.
+
+        :return: The enqueued signal; call its `cancel()` method to withdraw it from the queue.
         """
         if self._force_quit:
-            return
+            return signal
 
         super().enqueue_signal(signal)
+
+        while True:
+            # TODO: Remove when python3-astroid 1.5.3 will be in Fedora
+            # pylint: disable=not-context-manager
+            with self._lock:
+                queue = self._find_queue_for_source(signal.source)
+                enqueued = queue.enqueue(signal, block=False)
+
+            self._wakeup()
+
+            if enqueued:
+                return signal
+
+            # the queue is full; wait without holding the lock so the loop can process signals
+            queue.wait_for_space()
+
+    def enqueue_signal_buffered(self, signal):
+        """Enqueue new event for processing from a producer thread.
+
+        The signal is appended to a buffer owned by the calling thread without taking any lock. The loop merges
+        the buffers to the event queues when it takes the next signals; signals of one thread keep their order
+        and signals from all the buffers are processed by their priority. Only the first signal after every
+        merge wakes up the loop.
+
+        Buffered signals are routed when merged and they are not limited by the queue capacity.
+
+        This method is thread safe.
+
+        :param signal: Event which you want to add to the event queue for processing.
+        :type signal: Instance based on AbstractEvent class.
+
+        :return: The enqueued signal; call its `cancel()` method to withdraw it from the queue.
+        """
+        if self._force_quit:
+            return signal
+
+        buffer = getattr(self._thread_buffer, "signals", None)
+        if buffer is None:
+            buffer = self._create_producer_buffer()
+
+        buffer.append(signal)
+
+        # the loop clears the flag before it merges the buffers
+        if not self._buffers_pending:
+            self._buffers_pending = True
+            self._active_queue.interrupt()
+            self._wakeup()
+
+        return signal
+
+    def _create_producer_buffer(self):
+        buffer = deque()
+        self._thread_buffer.signals = buffer
+
         # TODO: Remove when python3-astroid 1.5.3 will be in Fedora
         # pylint: disable=not-context-manager
         with self._lock:
-            for queue in reversed(self._event_queues):
-                if queue.enqueue_if_source_belongs(signal, signal.source):
-                    return
+            self._producer_buffers.append((current_thread(), buffer))
+
+        return buffer
+
+    def _merge_producer_buffers(self):
+        """Move signals from the buffers of producer threads to the event queues.
+
+        Buffers of the finished threads are removed.
+        """
+        if not self._buffers_pending:
+            return
+
+        self._buffers_pending = False
+        signals = []
+
+        # TODO: Remove when python3-astroid 1.5.3 will be in Fedora
+        # pylint: disable=not-context-manager
+        with self._lock:
+            buffers = [(thread, buffer) for thread, buffer in self._producer_buffers
+                       if thread.is_alive() or buffer]
+            self._producer_buffers = buffers
+
+        for _, buffer in buffers:
+            # the producer can append during the merge; popleft() takes only the signals already there
+            for _ in range(len(buffer)):
+                signals.append(buffer.popleft())
+
+        if signals:
+            self.enqueue_signals(signals)
+
+    def enqueue_signals(self, signals):
+        """Enqueue multiple signals for processing.
+
+        Signals are routed the same way as in the `enqueue_signal()` method but the locks are taken only once
+        for the whole batch.
+
+        This method is thread safe.
+
+        :param signals: Signals which you want to add to the event queue for processing.
+        :type signals: Iterable of instances based on AbstractEvent class.
+        """
+        if self._force_quit:
+            return
+
+        batches = {}
+        rest = []
 
-        self._active_queue.enqueue(signal)
+        # TODO: Remove when python3-astroid 1.5.3 will be in Fedora
+        # pylint: disable=not-context-manager
+        with self._lock:
+            for signal in signals:
+                queue = self._find_queue_for_source(signal.source)
+                batches.setdefault(queue, []).append(signal)
+
+            for queue, batch in batches.items():
+                log.debug("%d signals enqueued in batch", len(batch))
+                rest.extend(queue.enqueue_signals(batch, block=False))
+
+        self._wakeup()
+
+        # some queues are full
+        for signal in rest:
+            self.enqueue_signal(signal)
+
+    def cancel_signals(self, signal_source):
+        """Cancel all queued signals emitted by the `signal_source`.
+
+        Cancelled signals are skipped when they are taken from the queue. Signals waiting in timers,
+        buffers of producer threads or enqueued later are not affected.
+
+        This method is thread safe.
+
+        :param signal_source: Source of the signals.
+        :type signal_source: Anything.
+        """
+        # TODO: Remove when python3-astroid 1.5.3 will be in Fedora
+        # pylint: disable=not-context-manager
+        with self._lock:
+            queues = list(self._event_queues)
+
+        cancelled = sum(queue.cancel_signals(signal_source) for queue in queues)
+
+        # signals of the held batch are already taken from the queue
+        held = self._held_batch
+        if held is not None:
+            for signal in list(held[1]):
+                if signal.source is signal_source and not signal.cancelled:
+                    signal.cancel()
+                    cancelled += 1
+
+        log.debug("%d signals of %s cancelled", cancelled, signal_source)
+
+    def _create_queue(self):
+        return EventQueue(self._metrics, self._queue_capacity, self._overflow_policy, self._max_signal_wait)
+
+    def add_reader(self, fd, callback, data=None):
+        """Call `callback` when the file descriptor `fd` is ready for reading.
+
+        The descriptor is watched together with the event queue when the loop waits for signals.
+
+        This method is NOT thread safe!
+
+        :param fd: File descriptor to watch.
+        :type fd: int
+
+        :param callback: The callback function.
+        :type callback: func(fd, data)
+
+        :param data: Optional data to pass to callback.
+        :type data: Anything.
+        """
+        if self._selector is None:
+            self._create_selector()
+
+        handler = self._create_event_handler(callback, data)
+
+        try:
+            self._selector.modify(fd, selectors.EVENT_READ, handler)
+        except KeyError:
+            self._selector.register(fd, selectors.EVENT_READ, handler)
+
+    def remove_reader(self, fd):
+        """Stop watching the file descriptor `fd` registered by the `add_reader()` method.
+
+        This method is NOT thread safe!
+
+        :param fd: Watched file descriptor.
+        :type fd: int
+        """
+        if self._selector is None:
+            return
+
+        try:
+            self._selector.unregister(fd)
+        except KeyError:
+            return
+
+        # only the wakeup pipe is left
+        if len(self._selector.get_map()) == 1:
+            self._close_selector()
+
+    def get_ready_fd(self):
+        """Return file descriptor which is readable when there are signals to process.
+
+        The descriptor is the read end of the pipe used to wake up this loop. Signals enqueued from any thread
+        make it readable. See `AbstractEventLoop.get_ready_fd()`.
+
+        :rtype: int
+        """
+        self._create_wakeup_pipe()
+        self._ready_fd_used = True
+
+        if not self._active_queue.empty():
+            self._notify_ready()
+
+        return self._wakeup_fds[0]
+
+    def set_ready_callback(self, callback):
+        """Call `callback` when there are new signals to process.
+
+        See `AbstractEventLoop.set_ready_callback()`.
+
+        :param callback: The callback function; None removes the callback.
+        :type callback: func()
+        """
+        self._ready_callback = callback
+        self._ready_notified = False
+
+        if callback is not None and not self._active_queue.empty():
+            self._notify_ready()
+
+    def _create_selector(self):
+        self._create_wakeup_pipe()
+        self._selector = selectors.DefaultSelector()
+        self._selector.register(self._wakeup_fds[0], selectors.EVENT_READ)
+
+    def _close_selector(self):
+        self._selector.close()
+        self._selector = None
+
+        # the host event loop is still watching the pipe
+        if not self._ready_fd_used:
+            self._close_wakeup_pipe()
+
+    def _create_wakeup_pipe(self):
+        if self._wakeup_fds is not None:
+            return
+
+        self._wakeup_fds = os.pipe()
+        for fd in self._wakeup_fds:
+            os.set_blocking(fd, False)
+
+    def _close_wakeup_pipe(self):
+        for fd in self._wakeup_fds:
+            os.close(fd)
+        self._wakeup_fds = None
+
+    def _wakeup(self):
+        """Wake up the loop waiting on watched file descriptors and notify the host event loop."""
+        if self._waiting_on_io:
+            self._write_wakeup_pipe()
+
+        if self._ready_fd_used or self._ready_callback is not None:
+            self._notify_ready()
+
+    def _write_wakeup_pipe(self):
+        try:
+            os.write(self._wakeup_fds[1], b"\0")
+        except (OSError, TypeError):
+            # the pipe is full or already closed so the loop is awake anyway
+            pass
+
+    def _notify_ready(self):
+        """Tell the host event loop there are signals to process.
+
+        The host is notified only once until the next step of processing.
+        """
+        if self._ready_notified:
+            return
+
+        self._ready_notified = True
+
+        if self._ready_fd_used:
+            self._write_wakeup_pipe()
+
+        callback = self._ready_callback
+        if callback is not None:
+            callback()
+
+    def _wait_on_io(self, queue, timeout=None):
+        """Wait on watched file descriptors and call their callbacks.
+
+        Return immediately if the `queue` is not empty or buffered signals are pending. Enqueued signals
+        wake up this wait.
+        """
+        self._waiting_on_io = True
+        try:
+            if not queue.empty() or self._buffers_pending:
+                return
+
+            events = self._selector.select(timeout)
+        finally:
+            self._waiting_on_io = False
+
+        for key, _ in events:
+            if key.fd == self._wakeup_fds[0]:
+                self._drain_wakeup_pipe()
+            else:
+                self._run_reader_callback(key.data, key.fd)
+
+            # callbacks can remove the last reader
+            if self._selector is None:
+                return
+
+    def _drain_wakeup_pipe(self):
+        # the host has to be notified again about the next signals
+        self._ready_notified = False
+
+        try:
+            while os.read(self._wakeup_fds[0], 4096):
+                pass
+        except BlockingIOError:
+            pass
+
+    def _run_reader_callback(self, handler, fd):
+        try:
+            handler.callback(fd, handler.data)
+        except ExitMainLoop:
+            raise
+        except Exception:  # pylint: disable=broad-except
+            self.enqueue_signal(ExceptionSignal(self))
+
+    def _add_idle_callback(self, idle):
+        """Call the idle callback when the loop waits for signals.
+
+        The loop doesn't block while there are idle callbacks; it polls the queue, watched file descriptors
+        and timers between the time slices of the callbacks.
+        """
+        self._idle_callbacks.append(idle)
+
+    def _run_idle_slice(self, queue):
+        try:
+            self._run_idle_callbacks(lambda: not queue.empty() or self._buffers_pending)
+        except ExitMainLoop:
+            raise
+        except Exception:  # pylint: disable=broad-except
+            self.enqueue_signal(ExceptionSignal(self))
+
+    def _schedule_signal(self, scheduled):
+        """Add the scheduled signal to the timer heap.
+
+        The waiting loop is interrupted to recompute the time of its next wake up.
+        """
+        # TODO: Remove when python3-astroid 1.5.3 will be in Fedora
+        # pylint: disable=not-context-manager
+        with self._timers_lock:
+            heappush(self._timers, (scheduled.deadline, next(self._timers_counter), scheduled))
+
+        self._active_queue.interrupt()
+        self._wakeup()
+
+    def _run_expired_timers(self):
+        """Enqueue signals of the expired timers.
+
+        :return: Seconds to the next timer or None if there is no timer.
+        """
+        if not self._timers:
+            return None
+
+        now = monotonic()
+        expired = []
+
+        # TODO: Remove when python3-astroid 1.5.3 will be in Fedora
+        # pylint: disable=not-context-manager
+        with self._timers_lock:
+            while self._timers and (self._timers[0][0] <= now or self._timers[0][2].cancelled):
+                expired.append(heappop(self._timers)[2])
+
+        for scheduled in expired:
+            if self._fire_scheduled_signal(scheduled):
+                self._schedule_signal(scheduled)
+
+        # TODO: Remove when python3-astroid 1.5.3 will be in Fedora
+        # pylint: disable=not-context-manager
+        with self._timers_lock:
+            if not self._timers:
+                return None
+
+            return max(self._timers[0][0] - monotonic(), 0)
+
+    def _find_queue_for_source(self, source):
+        """Find the most inner queue where the `source` belongs or the active queue.
+
+        Must be called with the lock held.
+        """
+        return self._source_queues.get(source, self._active_queue)
+
+    def _remove_queue_routing(self, closed_queue):
+        """Route sources of the closed queue to the next most inner queue where they belong.
+
+        Must be called with the lock held.
+        """
+        for source in closed_queue.sources:
+            if self._source_queues.get(source) is not closed_queue:
+                continue
+
+            for queue in reversed(self._event_queues):
+                if queue.contains_source(source):
+                    self._source_queues[source] = queue
+                    break
+            else:
+                del self._source_queues[source]
 
     def _mainloop(self):
         """Single mainloop. Do not use directly, start the application using run()."""
@@ -161,7 +637,7 @@ class MainLoop(AbstractEventLoop):
             # set back to True to leave outer loop working
             self._run_loop = True
 
-    def process_signals(self, return_after=None):
+    def process_signals(self, return_after=None, max_signals=None, max_time=None):
         """This method processes incoming async messages.
 
         Process signals enqueued by the `self.enqueue_signal()` method. Call handlers registered to the signals by
@@ -173,17 +649,36 @@ class MainLoop(AbstractEventLoop):
         Without `return_after` parameter this method will return after all queued signals with the highest priority
         will be processed.
 
+        When `max_signals` or `max_time` is specified then process queued signals in the priority order until
+        there is none or until the budget is spent. Expired timers and watched file descriptors are served
+        at the beginning of the step. See `get_ready_fd()` and `set_ready_callback()`.
+
         The method is NOT thread safe!
 
         :param return_after: Wait on this signal to be processed.
         :type return_after: Class of the signal.
+
+        :param max_signals: Process at most this number of signals.
+        :type max_signals: int or None
+
+        :param max_time: Don't start processing of other signals after this number of seconds.
+        :type max_time: float or None
+
+        :return: True if there are signals left after a step limited by `max_signals` or `max_time`.
+        :rtype: bool or None
         """
-        super().process_signals(return_after)
+        super().process_signals(return_after, max_signals, max_time)
+        self._release_batch()
+
         if return_after is not None:
             self._process_signals_with_return(return_after)
+        elif max_signals is not None or max_time is not None:
+            return self._process_signals_with_budget(max_signals, max_time)
         else:
             self._process_signals_iteration()
 
+        return None
+
     def _process_signals_with_return(self, return_after):
         """Process signals until the return_after signal was processed.
 
@@ -193,55 +688,210 @@ class MainLoop(AbstractEventLoop):
         unique_id = self._register_wait_on_signal(return_after)
 
         while self._run_loop:
-            signal = self._active_queue.get()
+            queue = self._active_queue
+            batch = self._get_batch(queue)
 
             # do the signal processing (call handlers)
-            self._process_signal(signal)
-
-            # was our signal processed if yes, return this method
-            if self._check_if_signal_processed(return_after, unique_id):
+            # and return if our signal was processed
+            if self._process_batch(queue, batch, (return_after, unique_id)):
                 return
 
     def _process_signals_iteration(self):
         """Process queued signal and then return."""
-        priority = None
+        self._merge_producer_buffers()
+        self._run_expired_timers()
+        queue = self._active_queue
+        priority = queue.top_priority()
 
-        while not self._active_queue.empty() and self._run_loop:
-            if priority is None:
-                # take first signal to find out the highest priority in queue
-                signal = self._active_queue.get()
-                priority = signal.priority
-            else:
-                # get signal with this priority only
-                signal = self._active_queue.get_top_event_if_priority(priority)
+        # process signals with the highest priority only
+        while self._run_loop and priority is not None and queue.top_priority() == priority:
+            batch = queue.drain(priority, self._batch_size)
+            self._process_batch(queue, batch)
+
+    def _process_signals_with_budget(self, max_signals, max_time):
+        """Process queued signals until the queue is empty or the budget is spent.
+
+        :return: True if there are signals left.
+        """
+        self._clear_ready()
+        end_time = None if max_time is None else monotonic() + max_time
+        processed = 0
 
-            # Signal with this priority is not available anymore
+        self._merge_producer_buffers()
+        self._run_expired_timers()
+
+        if self._selector is not None:
+            self._wait_on_io(self._active_queue, 0)
+
+        while self._run_loop and (max_signals is None or processed < max_signals):
+            if end_time is not None and monotonic() >= end_time:
+                break
+
+            signal = self._active_queue.get(timeout=0)
             if signal is None:
-                return
+                break
 
             self._process_signal(signal)
+            processed += 1
+            self._merge_producer_buffers()
+
+        pending = not self._active_queue.empty()
+
+        # the next step is needed
+        if pending:
+            self._notify_ready()
+
+        return pending
+
+    def _clear_ready(self):
+        """Start a new step of processing; the host will be notified about the next signals."""
+        if self._ready_fd_used:
+            self._drain_wakeup_pipe()
+
+        self._ready_notified = False
 
     def _process_signals_loop(self):
         """Process signal until the event loop quited."""
         while self._run_loop:
-            signal = self._active_queue.get()
-            self._process_signal(signal)
+            queue = self._active_queue
+            self._process_batch(queue, self._get_batch(queue))
 
-    def _process_signal(self, signal):
-        log.debug("Processing signal %s", signal)
+    def _get_batch(self, queue):
+        """Wait for a signal and return it with other queued signals of the same priority.
+
+        Return empty batch if the loop was stopped during the wait.
+        """
+        signal = self._wait_for_signal(queue)
+        if signal is None:
+            return []
+
+        batch = [signal]
+        batch.extend(queue.drain(signal.priority, self._batch_size - 1))
+        return batch
+
+    def _wait_for_signal(self, queue):
+        """Wait for the next signal in the `queue`.
+
+        Expired timers, watched file descriptors and idle callbacks are served during the wait.
+
+        :return: Signal or None if the loop was stopped.
+        """
+        while self._run_loop:
+            # signals and timers added from now on write to the wakeup pipe, so they can't be missed
+            # between the checks below and the wait on the file descriptors
+            self._waiting_on_io = self._selector is not None
+
+            self._merge_producer_buffers()
+            timeout = self._run_expired_timers()
+
+            # only poll when there is some idle work to do
+            idle = bool(self._idle_callbacks)
+            if idle:
+                timeout = 0
 
+            if self._selector is None:
+                signal = queue.get(timeout)
+            else:
+                signal = queue.get(timeout=0)
+                if signal is None:
+                    self._wait_on_io(queue, timeout)
+                else:
+                    self._waiting_on_io = False
+
+            if signal is not None:
+                return signal
+
+            if idle:
+                self._run_idle_slice(queue)
+
+        return None
+
+    def _process_batch(self, queue, batch, wait_on=None):
+        """Process batch of signals with the same priority taken from the `queue`.
+
+        Processing of the batch stops when a signal with higher priority is enqueued or when the handler
+        starts nested processing of signals. Unprocessed signals are returned back to the queue.
+
+        The batch taken because of aging is processed before the queued signals with higher priority;
+        it stops only for signals with priority higher than all of them.
+
+        :param wait_on: Return when this signal was processed; tuple (signal class, ticket id).
+        :type wait_on: tuple or None
+
+        :return: True if the `wait_on` signal was processed.
+        """
+        held = (queue, deque(batch))
+        signals = held[1]
+        self._held_batch = held
+
+        # priority of the signals which interrupt the batch
+        limit = queue.top_priority()
+        if batch and (limit is None or limit > batch[0].priority):
+            limit = batch[0].priority
+
+        try:
+            while signals and self._run_loop and self._held_batch is held:
+                signal = signals.popleft()
+                self._process_signal(signal)
+
+                if wait_on is not None and self._check_if_signal_processed(*wait_on):
+                    return True
+
+                self._merge_producer_buffers()
+                top_priority = queue.top_priority()
+                if top_priority is not None and top_priority < limit:
+                    break
+        finally:
+            if self._held_batch is held:
+                self._release_batch()
+
+        return False
+
+    def _release_batch(self):
+        """Return unprocessed signals of the held batch back to the queue.
+
+        This must be called before nested processing of signals to keep the queue order.
+        """
+        held = self._held_batch
+        if held is None:
+            return
+
+        self._held_batch = None
+        queue, signals = held
+
+        if signals:
+            queue.requeue(signals)
+            signals.clear()
+
+    def _process_signal(self, signal):
         self._mark_signal_processed(signal)
 
-        if type(signal) in self._handlers:
-            for handler_data in self._handlers[type(signal)]:
-                try:
-                    handler_data.callback(signal, handler_data.data)
-                except ExitMainLoop:
-                    raise
-                except Exception:  # pylint: disable=broad-except
-                    self.enqueue_signal(ExceptionSignal(self))
-        elif type(signal) is ExceptionSignal:
-            self._raise_exception(signal)
+        if signal.cancelled:
+            log.debug("Skipping cancelled signal %s", signal)
+            self._metrics.signal_cancelled()
+            return
+
+        if signal.expired:
+            log.debug("Dropping expired signal %s", signal)
+            self._metrics.signal_expired()
+            return
+
+        log.debug("Processing signal %s", signal)
+
+        handlers = self._get_signal_handlers(type(signal))
+
+        with trace_span(signal, CATEGORY_SIGNAL):
+            if handlers:
+                for handler_data in handlers:
+                    try:
+                        with trace_span(handler_data.callback, CATEGORY_HANDLER):
+                            handler_data.callback(signal, handler_data.data)
+                    except ExitMainLoop:
+                        raise
+                    except Exception:  # pylint: disable=broad-except
+                        self.enqueue_signal(ExceptionSignal(self))
+            elif isinstance(signal, ExceptionSignal):
+                self._raise_exception(signal)
 
     def _raise_exception(self, signal):
         raise signal.exception_info[0] from signal.exception_info[1]
@@ -0,0 +1,131 @@
+# Metrics collected by the event loops.
+#
+# Copyright (C) 2017  Red Hat, Inc.
+#
+# This copyrighted material is made available to anyone wishing to use,
+# modify, copy, or redistribute it subject to the terms and conditions of
+# the GNU General Public License v.2, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY expressed or implied, including the implied warranties of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+# Public License for more details.  You should have received a copy of the
+# GNU General Public License along with this program; if not, write to the
+# Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+# 02110-1301, USA.  Any Red Hat trademarks that are incorporated in the
+# source code or documentation are not subject to the GNU General Public
+# License and may only be used or replicated with the express permission of
+# Red Hat, Inc.
+#
+
+from threading import Lock
+
+__all__ = ["EventLoopMetrics"]
+
+
+class EventLoopMetrics(object):
+    """Counters describing the work of an event loop.
+
+    Get the instance by the `AbstractEventLoop.metrics` property. The counters are
+    updated by the event loop and its queues; they can be read from any thread.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._lock = Lock()
+        self.coalesced_signals = 0
+        self.dropped_signals = 0
+        self.cancelled_signals = 0
+        self.expired_signals = 0
+        self.aged_signals = 0
+        self.queue_high_water_mark = 0
+        # the longest time in seconds a signal spent in a queue for every priority
+        self.max_queue_wait = {}
+
+    def signal_coalesced(self):
+        """Count signal merged with an already queued signal.
+
+        This method is thread safe.
+        """
+        # TODO: Remove when python3-astroid 1.5.3 will be in Fedora
+        # pylint: disable=not-context-manager
+        with self._lock:
+            self.coalesced_signals += 1
+
+    def signal_dropped(self):
+        """Count signal dropped because the queue was full.
+
+        This method is thread safe.
+        """
+        # TODO: Remove when python3-astroid 1.5.3 will be in Fedora
+        # pylint: disable=not-context-manager
+        with self._lock:
+            self.dropped_signals += 1
+
+    def signal_cancelled(self):
+        """Count cancelled signal skipped by the event loop.
+
+        This method is thread safe.
+        """
+        # TODO: Remove when python3-astroid 1.5.3 will be in Fedora
+        # pylint: disable=not-context-manager
+        with self._lock:
+            self.cancelled_signals += 1
+
+    def signal_expired(self):
+        """Count signal dropped by the event loop because its deadline was over.
+
+        This method is thread safe.
+        """
+        # TODO: Remove when python3-astroid 1.5.3 will be in Fedora
+        # pylint: disable=not-context-manager
+        with self._lock:
+            self.expired_signals += 1
+
+    def signal_waited(self, priority, wait, aged=False):
+        """Update the longest time a signal with the `priority` spent in a queue.
+
+        This method is thread safe.
+
+        :param priority: Priority of the signal.
+        :type priority: int
+
+        :param wait: Seconds the signal spent in the queue.
+        :type wait: float
+
+        :param aged: Was the signal taken before signals with higher priority because it waited too long?
+        :type aged: bool
+        """
+        # the lock is not needed when the maximum doesn't change
+        if not aged and wait <= self.max_queue_wait.get(priority, -1):
+            return
+
+        # TODO: Remove when python3-astroid 1.5.3 will be in Fedora
+        # pylint: disable=not-context-manager
+        with self._lock:
+            if aged:
+                self.aged_signals += 1
+
+            if wait > self.max_queue_wait.get(priority, -1):
+                self.max_queue_wait[priority] = wait
+
+    def queue_size_reached(self, size):
+        """Update the highest number of signals queued in one queue.
+
+        This method is thread safe.
+        """
+        # TODO: Remove when python3-astroid 1.5.3 will be in Fedora
+        # pylint: disable=not-context-manager
+        with self._lock:
+            if size > self.queue_high_water_mark:
+                self.queue_high_water_mark = size
+
+    def to_dict(self):
+        """Return the current values of all counters.
+
+        :rtype: dict
+        """
+        # TODO: Remove when python3-astroid 1.5.3 will be in Fedora
+        # pylint: disable=not-context-manager
+        with self._lock:
+            return {name: dict(value) if isinstance(value, dict) else value
+                    for name, value in vars(self).items() if not name.startswith("_")}
@@ -20,7 +20,7 @@
 #
 
 from sys import exc_info
-from simpleline.event_loop import AbstractSignal
+from simpleline.event_loop import AbstractSignal, CoalescePolicy
 
 
 class ExceptionSignal(AbstractSignal):
@@ -69,9 +69,20 @@ class InputReadySignal(AbstractSignal):
 
 
 class RenderScreenSignal(AbstractSignal):
-    """Render UIScreen to terminal."""
-    pass
+    """Render UIScreen to terminal.
+
+    The top screen is always rendered so waiting render requests from the same source are merged.
+    """
+    coalesce_policy = CoalescePolicy.KEEP_LATEST
 
 
 class CloseScreenSignal(AbstractSignal):
     """Close current screen."""
+
+
+class ExecutorTaskDoneSignal(AbstractSignal):
+    """Function started by `AbstractEventLoop.run_in_executor()` ended.
+
+    The source of this signal is the `simpleline.event_loop.ExecutorTask` instance.
+    """
+    pass
@@ -24,52 +24,48 @@ class TicketMachine(object):
     """Hold signals processed by the event loop if someone wait on them.
 
     This is useful when recursive process events will skip required signal.
+
+    Tickets are numbers taken from one counter. Every line remembers the counter value from the time when
+    it was marked the last time. The ticket is ready to go if it was taken before that. All operations are
+    done in constant time and only one number is stored for every line.
     """
 
     def __init__(self):
+        # counter value from the time when the line was marked the last time
         self._lines = {}
         self._counter = 0
 
-    def take_ticket(self, line_id):
+    def take_ticket(self, line_id):  # pylint: disable=unused-argument
         """Take ticket (id) and go line (processing events).
 
         Use `check_ticket` if you are ready to go.
 
         :param line_id: Line where you are waiting.
-        :type line_id: Anything.
+        :type line_id: Anything hashable.
         """
         obj_id = self._counter
-        if line_id not in self._lines:
-            self._lines[line_id] = {obj_id: False}
-        else:
-            self._lines[line_id][obj_id] = False
-
         self._counter += 1
         return obj_id
 
     def check_ticket(self, line, unique_id):
         """Check if you are ready to go.
 
-        If True the unique_id is not valid anymore.
+        The ticket stays valid, it is not necessary to return it.
 
         :param unique_id: Your id used to identify you in the line.
         :type unique_id: int
 
         :param line: Line where you are waiting.
-        :type line: Anything.
+        :type line: Anything hashable.
         """
-        if self._lines[line][unique_id]:
-            return self._lines[line].pop(unique_id)
+        return unique_id < self._lines.get(line, 0)
 
     def mark_line_to_go(self, line):
         """All in the `line` are ready to go.
 
-        Mark all tickets in the line as True.
+        Mark all tickets taken in the line until now.
 
         :param line: Line which should processed.
-        :type line: Anything.
+        :type line: Anything hashable.
         """
-        if line in self._lines:
-            our_line = self._lines[line]
-            for key in our_line:
-                our_line[key] = True
+        self._lines[line] = self._counter
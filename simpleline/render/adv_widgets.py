@@ -97,6 +97,22 @@ class PasswordDialog(UIScreen):
             return InputState.DISCARDED
 
 
+class AsyncPasswordDialog(PasswordDialog):
+    """Dialog screen for password input which doesn't block the event loop.
+
+    The passphrase is awaited by the coroutine prompt, so other signals are processed while
+    the user is typing.
+    """
+
+    async def prompt(self, args=None):
+        self._password = await self.ask(_("Passphrase: "), hidden=True)
+        if not self._password:
+            return None
+        else:
+            # see PasswordDialog.prompt() why the dialog is closed here
+            self.close()
+
+
 class YesNoDialog(UIScreen):
     """Dialog screen for Yes - No questions."""
 
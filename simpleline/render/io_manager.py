@@ -23,15 +23,19 @@ import threading
 import sys
 import getpass
 
+from queue import Queue
+
 from enum import Enum
 
 from simpleline.render.screen import InputState
 from simpleline.event_loop import ExitMainLoop
 from simpleline.event_loop.signals import ExceptionSignal, InputReadySignal
 from simpleline.render.prompt import Prompt
+from simpleline.render.stdin_reader import StdinReader
 from simpleline.render.widgets import TextWidget
 
 from simpleline.logging import get_simpleline_logger
+from simpleline.tracing import trace_span, CATEGORY_INPUT
 
 log = get_simpleline_logger()
 
@@ -45,10 +49,11 @@ class InOutManager(object):
         :type event_loop: Class based on `simpleline.event_loop.AbstractEventLoop`.
         """
         super().__init__()
-        self._input_lock = threading.Lock()
         self._input_error_counter = 0
         self._input_error_threshold = 5
-        self._input_thread = None
+        self._input_thread = InputThread(self._thread_input)
+        self._input_pending = False
+        self._stdin_reader = None
         self._event_loop = event_loop
         self._getpass_func = getpass.getpass
         self._width = 80
@@ -90,8 +95,7 @@ class InOutManager(object):
 
     def _user_input_received_handler(self, signal, args):
         self._user_input = signal.data
-        # wait for the input thread to finish
-        self._input_thread.join()
+        self._input_pending = False
 
         # call async callback
         if self._user_input_callback is not None:
@@ -104,6 +108,21 @@ class InOutManager(object):
         """Set a function for getting passwords."""
         self._getpass_func = getpass_func
 
+    def use_stdin_reader(self, fd=None):
+        """Read user input by watching the standard input in the event loop.
+
+        No thread is started to get the user input. The event loop has to support the `add_reader()` method.
+        Threads are still used for hidden input if it's not read from a terminal or a custom function
+        for getting passwords is set.
+
+        :param fd: File descriptor to read; standard input is used if not specified.
+        :type fd: int
+        """
+        if self._stdin_reader is not None:
+            self._stdin_reader.close()
+
+        self._stdin_reader = StdinReader(self._event_loop, self, fd)
+
     def draw(self, active_screen):
         """Draws the current `active_screen`.
 
@@ -134,12 +153,26 @@ class InOutManager(object):
 
         :raises: ExitMainLoop or any other kind of exception from screen processing.
 
+        :return: Return data object with result status and state.
+        :rtype: `simpleline.render.in_out_manager.UserInputResult` class.
+        """
+        key = active_screen.ui_screen.input(active_screen.args, user_input)
+        return self.process_input_key(key)
+
+    def process_input_key(self, key):
+        """Process the key returned by the `input` method of the screen.
+
+        This is used when the `input` method is a coroutine and the key is known only when the coroutine ends.
+
+        :param key: Key returned by the screen.
+        :type key: `simpleline.render.screen.InputState` enum | str
+
         :return: Return data object with result status and state.
         :rtype: `simpleline.render.in_out_manager.UserInputResult` class.
         """
         # process the input, if it wasn't processed (valid)
         # increment the error counter
-        result = self._process_input(active_screen, user_input)
+        result = self._process_input_key(key)
         if result.was_successful():
             self._input_error_counter = 0
         else:
@@ -164,7 +197,7 @@ class InOutManager(object):
         if self._is_input_expected(prompt):
             self._user_input_callback = callback
 
-            self._check_input_thread_running()
+            self._check_input_pending()
             self._start_user_input_async(prompt, hidden)
 
     def get_user_input(self, prompt, hidden=False):
@@ -185,7 +218,7 @@ class InOutManager(object):
         if not self._is_input_expected(prompt):
             return ""
 
-        self._check_input_thread_running()
+        self._check_input_pending()
 
         self._start_user_input_async(prompt, hidden)
         return self._wait_on_user_input()
@@ -205,9 +238,9 @@ class InOutManager(object):
             self._start_user_input_async(prompt, hidden)
             return self._wait_on_user_input()
 
-    def _check_input_thread_running(self):
-        if self._input_thread is not None and self._input_thread.is_alive():
-            raise KeyError("Can't run multiple input threads at the same time!")
+    def _check_input_pending(self):
+        if self._input_pending:
+            raise KeyError("Can't run multiple input requests at the same time!")
 
     def _is_input_expected(self, prompt):
         """Check if user handled input processing some other way.
@@ -225,20 +258,46 @@ class InOutManager(object):
             return True
 
     def _start_user_input_async(self, prompt, hidden):
-        self._input_thread = threading.Thread(target=self._thread_input, name="InputThread",
-                                              args=(prompt, hidden))
-        self._input_thread.daemon = True
-        self._input_thread.start()
+        if self._input_pending:
+            # somebody is already waiting, the input will be shared
+            self._print_prompt(prompt)
+            return
+
+        self._input_pending = True
+
+        if self._can_use_stdin_reader(hidden):
+            self._print_prompt(prompt)
+            self._stdin_reader.request_line(hidden)
+        else:
+            self._input_thread.request_input(prompt, hidden)
+
+    def _can_use_stdin_reader(self, hidden):
+        if self._stdin_reader is None:
+            return False
+
+        if not hidden:
+            return True
+
+        # custom getpass function has to be called in a thread
+        return self._getpass_func is getpass.getpass and self._stdin_reader.can_hide_input
+
+    def _print_prompt(self, prompt):
+        widget = TextWidget(str(prompt))
+        widget.render(self._width)
+        lines = widget.get_lines()
+        sys.stdout.write("\n".join(lines) + " ")
+        sys.stdout.flush()
 
     def _wait_on_user_input(self):
-        self._event_loop.process_signals(InputReadySignal)
+        with trace_span("wait_on_user_input", CATEGORY_INPUT):
+            self._event_loop.process_signals(InputReadySignal)
         return self._user_input  # return the user input
 
     def _thread_input(self, prompt, hidden):
         """This method is responsible for interruptable user input.
 
-        It is expected to be used in a thread started on demand
-        and returns the input via the communication Queue.
+        It is expected to be called from the input thread
+        and returns the input via the `InputReadySignal` signal.
 
         :param prompt: prompt to be displayed
         :type prompt: Prompt instance
@@ -246,54 +305,39 @@ class InOutManager(object):
         :param hidden: whether typed characters should be echoed or not
         :type hidden: bool
         """
-        if hidden:
-            data = self._getpass_func(prompt)
-        else:
-            widget = TextWidget(str(prompt))
-            widget.render(self._width)
-            lines = widget.get_lines()
-            sys.stdout.write("\n".join(lines) + " ")
-            sys.stdout.flush()
-            if not self._input_lock.acquire(False):
-                # raw_input is already running
-                return
+        data = ""
+
+        # the input is always returned, an empty one if the reading failed; the waiter would block forever
+        try:
+            if hidden:
+                with trace_span("input_wait", CATEGORY_INPUT):
+                    data = self._getpass_func(prompt)
             else:
-                # lock acquired, we can run input
-                try:
+                self._print_prompt(prompt)
+                with trace_span("input_wait", CATEGORY_INPUT):
                     data = self._get_input()
-                except EOFError:
-                    data = ""
-                finally:
-                    self._input_lock.release()
-
-        self._event_loop.enqueue_signal(InputReadySignal(self, data))
+        except EOFError:
+            data = ""
+        finally:
+            self._event_loop.enqueue_signal(InputReadySignal(self, data))
 
     def _get_input(self):
         return input()
 
-    def _process_input(self, active_screen, key):
+    def _process_input_key(self, key):
         """Method called internally to process unhandled input key presses.
 
-        :param active_screen: Screen for input processing.
-        :type active_screen: Class based on `simpleline.render.screen_stack.screen_data`.
-
-        :param key: The string entered by user.
-        :type key: String.
+        :param key: The key returned by the active screen.
+        :type key: `simpleline.render.screen.InputState` enum | str
 
         :return: Return state result object.
         :rtype: `simpleline.render.in_out_manager.UserInputResult` class.
-
-        :raises: Anything the Screen can raise in the input processing.
         """
-        # delegate the handling to active screen first
-        try:
-            key = active_screen.ui_screen.input(active_screen.args, key)
-            if key == InputState.PROCESSED:
-                return UserInputResult.PROCESSED
-            elif key == InputState.DISCARDED:
-                return UserInputResult.ERROR
-        except ExitMainLoop:
-            raise
+        # the key was handled by the active screen
+        if key == InputState.PROCESSED:
+            return UserInputResult.PROCESSED
+        elif key == InputState.DISCARDED:
+            return UserInputResult.ERROR
 
         # global refresh command
         if key == Prompt.REFRESH:
@@ -313,6 +357,61 @@ class InOutManager(object):
         return UserInputResult.ERROR
 
 
+class InputThread(object):
+    """Long-lived thread reading user input on request.
+
+    Requests are passed to the thread by a queue. The thread is started by the first request
+    and it's waiting for the next request afterwards.
+    """
+
+    def __init__(self, read_func):
+        """Create the input thread.
+
+        :param read_func: Function reading the input; it's called in the thread for every request.
+        :type read_func: func(prompt, hidden)
+        """
+        super().__init__()
+        self._read_func = read_func
+        self._requests = Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    @property
+    def running(self):
+        """Is the thread running?"""
+        return self._thread is not None and self._thread.is_alive()
+
+    def request_input(self, prompt, hidden):
+        """Request reading of the user input in the thread.
+
+        This method is thread safe.
+
+        :param prompt: Prompt to be displayed.
+        :type prompt: String or Prompt instance.
+
+        :param hidden: Whether typed characters should be echoed or not.
+        :type hidden: bool
+        """
+        # TODO: Remove when python3-astroid 1.5.3 will be in Fedora
+        # pylint: disable=not-context-manager
+        with self._lock:
+            self._requests.put((prompt, hidden))
+
+            if not self.running:
+                self._thread = threading.Thread(target=self._run, name="InputThread")
+                self._thread.daemon = True
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            prompt, hidden = self._requests.get()
+
+            try:
+                self._read_func(prompt, hidden)
+            except Exception:  # pylint: disable=broad-except
+                log.exception("Reading of user input failed")
+
+
 class UserInputResult(Enum):
     """Store user input result."""
     ERROR = -1
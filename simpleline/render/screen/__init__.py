@@ -24,7 +24,9 @@ from enum import Enum
 from simpleline import App
 from simpleline.render.containers import WindowContainer
 from simpleline.render.prompt import Prompt
+from simpleline.render.screen.coroutine import UserInputRequest
 from simpleline.render.screen.signal_handler import SignalHandler
+from simpleline.tracing import trace_span, CATEGORY_RENDER
 from simpleline.utils.i18n import _
 
 
@@ -44,6 +46,7 @@ class UIScreen(SignalHandler):
         :param screen_height: height of the screen (useful for printing long widgets)
         :type screen_height: int (the value must be bigger than 4)
         """
+        super().__init__()
         self._title = title
         self._screen_height = screen_height
         self._screen_ready = False
@@ -113,7 +116,7 @@ class UIScreen(SignalHandler):
         """Get immediately input from user.
 
         Use this with cautious. Never call this in middle of rendering or when other input is already waiting.
-        It is recommended to use `self.input_required` instead.
+        It is recommended to use `self.input_required` or `await self.ask()` in a coroutine hook instead.
 
         :param message: Message for the user.
         :type message: str
@@ -123,6 +126,23 @@ class UIScreen(SignalHandler):
         """
         return App.get_scheduler().io_manager.get_user_input(message, hidden)
 
+    def ask(self, message, hidden=False):
+        """Get user input in a coroutine hook of this screen.
+
+        The `setup`, `refresh`, `input` and `prompt` methods can be defined by `async def`. Use
+        `await self.ask(message)` in them to get the user input without blocking the event loop.
+
+        :param message: Message for the user.
+        :type message: str
+
+        :param hidden: Do not echo user input (password typing).
+        :type hidden: bool
+
+        :returns: Awaitable request resolved with the user input.
+        :rtype: `simpleline.render.screen.coroutine.UserInputRequest` instance
+        """
+        return UserInputRequest(message, hidden)
+
     def setup(self, args):
         """Do additional setup right before this screen is used.
 
@@ -183,8 +203,10 @@ class UIScreen(SignalHandler):
 
     def show_all(self):
         """Print WindowContainer in `self.window` with all its content."""
-        self.window.render(App.get_scheduler().io_manager.width)
-        self._print_widget(self.window)
+        with trace_span("render", CATEGORY_RENDER):
+            self.window.render(App.get_scheduler().io_manager.width)
+        with trace_span("print", CATEGORY_RENDER):
+            self._print_widget(self.window)
 
     def input(self, args, key):
         """Method called to process input. If the input is not handled here, return it.
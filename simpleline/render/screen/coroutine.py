@@ -0,0 +1,103 @@
+# Coroutine hooks of the screens driven by the event loop.
+#
+# Copyright (C) 2017  Red Hat, Inc.
+#
+# This copyrighted material is made available to anyone wishing to use,
+# modify, copy, or redistribute it subject to the terms and conditions of
+# the GNU General Public License v.2, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY expressed or implied, including the implied warranties of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+# Public License for more details.  You should have received a copy of the
+# GNU General Public License along with this program; if not, write to the
+# Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+# 02110-1301, USA.  Any Red Hat trademarks that are incorporated in the
+# source code or documentation are not subject to the GNU General Public
+# License and may only be used or replicated with the express permission of
+# Red Hat, Inc.
+#
+
+from simpleline.logging import get_simpleline_logger
+
+log = get_simpleline_logger()
+
+__all__ = ["UserInputRequest", "ScreenCoroutine"]
+
+
+class UserInputRequest(object):
+    """Awaitable request for user input.
+
+    Create it by the `UIScreen.ask()` method and await it in a coroutine hook of the screen.
+    The result of the await is the user input.
+    """
+
+    def __init__(self, prompt, hidden=False):
+        """
+        :param prompt: Ask user what you want to get.
+        :type prompt: String or Prompt instance.
+
+        :param hidden: Hide echo of the keys from user.
+        :type hidden: bool
+        """
+        self.prompt = prompt
+        self.hidden = hidden
+
+    def __await__(self):
+        user_input = yield self
+        return user_input
+
+
+class ScreenCoroutine(object):
+    """Run coroutine returned by a hook of the screen.
+
+    The coroutine runs until it awaits a `UserInputRequest`. The input is requested asynchronously and
+    the coroutine is resumed from the handler of the `InputReadySignal` signal. Other signals are processed
+    in the meantime without a nested loop or a thread.
+
+    Exceptions raised by the coroutine are propagated to the caller of `start()` or to the event loop.
+    """
+
+    def __init__(self, coroutine, io_manager, callback):
+        """
+        :param coroutine: Coroutine returned by the screen hook.
+        :type coroutine: coroutine object
+
+        :param io_manager: Manager used to get the user input.
+        :type io_manager: `simpleline.render.io_manager.InOutManager` instance
+
+        :param callback: Called with the value returned by the coroutine.
+        :type callback: func(result)
+        """
+        self._coroutine = coroutine
+        self._io_manager = io_manager
+        self._callback = callback
+        self._running = False
+
+    @property
+    def running(self):
+        """Is the coroutine started and not finished yet?"""
+        return self._running
+
+    def start(self):
+        """Run the coroutine to the first await."""
+        self._running = True
+        self._resume(None)
+
+    def _resume(self, value):
+        try:
+            request = self._coroutine.send(value)
+        except StopIteration as e:
+            self._running = False
+            self._callback(e.value)
+            return
+        except BaseException:
+            self._running = False
+            raise
+
+        if not isinstance(request, UserInputRequest):
+            self._running = False
+            self._coroutine.close()
+            raise TypeError("Screen coroutine can await only user input requests, not {}".format(request))
+
+        log.debug("Screen coroutine %s waits on user input", self._coroutine.__qualname__)
+        self._io_manager.get_user_input_async(request.prompt, self._resume, request.hidden)
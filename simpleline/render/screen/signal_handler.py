@@ -19,6 +19,9 @@
 # Author(s): Jiri Konecny <jkonecny@redhat.com>
 #
 
+from threading import Lock
+from time import monotonic
+
 from simpleline import App
 from simpleline.event_loop.signals import RenderScreenSignal, CloseScreenSignal
 
@@ -30,8 +33,17 @@ class SignalHandler(object):
         `connect()`       -- connect this widget on given signal
         `create_signal()` -- create signal class which can be used in the emit method
         `emit()`          -- emit signal given signal
+
+    Emitting can be limited by the `rate` or `debounce` parameters. The limits are applied separately
+    for every signal class emitted by this object.
     """
 
+    def __init__(self):
+        super().__init__()
+        # state of the rate limited and debounced signals for every signal class
+        self._signal_limiters = {}
+        self._limiter_lock = Lock()
+
     def connect(self, signal, callback, data=None):
         """Connect this class method with given signal.
 
@@ -58,31 +70,54 @@ class SignalHandler(object):
         """
         return signal_class(self, priority)
 
-    def emit(self, signal):
+    def emit(self, signal, rate=None, debounce=None):
         """Emit the signal.
 
         This will add `signal` to the event loop.
 
+        With the `rate` limit the signal is emitted immediately if the previous signal of the same class was
+        emitted long enough ago. Otherwise it is emitted later when the limit allows it; signals emitted
+        in the meantime replace it, so the latest signal is always delivered.
+
+        With the `debounce` delay the signal is emitted after the delay passes without emitting another
+        signal of the same class. Only the latest signal is delivered.
+
+        This method is thread safe.
+
         :param signal: signal to emit
         :type signal: instance of class based on `simpleline.event_loop.AbstractSignal`
+
+        :param rate: emit at most `rate` signals per second
+        :type rate: float
+
+        :param debounce: emit the latest signal after `debounce` seconds without emitting
+        :type debounce: float
         """
-        App.get_event_loop().enqueue_signal(signal)
+        if rate is not None and debounce is not None:
+            raise ValueError("Can't use both rate and debounce limit of signal emitting!")
+
+        if rate is not None:
+            self._emit_rate_limited(signal, 1 / rate)
+        elif debounce is not None:
+            self._emit_debounced(signal, debounce)
+        else:
+            App.get_event_loop().enqueue_signal(signal)
 
-    def create_and_emit(self, signal):
+    def create_and_emit(self, signal, rate=None, debounce=None):
         """Create the signal and emit it.
 
         This is basically shortcut for calling `self.create_signal` and `self.emit`.
         """
         created_signal = self.create_signal(signal)
-        self.emit(created_signal)
+        self.emit(created_signal, rate=rate, debounce=debounce)
 
-    def redraw(self):
+    def redraw(self, rate=None, debounce=None):
         """Emit signal to initiate draw.
 
-        Add RenderScreenSignal to the event loop.
+        Add RenderScreenSignal to the event loop. See `emit()` for the `rate` and `debounce` parameters.
         """
         signal = self.create_signal(RenderScreenSignal)
-        App.get_event_loop().enqueue_signal(signal)
+        self.emit(signal, rate=rate, debounce=debounce)
 
     def close(self):
         """Emit signal to close this screen.
@@ -91,3 +126,55 @@ class SignalHandler(object):
         """
         signal = self.create_signal(CloseScreenSignal)
         App.get_event_loop().enqueue_signal(signal)
+
+    def _get_limiter(self, signal_class):
+        """Return state of the limited emitting of `signal_class`. Must be called with the lock held."""
+        limiter = self._signal_limiters.get(signal_class)
+
+        if limiter is None:
+            limiter = _EmitLimiter()
+            self._signal_limiters[signal_class] = limiter
+
+        return limiter
+
+    def _emit_rate_limited(self, signal, interval):
+        event_loop = App.get_event_loop()
+
+        with self._limiter_lock:
+            now = monotonic()
+            limiter = self._get_limiter(signal.__class__)
+            scheduled = limiter.scheduled
+
+            if scheduled is not None and scheduled.replace_signal(signal):
+                # trailing signal is waiting; deliver the latest one
+                return
+
+            if now - limiter.last_emitted >= interval:
+                limiter.last_emitted = now
+                limiter.scheduled = None
+                event_loop.enqueue_signal(signal)
+            else:
+                limiter.last_emitted += interval
+                limiter.scheduled = event_loop.enqueue_signal_at(limiter.last_emitted, signal)
+
+    def _emit_debounced(self, signal, delay):
+        event_loop = App.get_event_loop()
+
+        with self._limiter_lock:
+            limiter = self._get_limiter(signal.__class__)
+
+            if limiter.scheduled is not None:
+                limiter.scheduled.cancel()
+
+            limiter.scheduled = event_loop.enqueue_signal_after(delay, signal)
+
+
+class _EmitLimiter(object):
+    """State of the rate limited or debounced emitting of one signal class."""
+
+    __slots__ = ["last_emitted", "scheduled"]
+
+    def __init__(self):
+        self.last_emitted = float("-inf")
+        # signal waiting for the timer; `simpleline.event_loop.ScheduledSignal` instance
+        self.scheduled = None
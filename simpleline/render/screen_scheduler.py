@@ -19,15 +19,21 @@
 # Author(s): Jiri Konecny <jkonecny@redhat.com>
 #
 
+import inspect
 import threading
 
+from concurrent.futures import Future
+from functools import partial
+
 from simpleline.event_loop import ExitMainLoop
 from simpleline.event_loop.signals import ExceptionSignal, RenderScreenSignal, CloseScreenSignal
 from simpleline.render import RenderUnexpectedError
 from simpleline.render.io_manager import InOutManager, UserInputResult
+from simpleline.render.screen.coroutine import ScreenCoroutine
 from simpleline.render.screen_stack import ScreenStack, ScreenData, ScreenStackEmptyException
 
 from simpleline.logging import get_simpleline_logger
+from simpleline.tracing import trace_span, CATEGORY_RENDER
 
 log = get_simpleline_logger()
 
@@ -56,6 +62,8 @@ class ScreenScheduler(object):
         self._register_handlers()
 
         self._first_screen_scheduled = False
+        self._screen_coroutine = None
+        self._redraw_postponed = False
 
     def _register_handlers(self):
         self._event_loop.register_signal_handler(RenderScreenSignal, self._process_screen_callback)
@@ -124,13 +132,14 @@ class ScreenScheduler(object):
         """
         log.debug("Replacing screen %s", ui_screen)
         try:
-            execute_new_loop = self._screen_stack.pop().execute_new_loop
+            old_screen = self._screen_stack.pop()
         except ScreenStackEmptyException:
             raise ScreenStackEmptyException("Switch screen is not possible when there is no screen scheduled!")
 
         # we have to keep the old_loop value so we stop
         # dialog's mainloop if it ever uses switch_screen
-        screen = ScreenData(ui_screen, args, execute_new_loop)
+        # the same applies to the caller waiting on the modal screen
+        screen = ScreenData(ui_screen, args, old_screen.execute_new_loop, old_screen.future, old_screen.callback)
         self._screen_stack.append(screen)
         self.redraw()
 
@@ -167,6 +176,33 @@ class ScreenScheduler(object):
         # the old one will wait after this event loop will be closed
         self._event_loop.execute_new_loop(RenderScreenSignal(self))
 
+    def push_screen_modal_async(self, ui_screen, args=None, callback=None):
+        """Starts a new modal screen without starting a new event loop.
+
+        This method returns immediately. The caller is resumed by the `callback` or by the returned future
+        when the new screen is closed. Both will get the closed screen so the result can be taken from it
+        (e.g. the `answer` property of `simpleline.render.adv_widgets.YesNoDialog`).
+
+        The screen is processed by the same event loop as the other screens. Modal screens opened this way
+        from each other don't add nested loops and frames to the Python stack.
+
+        :param ui_screen: screen to show
+        :type ui_screen: UIScreen instance
+        :param args: optional argument, please see switch_screen for details
+        :type args: anything
+        :param callback: called with the closed screen
+        :type callback: func(ui_screen)
+        :return: future resolved with the closed screen
+        :rtype: `concurrent.futures.Future` instance
+        """
+        log.debug("Pushing modal screen %s to stack without a new loop", ui_screen)
+        future = Future()
+        future.set_running_or_notify_cancel()
+        screen = ScreenData(ui_screen, args, future=future, callback=callback)
+        self._screen_stack.append(screen)
+        self.redraw()
+        return future
+
     def _close_screen_callback(self, signal, data):
         self.close_screen(signal.source)
 
@@ -185,9 +221,19 @@ class ScreenScheduler(object):
             raise RenderUnexpectedError("You are trying to close screen %s from screen %s! "
                                         "This is most probably not intentional." % (closed_from, screen.ui_screen))
 
+        # signals emitted by the closed screen are not needed anymore
+        self._event_loop.cancel_signals(screen.ui_screen)
+
         if screen.execute_new_loop:
             self._event_loop.close_loop()
 
+        # resume caller of the modal screen
+        if screen.future is not None:
+            screen.future.set_result(screen.ui_screen)
+
+        if screen.callback is not None:
+            screen.callback(screen.ui_screen)
+
         # redraw screen if there is what to redraw
         # and if it is not modal screen (modal screen parent is blocked)
         if not self._screen_stack.empty() and not screen.execute_new_loop:
@@ -209,39 +255,89 @@ class ScreenScheduler(object):
 
         If modal screen is requested, starts a new loop and initiates redraw after it ends.
         """
+        if self._screen_coroutine_running:
+            # the screen is in the middle of a hook; draw it when the hook ends
+            log.debug("Screen coroutine is waiting on user input, postponing redraw")
+            self._redraw_postponed = True
+            return
+
         top_screen = self._get_last_screen()
 
         log.debug("Processing screen %s", top_screen)
 
         # this screen is used first time (call setup() method)
         if not top_screen.ui_screen.screen_ready:
-            if not top_screen.ui_screen.setup(top_screen.args):
-                # remove the screen and skip if setup went wrong
-                self._screen_stack.pop()
-                self.redraw()
-                log.warning("Screen %s setup wasn't successful", top_screen)
-                return
+            result = top_screen.ui_screen.setup(top_screen.args)
+            self._run_screen_hook(result, partial(self._screen_setup_finished, top_screen))
+        else:
+            self._refresh_screen(top_screen)
+
+    def _screen_setup_finished(self, top_screen, success):
+        if not success:
+            # remove the screen and skip if setup went wrong
+            self._screen_stack.pop()
+            self.redraw()
+            log.warning("Screen %s setup wasn't successful", top_screen)
+            return
+
+        self._refresh_screen(top_screen)
 
+    def _refresh_screen(self, top_screen):
         # get the widget tree from the screen and show it in the screen
         try:
             # refresh screen content
-            top_screen.ui_screen.refresh(top_screen.args)
+            with trace_span(top_screen.ui_screen.refresh, CATEGORY_RENDER):
+                result = top_screen.ui_screen.refresh(top_screen.args)
 
-            # Screen was closed in the refresh method
-            if top_screen != self._get_last_screen():
-                return
-
-            # draw screen to the console
-            self.io_manager.draw(top_screen)
-
-            if top_screen.ui_screen.input_required:
-                log.debug("Input is required by %s screen", top_screen)
-                self.input_required()
+            self._run_screen_hook(result, partial(self._draw_screen, top_screen))
         except ExitMainLoop:
             raise
         except Exception:    # pylint: disable=broad-except
             self._event_loop.enqueue_signal(ExceptionSignal(self))
-            return False
+
+    def _draw_screen(self, top_screen, _refresh_result=None):
+        # Screen was closed in the refresh method
+        if top_screen != self._get_last_screen():
+            return
+
+        # draw screen to the console
+        self.io_manager.draw(top_screen)
+
+        if top_screen.ui_screen.input_required:
+            log.debug("Input is required by %s screen", top_screen)
+            self.input_required()
+
+    @property
+    def _screen_coroutine_running(self):
+        return self._screen_coroutine is not None and self._screen_coroutine.running
+
+    def _run_screen_hook(self, result, callback):
+        """Pass result of the screen hook to the callback.
+
+        Hooks defined by `async def` return a coroutine. The coroutine is run by the `ScreenCoroutine` class
+        and the callback is called when the coroutine ends. Only one coroutine can run at a time, redraws
+        are postponed until it ends.
+
+        :param result: Value returned by the hook.
+        :type result: anything or coroutine object
+        :param callback: called with the result of the hook
+        :type callback: func(result)
+        """
+        if not inspect.iscoroutine(result):
+            callback(result)
+            return
+
+        self._screen_coroutine = ScreenCoroutine(result, self._io_manager,
+                                                 partial(self._screen_hook_finished, callback))
+        self._screen_coroutine.start()
+
+    def _screen_hook_finished(self, callback, result):
+        self._screen_coroutine = None
+        callback(result)
+
+        if self._redraw_postponed and not self._screen_coroutine_running:
+            self._redraw_postponed = False
+            self.redraw()
 
     def _get_last_screen(self):
         if self._screen_stack.empty():
@@ -253,20 +349,26 @@ class ScreenScheduler(object):
         """Register user input to the event loop for processing."""
         top_screen = self._get_last_screen()
         ui_screen = top_screen.ui_screen
-        prompt = ui_screen.prompt(top_screen.args)
+        result = ui_screen.prompt(top_screen.args)
 
+        self._run_screen_hook(result, self._prompt_ready)
+
+    def _prompt_ready(self, prompt):
         self._io_manager.get_user_input_async(prompt, self._process_input)
 
     def _process_input(self, user_input):
         active_screen = self._get_last_screen()
 
         try:
-            input_result = self._io_manager.process_input(active_screen, user_input)
+            result = active_screen.ui_screen.input(active_screen.args, user_input)
+            self._run_screen_hook(result, self._input_processed)
         except ExitMainLoop:
             raise
         except Exception:    # pylint: disable=broad-except
             self._event_loop.enqueue_signal(ExceptionSignal(self))
-            return
+
+    def _input_processed(self, key):
+        input_result = self._io_manager.process_input_key(key)
 
         if not input_result.was_successful():
             if self._io_manager.input_error_threshold_exceeded:
@@ -283,13 +385,13 @@ class ScreenScheduler(object):
                 self.close_screen()
             elif input_result == UserInputResult.QUIT:
                 if self.quit_screen:
-                    self.push_screen_modal(self.quit_screen)
-                    try:
-                        if self.quit_screen.answer is True:
-                            raise ExitMainLoop()
-                        else:
-                            self.redraw()
-                    except AttributeError:
-                        raise ExitMainLoop()
+                    self.push_screen_modal_async(self.quit_screen, callback=self._quit_screen_closed)
                 else:
                     raise ExitMainLoop()
+
+    def _quit_screen_closed(self, quit_screen):
+        try:
+            if quit_screen.answer is True:
+                raise ExitMainLoop()
+        except AttributeError:
+            raise ExitMainLoop()
@@ -88,10 +88,13 @@ class ScreenStack(object):
 class ScreenData(object):
     """Inner data class to store screen data."""
 
-    def __init__(self, ui_screen, args=None, execute_new_loop=False):
+    def __init__(self, ui_screen, args=None, execute_new_loop=False, future=None, callback=None):
         self.ui_screen = ui_screen
         self.args = args
         self.execute_new_loop = execute_new_loop
+        # caller of the modal screen shown without a new event loop is resumed by these
+        self.future = future
+        self.callback = callback
 
     def __str__(self):
         msg = self.__class__.__name__
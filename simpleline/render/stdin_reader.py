@@ -0,0 +1,180 @@
+# Reading of user input by watching standard input in the event loop.
+#
+# Copyright (C) 2017  Red Hat, Inc.
+#
+# This copyrighted material is made available to anyone wishing to use,
+# modify, copy, or redistribute it subject to the terms and conditions of
+# the GNU General Public License v.2, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY expressed or implied, including the implied warranties of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+# Public License for more details.  You should have received a copy of the
+# GNU General Public License along with this program; if not, write to the
+# Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+# 02110-1301, USA.  Any Red Hat trademarks that are incorporated in the
+# source code or documentation are not subject to the GNU General Public
+# License and may only be used or replicated with the express permission of
+# Red Hat, Inc.
+#
+
+import codecs
+import locale
+import os
+import sys
+
+from collections import deque
+
+from simpleline.event_loop.signals import InputReadySignal
+from simpleline.logging import get_simpleline_logger
+
+try:
+    import termios
+except ImportError:
+    termios = None
+
+log = get_simpleline_logger()
+
+__all__ = ["StdinReader"]
+
+
+class StdinReader(object):
+    """Read lines of user input without threads.
+
+    The file descriptor is registered to the event loop by the `add_reader()` method only when some input
+    is requested. Available data are read when the descriptor is ready and complete lines are delivered
+    as `simpleline.event_loop.signals.InputReadySignal`.
+
+    The descriptor is not switched to the non-blocking mode because it is usually shared with
+    the standard output. Only one read is done for every readiness notification so the read never blocks.
+
+    Do not read the same file descriptor by other means (e.g. `input()`) when this reader is used.
+    """
+
+    def __init__(self, event_loop, signal_source, fd=None, encoding=None):
+        """Create reader of the standard input.
+
+        :param event_loop: Event loop supporting the `add_reader()` method.
+        :type event_loop: Class based on `simpleline.event_loop.AbstractEventLoop`.
+
+        :param signal_source: Source of the emitted `InputReadySignal` signals.
+        :type signal_source: Anything.
+
+        :param fd: File descriptor to read; standard input is used if not specified.
+        :type fd: int
+
+        :param encoding: Encoding of the input; encoding of the standard input is used if not specified.
+        :type encoding: str
+        """
+        super().__init__()
+        self._event_loop = event_loop
+        self._signal_source = signal_source
+        self._fd = fd if fd is not None else sys.stdin.fileno()
+        encoding = encoding or sys.stdin.encoding or locale.getpreferredencoding()
+        self._decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+        self._buffer = ""
+        self._lines = deque()
+        self._eof = False
+        self._watching = False
+        self._waiting = False
+        self._hidden = False
+        self._saved_tty_attrs = None
+
+    @property
+    def waiting(self):
+        """Is somebody waiting for a line?"""
+        return self._waiting
+
+    @property
+    def can_hide_input(self):
+        """Can the input be read without echo?
+
+        This is possible only on a terminal.
+        """
+        return termios is not None and os.isatty(self._fd)
+
+    def request_line(self, hidden=False):
+        """Request one line of input.
+
+        The line without the line ending is delivered by the `InputReadySignal`. Empty string is
+        delivered at the end of the input.
+
+        :param hidden: Do not echo the typed characters. See `can_hide_input`.
+        :type hidden: bool
+        """
+        if self._waiting:
+            raise KeyError("Can't request multiple input lines at the same time!")
+
+        if self._lines or self._eof:
+            self._deliver_line()
+            return
+
+        self._waiting = True
+
+        if hidden:
+            self._set_echo(False)
+
+        self._start_watching()
+
+    def close(self):
+        """Stop watching the file descriptor."""
+        self._waiting = False
+        self._set_echo(True)
+        self._stop_watching()
+
+    def _start_watching(self):
+        if not self._watching:
+            self._event_loop.add_reader(self._fd, self._on_readable)
+            self._watching = True
+
+    def _stop_watching(self):
+        if self._watching:
+            self._event_loop.remove_reader(self._fd)
+            self._watching = False
+
+    def _on_readable(self, fd, data):
+        chunk = os.read(fd, 4096)
+
+        if chunk:
+            self._buffer += self._decoder.decode(chunk)
+        else:
+            self._buffer += self._decoder.decode(b"", final=True)
+            self._eof = True
+
+        self._split_lines()
+
+        if self._waiting and (self._lines or self._eof):
+            self._waiting = False
+            self._stop_watching()
+            self._deliver_line()
+
+    def _split_lines(self):
+        *lines, self._buffer = self._buffer.split("\n")
+        self._lines.extend(line.rstrip("\r") for line in lines)
+
+        if self._eof and self._buffer:
+            self._lines.append(self._buffer)
+            self._buffer = ""
+
+    def _deliver_line(self):
+        line = self._lines.popleft() if self._lines else ""
+
+        if self._hidden:
+            self._set_echo(True)
+            # the new line typed by user wasn't echoed
+            sys.stdout.write("\n")
+            sys.stdout.flush()
+
+        self._event_loop.enqueue_signal(InputReadySignal(self._signal_source, line))
+
+    def _set_echo(self, enabled):
+        if enabled:
+            if self._saved_tty_attrs is not None:
+                termios.tcsetattr(self._fd, termios.TCSADRAIN, self._saved_tty_attrs)
+                self._saved_tty_attrs = None
+            self._hidden = False
+        elif self.can_hide_input:
+            self._saved_tty_attrs = termios.tcgetattr(self._fd)
+            attrs = termios.tcgetattr(self._fd)
+            attrs[3] &= ~termios.ECHO
+            termios.tcsetattr(self._fd, termios.TCSAFLUSH, attrs)
+            self._hidden = True
@@ -0,0 +1,230 @@
+# Tracing of the event loop and rendering activity.
+#
+# Recorded events are saved in the Chrome trace event format which can be loaded
+# into the chrome://tracing page or into the Perfetto UI.
+#
+# Copyright (C) 2017  Red Hat, Inc.
+#
+# This copyrighted material is made available to anyone wishing to use,
+# modify, copy, or redistribute it subject to the terms and conditions of
+# the GNU General Public License v.2, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY expressed or implied, including the implied warranties of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+# Public License for more details.  You should have received a copy of the
+# GNU General Public License along with this program; if not, write to the
+# Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+# 02110-1301, USA.  Any Red Hat trademarks that are incorporated in the
+# source code or documentation are not subject to the GNU General Public
+# License and may only be used or replicated with the express permission of
+# Red Hat, Inc.
+#
+
+import json
+import os
+import threading
+import time
+
+__all__ = ["TraceRecorder", "start_tracing", "stop_tracing", "get_tracer", "trace_span"]
+
+# Categories of the recorded events.
+CATEGORY_SIGNAL = "signal"
+CATEGORY_HANDLER = "handler"
+CATEGORY_LOOP = "loop"
+CATEGORY_RENDER = "render"
+CATEGORY_INPUT = "input"
+
+_tracer = None
+
+
+class TraceRecorder(object):
+    """Record begin and end events of the Simpleline activity.
+
+    Events are stored in memory and can be saved to the Chrome trace event JSON format by
+    the `save()` method.
+
+    This class is thread safe.
+    """
+
+    def __init__(self, file_path=None):
+        """Create trace recorder.
+
+        :param file_path: Path where the trace is saved by the `save()` method.
+        :type file_path: str or None
+        """
+        super().__init__()
+        self._file_path = file_path
+        self._events = []
+        self._known_threads = set()
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self._start = time.perf_counter()
+
+    @property
+    def file_path(self):
+        """Path where the trace is saved by default or None."""
+        return self._file_path
+
+    @property
+    def events(self):
+        """Return list of recorded trace events."""
+        return list(self._events)
+
+    def begin(self, name, category):
+        """Record begin of a traced activity.
+
+        :param name: Name of the activity; objects which are not strings are converted to a readable name.
+        :type name: str or anything
+
+        :param category: Category of the activity.
+        :type category: str
+        """
+        self._add_event(name, category, "B")
+
+    def end(self, name, category):
+        """Record end of a traced activity.
+
+        See the `begin()` method.
+        """
+        self._add_event(name, category, "E")
+
+    def span(self, name, category):
+        """Return context manager which records begin and end of the activity.
+
+        See the `begin()` method.
+        """
+        return _Span(self, name, category)
+
+    def _add_event(self, name, category, phase):
+        tid = threading.get_ident()
+
+        if tid not in self._known_threads:
+            self._add_thread_name(tid)
+
+        self._events.append({
+            "name": _event_name(name),
+            "cat": category,
+            "ph": phase,
+            "ts": (time.perf_counter() - self._start) * 1000000,
+            "pid": self._pid,
+            "tid": tid
+        })
+
+    def _add_thread_name(self, tid):
+        # TODO: Remove when python3-astroid 1.5.3 will be in Fedora
+        # pylint: disable=not-context-manager
+        with self._lock:
+            self._known_threads.add(tid)
+            self._events.append({
+                "name": "thread_name",
+                "ph": "M",
+                "pid": self._pid,
+                "tid": tid,
+                "args": {"name": threading.current_thread().name}
+            })
+
+    def to_dict(self):
+        """Return recorded events in the Chrome trace event format."""
+        return {"traceEvents": self.events, "displayTimeUnit": "ms"}
+
+    def save(self, file_path=None):
+        """Save recorded events to a JSON file.
+
+        :param file_path: Path to the output file; if not specified use path from the constructor.
+        :type file_path: str
+        """
+        file_path = file_path or self._file_path
+        if file_path is None:
+            raise ValueError("Path for the trace file is not specified!")
+
+        with open(file_path, "w") as f:
+            json.dump(self.to_dict(), f)
+
+
+class _Span(object):
+
+    def __init__(self, recorder, name, category):
+        self._recorder = recorder
+        self._name = name
+        self._category = category
+
+    def __enter__(self):
+        self._recorder.begin(self._name, self._category)
+        return self
+
+    def __exit__(self, *args):
+        self._recorder.end(self._name, self._category)
+        return False
+
+
+class _NullSpan(object):
+    """Span used when tracing is disabled. It does nothing."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def _event_name(name):
+    if isinstance(name, str):
+        return name
+
+    return getattr(name, "__qualname__", None) or str(name)
+
+
+def start_tracing(file_path=None):
+    """Start recording of the Simpleline activity.
+
+    :param file_path: Path where the Chrome trace JSON file is written by `stop_tracing()`.
+    :type file_path: str or None
+
+    :returns: Active trace recorder.
+    :rtype: `TraceRecorder` instance.
+    """
+    global _tracer
+    _tracer = TraceRecorder(file_path)
+    return _tracer
+
+
+def stop_tracing():
+    """Stop recording and save the trace file if the path was specified.
+
+    :returns: Trace recorder with the recorded events or None if tracing was not started.
+    :rtype: `TraceRecorder` instance or None.
+    """
+    global _tracer
+    tracer = _tracer
+    _tracer = None
+
+    if tracer is not None and tracer.file_path is not None:
+        tracer.save()
+
+    return tracer
+
+
+def get_tracer():
+    """Return active trace recorder or None if tracing is disabled."""
+    return _tracer
+
+
+def trace_span(name, category):
+    """Return context manager tracing the activity `name`.
+
+    This function has almost no overhead when tracing is disabled.
+
+    :param name: Name of the activity; objects which are not strings are converted to a readable name
+                 only when the tracing is enabled.
+    :type name: str or anything
+
+    :param category: Category of the activity.
+    :type category: str
+    """
+    if _tracer is None:
+        return _NULL_SPAN
+
+    return _tracer.span(name, category)
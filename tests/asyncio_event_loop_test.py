@@ -0,0 +1,145 @@
+# Event loop test classes for asyncio implementation.
+#
+# Copyright (C) 2017  Red Hat, Inc.
+#
+# This copyrighted material is made available to anyone wishing to use,
+# modify, copy, or redistribute it subject to the terms and conditions of
+# the GNU General Public License v.2, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY expressed or implied, including the implied warranties of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+# Public License for more details.  You should have received a copy of the
+# GNU General Public License along with this program; if not, write to the
+# Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+# 02110-1301, USA.  Any Red Hat trademarks that are incorporated in the
+# source code or documentation are not subject to the GNU General Public
+# License and may only be used or replicated with the express permission of
+# Red Hat, Inc.
+#
+
+import asyncio
+import os
+import threading
+import unittest
+
+from simpleline.event_loop import ExitMainLoop
+from simpleline.event_loop.asyncio_event_loop import AsyncioEventLoop
+from tests.event_loop_test import ProcessEvents_TestCase, TestSignal
+from tests.stdin_reader_test import EventLoopReader_TestCase
+
+
+class AsyncioProcessEvents_TestCase(ProcessEvents_TestCase):
+    """Run all the tests in ProcessEvents test case but with asyncio event loop."""
+
+    def create_loop(self):
+        self.aio_loop = asyncio.new_event_loop()
+        self.loop = AsyncioEventLoop(self.aio_loop)
+
+    def tearDown(self):
+        super().tearDown()
+        self.aio_loop.close()
+
+
+class AsyncioIntegration_TestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.aio_loop = asyncio.new_event_loop()
+        self.loop = AsyncioEventLoop(self.aio_loop)
+        self.order = []
+
+    def tearDown(self):
+        self.aio_loop.close()
+
+    def _handler_record_and_quit(self, signal, data):
+        self.order.append("signal")
+        raise ExitMainLoop()
+
+    def test_share_loop_with_asyncio_task(self):
+        async def task():
+            self.order.append("task")
+            await asyncio.sleep(0.01)
+            self.loop.enqueue_signal(TestSignal())
+
+        async def main():
+            self.aio_loop.create_task(task())
+            await self.loop.run_async()
+
+        self.loop.register_signal_handler(TestSignal, self._handler_record_and_quit)
+        self.aio_loop.run_until_complete(main())
+
+        self.assertEqual(self.order, ["task", "signal"])
+
+    def test_enqueue_from_thread(self):
+        self.loop.register_signal_handler(TestSignal, self._handler_record_and_quit)
+        thread = threading.Timer(0.01, self.loop.enqueue_signal, args=(TestSignal(),))
+        thread.start()
+
+        self.loop.run()
+        thread.join()
+
+        self.assertEqual(self.order, ["signal"])
+
+    def test_reader_in_asyncio_loop(self):
+        read_fd, write_fd = os.pipe()
+        self.addCleanup(os.close, read_fd)
+        self.addCleanup(os.close, write_fd)
+
+        self.loop.register_signal_handler(TestSignal, self._handler_record_and_quit)
+        self.loop.add_reader(read_fd, self._reader_callback)
+        thread = threading.Timer(0.01, os.write, args=(write_fd, b"x"))
+        thread.start()
+
+        self.loop.run()
+        thread.join()
+
+        self.assertEqual(self.order, ["reader", "signal"])
+
+    def _reader_callback(self, fd, data):
+        os.read(fd, 1)
+        self.order.append("reader")
+        self.loop.remove_reader(fd)
+        self.loop.enqueue_signal(TestSignal())
+
+    def test_idle_callback_in_asyncio_loop(self):
+        async def task():
+            self.order.append("task")
+
+        def idle_callback(data):
+            if len(self.order) < 3:
+                self.order.append("idle")
+                self.aio_loop.create_task(task())
+                return True
+
+            self.loop.enqueue_signal(TestSignal())
+            return False
+
+        self.loop.register_signal_handler(TestSignal, self._handler_record_and_quit)
+        # call the idle callback only once in every time slice
+        self.loop.idle_time_slice = 0
+        self.loop.add_idle_callback(idle_callback)
+        self.loop.run()
+
+        # asyncio tasks run between the idle time slices
+        self.assertEqual(self.order, ["idle", "task", "idle", "task", "signal"])
+
+    def test_exception_raised_from_run(self):
+        self.loop.register_signal_handler(TestSignal, self._handler_raise_error)
+        self.loop.enqueue_signal(TestSignal())
+
+        with self.assertRaises(ValueError):
+            self.loop.run()
+
+    def _handler_raise_error(self, signal, data):
+        raise ValueError("Test error")
+
+
+class AsyncioEventLoopReader_TestCase(EventLoopReader_TestCase):
+    """Run the file descriptor watching tests with the asyncio event loop."""
+
+    def create_loop(self):
+        self.aio_loop = asyncio.new_event_loop()
+        self.loop = AsyncioEventLoop(self.aio_loop)
+
+    def tearDown(self):
+        super().tearDown()
+        self.aio_loop.close()
@@ -0,0 +1,99 @@
+# Benchmark of the prompt round-trip latency.
+#
+# Compare the time from requesting user input to getting the result back in the event loop for:
+# * thread started for every prompt (the original implementation),
+# * one long-lived input thread,
+# * watching of the standard input in the event loop.
+#
+# Copyright (C) 2017  Red Hat, Inc.
+#
+# This copyrighted material is made available to anyone wishing to use,
+# modify, copy, or redistribute it subject to the terms and conditions of
+# the GNU General Public License v.2, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY expressed or implied, including the implied warranties of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+# Public License for more details.  You should have received a copy of the
+# GNU General Public License along with this program; if not, write to the
+# Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+# 02110-1301, USA.  Any Red Hat trademarks that are incorporated in the
+# source code or documentation are not subject to the GNU General Public
+# License and may only be used or replicated with the express permission of
+# Red Hat, Inc.
+#
+
+import os
+import statistics
+import sys
+import threading
+import time
+
+from io import StringIO
+from unittest import mock
+
+from simpleline.event_loop.main_loop import MainLoop
+from simpleline.render.io_manager import InOutManager
+
+PROMPTS = 2000
+
+
+class PerPromptThreadManager(InOutManager):
+    """Start a new thread for every prompt as the original implementation did."""
+
+    def _start_user_input_async(self, prompt, hidden):
+        self._input_pending = True
+        self._thread = threading.Thread(target=self._thread_input, name="InputThread", args=(prompt, hidden))
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _user_input_received_handler(self, signal, args):
+        self._thread.join()
+        super()._user_input_received_handler(signal, args)
+
+
+def measure(io_manager):
+    times = []
+
+    for _ in range(PROMPTS):
+        start = time.perf_counter()
+        io_manager.get_user_input("")
+        times.append(time.perf_counter() - start)
+
+    return times
+
+
+def report(name, times):
+    # stdout is replaced when prompts are printed
+    print("{:<28} mean {:8.1f} us   median {:8.1f} us   max {:8.1f} us".format(
+        name,
+        statistics.mean(times) * 1000000,
+        statistics.median(times) * 1000000,
+        max(times) * 1000000), file=sys.__stdout__)
+
+
+def run_thread_benchmarks():
+    with mock.patch('simpleline.render.io_manager.InOutManager._get_input', return_value="x"):
+        report("thread per prompt", measure(PerPromptThreadManager(MainLoop())))
+        report("long-lived input thread", measure(InOutManager(MainLoop())))
+
+
+def run_stdin_reader_benchmark():
+    read_fd, write_fd = os.pipe()
+    os.write(write_fd, b"x\n" * PROMPTS)
+
+    io_manager = InOutManager(MainLoop())
+    io_manager.use_stdin_reader(read_fd)
+    report("stdin watched by the loop", measure(io_manager))
+
+    os.close(read_fd)
+    os.close(write_fd)
+
+
+def main():
+    with mock.patch('sys.stdout', new_callable=StringIO):
+        run_thread_benchmarks()
+        run_stdin_reader_benchmark()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+# Stress benchmark of deeply nested waiting on signals.
+#
+# Every level of the recursion waits by `process_signals(return_after)` on the same signal class
+# and floods the loop with other signals. The deepest level raises `ExitMainLoop` so the waits are
+# abandoned without checking their tickets, which happens when an application quits from a modal screen.
+#
+# Compare the ticket machine keeping a dict of outstanding tickets for every line (the original
+# implementation) with the counter based one.
+#
+# Copyright (C) 2017  Red Hat, Inc.
+#
+# This copyrighted material is made available to anyone wishing to use,
+# modify, copy, or redistribute it subject to the terms and conditions of
+# the GNU General Public License v.2, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY expressed or implied, including the implied warranties of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+# Public License for more details.  You should have received a copy of the
+# GNU General Public License along with this program; if not, write to the
+# Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+# 02110-1301, USA.  Any Red Hat trademarks that are incorporated in the
+# source code or documentation are not subject to the GNU General Public
+# License and may only be used or replicated with the express permission of
+# Red Hat, Inc.
+#
+
+import sys
+import time
+
+from simpleline.event_loop import AbstractSignal, ExitMainLoop
+from simpleline.event_loop.main_loop import MainLoop
+from simpleline.event_loop.ticket_machine import TicketMachine
+
+DEPTH = 200
+NOISE_SIGNALS = 20
+ROUNDS = 20
+
+
+class DictTicketMachine(TicketMachine):
+    """Keep every outstanding ticket in the line as the original implementation did."""
+
+    def take_ticket(self, line_id):
+        obj_id = self._counter
+        self._lines.setdefault(line_id, {})[obj_id] = False
+        self._counter += 1
+        return obj_id
+
+    def check_ticket(self, line, unique_id):
+        if self._lines[line][unique_id]:
+            return self._lines[line].pop(unique_id)
+
+    def mark_line_to_go(self, line):
+        if line in self._lines:
+            our_line = self._lines[line]
+            for key in our_line:
+                our_line[key] = True
+
+
+class StepSignal(AbstractSignal):
+    pass
+
+
+class NoiseSignal(AbstractSignal):
+    pass
+
+
+class NestedWaits(object):
+
+    def __init__(self, ticket_machine):
+        self.loop = MainLoop()
+        self.loop._processed_signals = ticket_machine  # pylint: disable=protected-access
+        self.loop.register_signal_handler(StepSignal, self._step_handler)
+        self.loop.register_signal_handler(NoiseSignal, self._noise_handler)
+        self.depth = 0
+
+    def _step_handler(self, signal, data):
+        self.depth += 1
+        if self.depth == DEPTH:
+            raise ExitMainLoop()
+
+        self.loop.enqueue_signals([NoiseSignal(self) for _ in range(NOISE_SIGNALS)])
+        self.loop.enqueue_signal(StepSignal(self, priority=1))
+        self.loop.process_signals(return_after=StepSignal)
+
+    def _noise_handler(self, signal, data):
+        pass
+
+    def run(self):
+        self.depth = 0
+        self.loop.enqueue_signal(StepSignal(self))
+
+        try:
+            self.loop.process_signals(return_after=StepSignal)
+        except ExitMainLoop:
+            pass
+
+
+def report(name, ticket_machine):
+    nested_waits = NestedWaits(ticket_machine)
+    times = []
+
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        nested_waits.run()
+        times.append(time.perf_counter() - start)
+
+    print("{:<24} first round {:8.1f} ms   last round {:8.1f} ms   total {:8.1f} ms".format(
+        name, times[0] * 1000, times[-1] * 1000, sum(times) * 1000))
+
+
+def main():
+    sys.setrecursionlimit(DEPTH * 50)
+    report("dict of tickets", DictTicketMachine())
+    report("generation counters", TicketMachine())
+
+
+if __name__ == "__main__":
+    main()
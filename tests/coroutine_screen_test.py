@@ -0,0 +1,286 @@
+# Screens with coroutine hooks test classes.
+#
+# Copyright (C) 2017  Red Hat, Inc.
+#
+# This copyrighted material is made available to anyone wishing to use,
+# modify, copy, or redistribute it subject to the terms and conditions of
+# the GNU General Public License v.2, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY expressed or implied, including the implied warranties of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+# Public License for more details.  You should have received a copy of the
+# GNU General Public License along with this program; if not, write to the
+# Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+# 02110-1301, USA.  Any Red Hat trademarks that are incorporated in the
+# source code or documentation are not subject to the GNU General Public
+# License and may only be used or replicated with the express permission of
+# Red Hat, Inc.
+#
+
+import asyncio
+import unittest
+from unittest import mock
+
+from simpleline import App
+from simpleline.render.adv_widgets import PasswordDialog, AsyncPasswordDialog
+from simpleline.render.prompt import Prompt
+from simpleline.render.screen import UIScreen, InputState
+from simpleline.render.screen.coroutine import ScreenCoroutine, UserInputRequest
+
+
+@mock.patch('sys.stdout')
+@mock.patch('simpleline.render.io_manager.InOutManager._get_input')
+class CoroutineScreen_TestCase(unittest.TestCase):
+
+    def setUp(self):
+        App.initialize()
+
+    def _getpass(self, prompt):
+        return "secret"
+
+    def test_async_setup(self, mock_stdin, mock_stdout):
+        mock_stdin.side_effect = ["user"]
+        screen = AsyncSetupScreen()
+
+        App.get_scheduler().schedule_screen(screen)
+        App.run()
+
+        self.assertEqual(screen.name, "user")
+        self.assertEqual(screen.refresh_counter, 1)
+
+    def test_async_setup_fail(self, mock_stdin, mock_stdout):
+        mock_stdin.side_effect = [""]
+        screen = AsyncSetupScreen()
+
+        App.get_scheduler().schedule_screen(screen)
+        App.run()
+
+        self.assertEqual(screen.refresh_counter, 0)
+
+    def test_async_refresh(self, mock_stdin, mock_stdout):
+        mock_stdin.side_effect = ["1", "2", "3"]
+        screen = AsyncRefreshScreen()
+
+        App.get_scheduler().schedule_screen(screen)
+        App.run()
+
+        self.assertEqual(screen.answers, ["1", "2", "3"])
+
+    def test_async_input(self, mock_stdin, mock_stdout):
+        mock_stdin.side_effect = ["a", "yes"]
+        screen = AsyncInputScreen()
+
+        App.get_scheduler().schedule_screen(screen)
+        App.run()
+
+        self.assertEqual(screen.keys, ["a"])
+        self.assertTrue(screen.confirmed)
+
+    def test_async_input_returns_key(self, mock_stdin, mock_stdout):
+        mock_stdin.side_effect = ["a", "no"]
+        screen = AsyncInputScreen()
+
+        App.get_scheduler().schedule_screen(screen)
+        App.run()
+
+        self.assertFalse(screen.confirmed)
+        self.assertTrue(screen.is_closed)
+
+    def test_redraw_postponed(self, mock_stdin, mock_stdout):
+        mock_stdin.side_effect = ["r", "wait", "c"]
+        screen = AsyncRedrawScreen()
+
+        App.get_scheduler().schedule_screen(screen)
+        App.run()
+
+        # the redraw requested from the input coroutine is processed after the coroutine ends
+        self.assertEqual(screen.refresh_counter_after_await, 1)
+        self.assertEqual(screen.refresh_counter, 2)
+
+    def test_password_dialog(self, mock_stdin, mock_stdout):
+        screen = PasswordDialog()
+        App.get_scheduler().io_manager.set_pass_func(self._getpass)
+
+        App.get_scheduler().schedule_screen(screen)
+        App.run()
+
+        self.assertEqual(screen.answer, "secret")
+        mock_stdin.assert_not_called()
+
+    def test_async_password_dialog(self, mock_stdin, mock_stdout):
+        screen = AsyncPasswordDialog()
+        App.get_scheduler().io_manager.set_pass_func(self._getpass)
+
+        App.get_scheduler().schedule_screen(screen)
+        App.run()
+
+        self.assertEqual(screen.answer, "secret")
+        mock_stdin.assert_not_called()
+
+
+@mock.patch('sys.stdout')
+@mock.patch('simpleline.render.io_manager.InOutManager._get_input')
+class CoroutineScreenException_TestCase(unittest.TestCase):
+
+    def setUp(self):
+        App.initialize()
+
+    def test_exception_after_await(self, mock_stdin, mock_stdout):
+        mock_stdin.side_effect = ["a", "b"]
+        screen = AsyncExceptionScreen()
+
+        App.get_scheduler().schedule_screen(screen)
+
+        with self.assertRaises(AsyncTestException):
+            App.run()
+
+    def test_await_unsupported(self, mock_stdin, mock_stdout):
+        screen = AsyncUnsupportedScreen()
+
+        App.get_scheduler().schedule_screen(screen)
+
+        with self.assertRaises(TypeError):
+            App.run()
+
+
+class ScreenCoroutine_TestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.io_manager = mock.Mock()
+        self.results = []
+
+    async def _ask_twice(self):
+        first = await UserInputRequest("first")
+        second = await UserInputRequest("second", hidden=True)
+        return first + second
+
+    async def _no_await(self):
+        return "result"
+
+    def test_run_without_await(self):
+        coroutine = ScreenCoroutine(self._no_await(), self.io_manager, self.results.append)
+        coroutine.start()
+
+        self.assertEqual(self.results, ["result"])
+        self.assertFalse(coroutine.running)
+        self.io_manager.get_user_input_async.assert_not_called()
+
+    def test_resume_with_user_input(self):
+        coroutine = ScreenCoroutine(self._ask_twice(), self.io_manager, self.results.append)
+        coroutine.start()
+
+        self.assertTrue(coroutine.running)
+        prompt, callback, hidden = self.io_manager.get_user_input_async.call_args[0]
+        self.assertEqual((prompt, hidden), ("first", False))
+
+        callback("a")
+        prompt, callback, hidden = self.io_manager.get_user_input_async.call_args[0]
+        self.assertEqual((prompt, hidden), ("second", True))
+        self.assertEqual(self.results, [])
+
+        callback("b")
+        self.assertEqual(self.results, ["ab"])
+        self.assertFalse(coroutine.running)
+
+    def test_await_unsupported(self):
+        coroutine = ScreenCoroutine(asyncio.sleep(0), self.io_manager, self.results.append)
+
+        with self.assertRaises(TypeError):
+            coroutine.start()
+
+        self.assertFalse(coroutine.running)
+
+
+# HELPER CLASSES
+
+class AsyncSetupScreen(UIScreen):
+
+    def __init__(self):
+        super().__init__()
+        self.input_required = False
+        self.name = None
+        self.refresh_counter = 0
+
+    async def setup(self, args):
+        super().setup(args)
+        self.name = await self.ask("Name: ")
+        return bool(self.name)
+
+    def refresh(self, args=None):
+        super().refresh(args)
+        self.refresh_counter += 1
+        self.close()
+
+
+class AsyncRefreshScreen(UIScreen):
+
+    def __init__(self):
+        super().__init__()
+        self.input_required = False
+        self.answers = []
+
+    async def refresh(self, args=None):
+        super().refresh(args)
+        while len(self.answers) < 3:
+            self.answers.append(await self.ask("Answer: "))
+        self.close()
+
+
+class AsyncInputScreen(UIScreen):
+
+    def __init__(self):
+        super().__init__()
+        self.keys = []
+        self.confirmed = False
+        self.is_closed = False
+
+    async def input(self, args, key):
+        self.keys.append(key)
+
+        if await self.ask("Are you sure? ") == "yes":
+            self.confirmed = True
+            self.close()
+            return InputState.PROCESSED
+
+        return Prompt.CONTINUE
+
+    def closed(self):
+        self.is_closed = True
+
+
+class AsyncRedrawScreen(UIScreen):
+
+    def __init__(self):
+        super().__init__()
+        self.refresh_counter = 0
+        self.refresh_counter_after_await = None
+
+    def refresh(self, args=None):
+        super().refresh(args)
+        self.refresh_counter += 1
+
+    async def input(self, args, key):
+        if key == "r":
+            self.redraw()
+            await self.ask("Wait: ")
+            self.refresh_counter_after_await = self.refresh_counter
+            return InputState.PROCESSED
+
+        return key
+
+
+class AsyncExceptionScreen(UIScreen):
+
+    async def input(self, args, key):
+        await self.ask("Raise? ")
+        raise AsyncTestException("Exception after await!")
+
+
+class AsyncUnsupportedScreen(UIScreen):
+
+    async def prompt(self, args=None):
+        await asyncio.sleep(0)
+
+
+class AsyncTestException(Exception):
+    pass
@@ -17,12 +17,20 @@
 # Red Hat, Inc.
 #
 
+import os
+import select
+import threading
 import unittest
 
+from time import monotonic, process_time, sleep
+
 from simpleline.event_loop import AbstractSignal
+from simpleline.event_loop import CoalescePolicy
 from simpleline.event_loop import EventHandler
 from simpleline.event_loop import ExitMainLoop
+from simpleline.event_loop.event_queue import OverflowPolicy
 from simpleline.event_loop.main_loop import MainLoop
+from simpleline.event_loop.signals import ExceptionSignal
 
 
 class EventLoopHandler_TestCase(unittest.TestCase):
@@ -53,6 +61,7 @@ class ProcessEvents_TestCase(unittest.TestCase):
         self.signal_counter_copied = 0
         self.callback_called = False
         self.callback_args = None
+        self.processed_signals = []
         self.create_loop()
 
     def create_loop(self):
@@ -109,6 +118,33 @@ class ProcessEvents_TestCase(unittest.TestCase):
         loop.process_signals()
         self.assertEqual(self.signal_counter, 2)
 
+    def test_wait_on_signal_with_the_same_name(self):
+        same_name_signal = type("TestSignal", (AbstractSignal,), {})
+
+        loop = self.loop
+        loop.register_signal_handler(TestSignal, self._handler_signal_counter)
+        loop.register_signal_handler(same_name_signal, self._handler_signal_counter)
+        loop.enqueue_signal(same_name_signal(None))
+        loop.enqueue_signal(TestSignal())
+        loop.process_signals(return_after=TestSignal)
+
+        self.assertEqual(self.signal_counter, 2)
+
+    def test_wait_on_signal_without_busy_waiting(self):
+        loop = self.loop
+        loop.register_signal_handler(TestSignal, self._handler_signal_counter)
+        thread = threading.Timer(0.3, loop.enqueue_signal, args=(TestSignal(),))
+
+        start_cpu = process_time()
+        start = monotonic()
+        thread.start()
+        loop.process_signals(return_after=TestSignal)
+        thread.join()
+
+        self.assertEqual(self.signal_counter, 1)
+        # the thread should sleep while waiting
+        self.assertLess(process_time() - start_cpu, (monotonic() - start) * 0.2)
+
     def test_wait_on_signal_skipped_by_inner_process_events(self):
         self.signal_counter = 0
 
@@ -124,6 +160,264 @@ class ProcessEvents_TestCase(unittest.TestCase):
 
         self.assertEqual(self.signal_counter, 1)
 
+    def test_enqueue_signals(self):
+        self.signal_counter = 0
+
+        loop = self.loop
+        loop.register_signal_handler(TestSignal, self._handler_signal_counter)
+        loop.enqueue_signals([TestSignal(), TestSignal(), TestSignal()])
+        loop.process_signals()
+
+        self.assertEqual(self.signal_counter, 3)
+
+    def test_cancel_signal(self):
+        loop = self.loop
+        loop.register_signal_handler(TestSignal, self._handler_signal_counter)
+        signal = loop.enqueue_signal(TestSignal())
+        loop.enqueue_signal(TestSignal())
+        signal.cancel()
+
+        loop.process_signals()
+
+        self.assertTrue(signal.cancelled)
+        self.assertEqual(self.signal_counter, 1)
+        self.assertEqual(loop.metrics.cancelled_signals, 1)
+
+    def test_cancel_signals_of_source(self):
+        source = TestSource()
+
+        loop = self.loop
+        loop.register_signal_handler(TestSourceSignal, self._handler_record_signal)
+        loop.enqueue_signals([TestSourceSignal(source), TestSourceSignal(None), TestSourceSignal(source)])
+        loop.cancel_signals(source)
+        # signals enqueued later are not cancelled
+        loop.enqueue_signal(TestSourceSignal(source))
+
+        loop.process_signals()
+
+        self.assertEqual([s.source for s in self.processed_signals], [None, source])
+
+    def test_wait_on_cancelled_signal(self):
+        loop = self.loop
+        loop.register_signal_handler(TestSignal, self._handler_signal_counter)
+        loop.enqueue_signal(TestSignal()).cancel()
+
+        loop.process_signals(return_after=TestSignal)
+
+        self.assertEqual(self.signal_counter, 0)
+
+    def test_drop_expired_signal(self):
+        loop = self.loop
+        loop.register_signal_handler(TestSignal, self._handler_signal_counter)
+        signal = loop.enqueue_signal(TestSignal().expire_at(monotonic() - 1))
+        loop.enqueue_signal(TestSignal().expire_at(monotonic() + 3600))
+        loop.enqueue_signal(TestSignal())
+
+        loop.process_signals()
+
+        self.assertTrue(signal.expired)
+        self.assertEqual(self.signal_counter, 2)
+        self.assertEqual(loop.metrics.expired_signals, 1)
+
+    def test_drop_signal_after_time_to_live(self):
+        loop = self.loop
+        loop.register_signal_handler(TestExpiringSignal, self._handler_signal_counter)
+        start = monotonic()
+        signal = loop.enqueue_signal(TestExpiringSignal(None))
+
+        self.assertGreaterEqual(signal.deadline, start)
+        loop.process_signals()
+
+        self.assertEqual(self.signal_counter, 0)
+        self.assertEqual(loop.metrics.expired_signals, 1)
+
+    def test_wait_on_expired_signal(self):
+        loop = self.loop
+        loop.register_signal_handler(TestSignal, self._handler_signal_counter)
+        loop.enqueue_signal(TestSignal().expire_at(0))
+
+        loop.process_signals(return_after=TestSignal)
+
+        self.assertEqual(self.signal_counter, 0)
+
+    def test_process_signals_max_signals(self):
+        source = TestSource()
+        loop = self.loop
+        loop.register_signal_handler(TestProducerSignal, self._handler_record_signal)
+        loop.enqueue_signals([TestProducerSignal(source, n, priority) for n, priority in enumerate((1, 0, 1, 0, 2))])
+
+        self.assertTrue(loop.process_signals(max_signals=3))
+        self.assertEqual([s.number for s in self.processed_signals], [1, 3, 0])
+
+        self.assertFalse(loop.process_signals(max_signals=10))
+        self.assertEqual([s.number for s in self.processed_signals], [1, 3, 0, 2, 4])
+
+    def test_process_signals_max_time(self):
+        loop = self.loop
+        loop.register_signal_handler(TestSignal, self._handler_signal_counter_and_sleep)
+        loop.enqueue_signals([TestSignal(), TestSignal()])
+
+        self.assertTrue(loop.process_signals(max_time=0.01))
+        self.assertEqual(self.signal_counter, 1)
+
+        self.assertFalse(loop.process_signals(max_time=1))
+        self.assertEqual(self.signal_counter, 2)
+
+    def test_process_signals_budget_with_return_after(self):
+        with self.assertRaises(ValueError):
+            self.loop.process_signals(return_after=TestSignal, max_signals=1)
+
+    def test_idle_callback(self):
+        loop = self.loop
+        loop.register_signal_handler(TestSignal, self._handler_signal_counter)
+        calls = []
+
+        def idle_callback(data):
+            calls.append(data)
+            if len(calls) == 3:
+                loop.enqueue_signal(TestSignal())
+            return True
+
+        idle = loop.add_idle_callback(idle_callback, "data")
+        loop.process_signals(return_after=TestSignal)
+        idle.cancel()
+
+        # the idle callback is not called when a signal is pending
+        self.assertEqual(calls, ["data", "data", "data"])
+        self.assertEqual(self.signal_counter, 1)
+
+    def test_idle_callback_after_signals(self):
+        loop = self.loop
+        loop.register_signal_handler(TestSignal, self._handler_signal_counter)
+        counters = []
+
+        def idle_callback(data):
+            counters.append(self.signal_counter)
+            loop.enqueue_signal(TestSignal2())
+            return False
+
+        loop.enqueue_signals([TestSignal(), TestSignal()])
+        loop.add_idle_callback(idle_callback)
+        loop.process_signals(return_after=TestSignal2)
+
+        self.assertEqual(counters, [2])
+
+    def test_idle_callback_done(self):
+        loop = self.loop
+        calls = []
+
+        def done_callback(data):
+            calls.append("done")
+            return False
+
+        def idle_callback(data):
+            calls.append("idle")
+            if calls.count("idle") == 3:
+                loop.enqueue_signal(TestSignal())
+            return True
+
+        done = loop.add_idle_callback(done_callback)
+        idle = loop.add_idle_callback(idle_callback)
+        loop.process_signals(return_after=TestSignal)
+        idle.cancel()
+
+        self.assertEqual(calls, ["done", "idle", "idle", "idle"])
+        self.assertTrue(done.cancelled)
+
+    def test_idle_callback_cancel(self):
+        loop = self.loop
+        calls = []
+
+        def idle_callback(data):
+            calls.append(data)
+            loop.enqueue_signal(TestSignal())
+            return True
+
+        loop.add_idle_callback(idle_callback, "cancelled").cancel()
+        idle = loop.add_idle_callback(idle_callback, "called")
+        loop.process_signals(return_after=TestSignal)
+        idle.cancel()
+
+        self.assertEqual(calls, ["called"])
+
+    def test_idle_callback_exception(self):
+        loop = self.loop
+        loop.register_signal_handler(ExceptionSignal, self._handler_record_signal)
+
+        def idle_callback(data):
+            raise ValueError("Idle callback failed!")
+
+        idle = loop.add_idle_callback(idle_callback)
+        loop.process_signals(return_after=ExceptionSignal)
+
+        self.assertTrue(idle.cancelled)
+        self.assertEqual(len(self.processed_signals), 1)
+
+    def test_enqueue_signal_buffered(self):
+        loop = self.loop
+        loop.register_signal_handler(TestProducerSignal, self._handler_record_signal)
+
+        def produce(producer):
+            for number in range(100):
+                loop.enqueue_signal_buffered(TestProducerSignal(producer, number))
+
+        threads = [threading.Thread(target=produce, args=(producer,)) for producer in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        for _ in range(100):
+            if len(self.processed_signals) == 400:
+                break
+            loop.process_signals()
+
+        self.assertEqual(len(self.processed_signals), 400)
+        for producer in range(4):
+            numbers = [s.number for s in self.processed_signals if s.source == producer]
+            self.assertEqual(numbers, list(range(100)))
+
+    def test_enqueue_signal_buffered_wakes_up_loop(self):
+        loop = self.loop
+        loop.register_signal_handler(TestSignal, self._handler_signal_counter)
+        thread = threading.Timer(0.05, loop.enqueue_signal_buffered, args=(TestSignal(),))
+
+        thread.start()
+        loop.process_signals(return_after=TestSignal)
+        thread.join()
+
+        self.assertEqual(self.signal_counter, 1)
+
+    def test_enqueue_signal_buffered_priority(self):
+        loop = self.loop
+        loop.register_signal_handler(TestProducerSignal, self._handler_record_signal)
+
+        def produce():
+            loop.enqueue_signal_buffered(TestProducerSignal(None, "low", priority=20))
+            loop.enqueue_signal_buffered(TestProducerSignal(None, "high", priority=-10))
+
+        thread = threading.Thread(target=produce)
+        thread.start()
+        thread.join()
+
+        loop.process_signals()
+        loop.process_signals()
+
+        self.assertEqual([s.number for s in self.processed_signals], ["high", "low"])
+
+    def test_wait_on_signal_enqueued_in_the_same_batch(self):
+        self.signal_counter = 0
+
+        loop = self.loop
+        loop.register_signal_handler(TestSignal, self._handler_wait_on_testsignal2, loop)
+        loop.register_signal_handler(TestSignal2, self._handler_signal_counter)
+        loop.enqueue_signals([TestSignal(), TestSignal2()])
+
+        # TestSignal handler waits on TestSignal2 which is queued right behind it
+        loop.process_signals(return_after=TestSignal)
+
+        self.assertEqual(self.signal_counter, 1)
+
     def test_multiple_handlers_to_signal(self):
         self.signal_counter = 0
         self.signal_counter2 = 0
@@ -138,6 +432,47 @@ class ProcessEvents_TestCase(unittest.TestCase):
         self.assertEqual(self.signal_counter, 2)
         self.assertEqual(self.signal_counter2, 2)
 
+    def test_handler_called_for_subclassed_signal(self):
+        self.signal_counter = 0
+        self.signal_counter2 = 0
+
+        loop = self.loop
+        loop.register_signal_handler(TestSignal, self._handler_signal_counter)
+        loop.register_signal_handler(TestSubclassSignal, self._handler_signal_counter2)
+        loop.enqueue_signal(TestSubclassSignal())
+        loop.enqueue_signal(TestSignal())
+        loop.process_signals()
+
+        self.assertEqual(self.signal_counter, 2)
+        self.assertEqual(self.signal_counter2, 1)
+
+    def test_register_handler_during_dispatch(self):
+        self.signal_counter = 0
+
+        loop = self.loop
+        loop.register_signal_handler(TestSignal, self._handler_register_counter)
+        loop.enqueue_signal(TestSignal())
+        loop.process_signals()
+
+        # handler registered during the dispatch is used from the next signal
+        self.assertEqual(self.signal_counter, 0)
+
+        loop.enqueue_signal(TestSignal())
+        loop.process_signals()
+        self.assertEqual(self.signal_counter, 1)
+
+    def test_coalesce_queued_signals(self):
+        source = TestSource()
+
+        loop = self.loop
+        loop.register_signal_handler(TestCoalescedSignal, self._handler_signal_counter)
+        loop.enqueue_signals([TestCoalescedSignal(source) for _ in range(5)])
+        loop.enqueue_signal(TestCoalescedSignal(TestSource()))
+        loop.process_signals()
+
+        self.assertEqual(self.signal_counter, 2)
+        self.assertEqual(loop.metrics.coalesced_signals, 4)
+
     def test_priority_signal_processing(self):
         self.signal_counter = 0
 
@@ -173,6 +508,153 @@ class ProcessEvents_TestCase(unittest.TestCase):
         loop.process_signals()
         self.assertEqual(self.signal_counter_copied, 3)
 
+    def test_signal_routed_to_source_loop(self):
+        self.order = []
+        source = TestSource()
+
+        loop = self.loop
+        loop.register_signal_source(source)
+        loop.register_signal_handler(TestSignal, self._handler_start_inner_loop_and_enqueue_event, TestSignal3())
+        loop.register_signal_handler(TestSignal3, self._handler_enqueue_outer_and_inner_signal, source)
+        loop.register_signal_handler(TestSignal2, self._handler_close_inner_loop)
+        loop.register_signal_handler(TestSourceSignal, self._handler_record_outer_and_quit)
+        loop.enqueue_signal(TestSignal())
+        loop.run()
+
+        # signal with the outer source has to wait until the inner loop is closed
+        self.assertEqual(self.order, ["inner", "outer"])
+
+    def test_enqueue_signal_after(self):
+        loop = self.loop
+        loop.register_signal_handler(TestSignal, self._handler_raise_ExitMainLoop_exception)
+
+        start = monotonic()
+        loop.enqueue_signal_after(0.05, TestSignal())
+        loop.run()
+
+        self.assertGreaterEqual(monotonic() - start, 0.05)
+
+    def test_enqueue_signal_periodically(self):
+        loop = self.loop
+        loop.register_signal_handler(TestSignal, self._handler_cancel_after_three_signals)
+        loop.register_signal_handler(TestSignal2, self._handler_raise_ExitMainLoop_exception)
+
+        self.scheduled = loop.enqueue_signal_periodically(0.01, TestSignal())
+        loop.run()
+
+        self.assertEqual(self.signal_counter, 3)
+        self.assertTrue(self.scheduled.cancelled)
+
+    def test_periodic_signal_survives_closed_loop(self):
+        loop = self.loop
+        loop.register_signal_handler(TestSignal, self._handler_start_inner_loop_and_enqueue_event,
+                                     TestSignal3())
+        loop.register_signal_handler(TestSignal3, self._handler_schedule_periodic_and_close_inner_loop)
+        loop.register_signal_handler(TestSignal2, self._handler_cancel_after_three_periodic_signals)
+        loop.register_signal_handler(TestSourceSignal, self._handler_raise_ExitMainLoop_exception)
+
+        # stop the test if the timer doesn't fire after the inner loop is closed
+        loop.enqueue_signal_after(2, TestSourceSignal(self))
+        loop.enqueue_signal(TestSignal())
+        loop.run()
+
+        self.assertEqual(self.signal_counter, 3)
+
+    def test_cancel_signals_of_periodic_source(self):
+        loop = self.loop
+        source = TestSource()
+        loop.register_signal_handler(TestSignal, self._handler_cancel_signals_of_source, source)
+        loop.register_signal_handler(TestSourceSignal, self._handler_cancel_after_three_periodic_signals)
+        loop.register_signal_handler(TestSignal2, self._handler_raise_ExitMainLoop_exception)
+
+        # the queued periodic signal is cancelled, the next ones are processed
+        self.scheduled = loop.enqueue_signal_periodically(0.01, TestSourceSignal(source))
+        sleep(0.02)
+        loop.enqueue_signal(TestSignal())
+        loop.enqueue_signal_after(2, TestSignal2())
+        loop.run()
+
+        self.assertEqual(self.signal_counter, 3)
+        self.assertLessEqual(loop.metrics.cancelled_signals, 1)
+
+    def test_replace_scheduled_signal(self):
+        loop = self.loop
+        loop.register_signal_handler(TestSignal, self._handler_signal_counter)
+        loop.register_signal_handler(TestSignal2, self._handler_raise_ExitMainLoop_exception)
+
+        scheduled = loop.enqueue_signal_after(0.01, TestSignal())
+        self.assertTrue(scheduled.replace_signal(TestSignal2()))
+        loop.run()
+
+        # the enqueued signal can't be replaced
+        self.assertFalse(scheduled.replace_signal(TestSignal()))
+        self.assertEqual(self.signal_counter, 0)
+
+    def test_cancel_scheduled_signal(self):
+        loop = self.loop
+        loop.register_signal_handler(TestSignal, self._handler_signal_counter)
+        loop.register_signal_handler(TestSignal2, self._handler_raise_ExitMainLoop_exception)
+
+        scheduled = loop.enqueue_signal_after(0.01, TestSignal())
+        scheduled.cancel()
+        loop.enqueue_signal_after(0.05, TestSignal2())
+        loop.run()
+
+        self.assertEqual(self.signal_counter, 0)
+
+    def test_run_in_executor(self):
+        loop = self.loop
+        loop.register_signal_handler(TestSignal, self._handler_run_in_executor, (False, pow, 2, 10))
+        loop.enqueue_signal(TestSignal())
+        loop.run()
+
+        self.assertEqual(self.callback_args, 1024)
+
+    def test_run_in_executor_process(self):
+        loop = self.loop
+        loop.register_signal_handler(TestSignal, self._handler_run_in_executor, (True, pow, 3, 2))
+        loop.enqueue_signal(TestSignal())
+        loop.run()
+
+        self.assertEqual(self.callback_args, 9)
+
+    def test_run_in_executor_exception_without_callback(self):
+        loop = self.loop
+        loop.register_signal_handler(TestSignal, self._handler_run_in_executor_without_callback, int)
+        loop.register_signal_handler(ExceptionSignal, self._handler_exception_and_quit)
+        loop.enqueue_signal(TestSignal())
+        loop.run()
+
+        self.assertIs(self.callback_args, ValueError)
+
+    def test_run_in_executor_result_in_source_loop(self):
+        self.order = []
+
+        loop = self.loop
+        loop.register_signal_handler(TestSignal, self._handler_run_in_executor_then_inner_loop)
+        loop.register_signal_handler(TestSignal3, self._handler_close_inner_loop_later)
+        loop.register_signal_handler(TestSignal2, self._handler_close_inner_loop)
+        loop.enqueue_signal(TestSignal())
+        loop.run()
+
+        # the result has to wait until the inner loop is closed
+        self.assertEqual(self.order, ["inner", "result"])
+
+    def test_cancel_executor_task(self):
+        self.callback_called = False
+        event = threading.Event()
+
+        loop = self.loop
+        loop.register_signal_handler(TestSignal2, self._handler_raise_ExitMainLoop_exception)
+        task = loop.run_in_executor(event.wait, callback=self._handler_executor_callback)
+        task.cancel()
+        event.set()
+        loop.enqueue_signal_after(0.05, TestSignal2())
+        loop.run()
+
+        self.assertTrue(task.cancelled)
+        self.assertFalse(self.callback_called)
+
     def test_quit_callback(self):
         self.callback_called = False
         self.callback_args = None
@@ -238,6 +720,13 @@ class ProcessEvents_TestCase(unittest.TestCase):
     def _handler_signal_counter(self, signal, data):
         self.signal_counter += 1
 
+    def _handler_signal_counter_and_sleep(self, signal, data):
+        self.signal_counter += 1
+        sleep(0.02)
+
+    def _handler_record_signal(self, signal, data):
+        self.processed_signals.append(signal)
+
     def _handler_signal_counter2(self, signal, data):
         self.signal_counter2 += 1
 
@@ -250,9 +739,79 @@ class ProcessEvents_TestCase(unittest.TestCase):
         # This shouldn't be processed
         event_loop.enqueue_signal(TestSignal())
 
+    def _handler_register_counter(self, signal, data):
+        if not self.callback_called:
+            self.callback_called = True
+            self.loop.register_signal_handler(TestSignal, self._handler_signal_counter)
+
+    def _handler_wait_on_testsignal2(self, signal, data):
+        event_loop = data
+        event_loop.process_signals(return_after=TestSignal2)
+
     def _handler_start_inner_loop_and_enqueue_event(self, signal, data):
         self.loop.execute_new_loop(data)
 
+    def _handler_enqueue_outer_and_inner_signal(self, signal, data):
+        self.loop.enqueue_signal(TestSourceSignal(data))
+        self.loop.enqueue_signal(TestSignal2())
+
+    def _handler_close_inner_loop(self, signal, data):
+        self.order.append("inner")
+        self.loop.close_loop()
+
+    def _handler_record_outer_and_quit(self, signal, data):
+        self.order.append("outer")
+        raise ExitMainLoop()
+
+    def _handler_cancel_after_three_signals(self, signal, data):
+        self.signal_counter += 1
+        if self.signal_counter == 3:
+            self.scheduled.cancel()
+            self.loop.enqueue_signal_after(0.03, TestSignal2())
+
+    def _handler_cancel_signals_of_source(self, signal, data):
+        self.loop.cancel_signals(data)
+
+    def _handler_schedule_periodic_and_close_inner_loop(self, signal, data):
+        self.scheduled = self.loop.enqueue_signal_periodically(0.01, TestSignal2())
+        self.loop.close_loop()
+
+    def _handler_cancel_after_three_periodic_signals(self, signal, data):
+        self.signal_counter += 1
+        if self.signal_counter == 3:
+            self.scheduled.cancel()
+            raise ExitMainLoop()
+
+    def _handler_run_in_executor(self, signal, data):
+        use_process, func, *args = data
+        self.loop.run_in_executor(func, *args, callback=self._handler_executor_result_and_quit,
+                                  use_process=use_process)
+
+    def _handler_run_in_executor_without_callback(self, signal, data):
+        self.loop.run_in_executor(data, "not a number")
+
+    def _handler_exception_and_quit(self, signal, data):
+        self.callback_args = signal.exception_info[0]
+        raise ExitMainLoop()
+
+    def _handler_run_in_executor_then_inner_loop(self, signal, data):
+        self.loop.run_in_executor(int, "1", callback=self._handler_executor_record_and_quit)
+        self.loop.execute_new_loop(TestSignal3())
+
+    def _handler_close_inner_loop_later(self, signal, data):
+        self.loop.enqueue_signal_after(0.05, TestSignal2())
+
+    def _handler_executor_result_and_quit(self, task):
+        self.callback_args = task.result()
+        raise ExitMainLoop()
+
+    def _handler_executor_record_and_quit(self, task):
+        self.order.append("result")
+        raise ExitMainLoop()
+
+    def _handler_executor_callback(self, task):
+        self.callback_called = True
+
     def _handler_raise_ExitMainLoop_exception(self, signal, data):
         raise ExitMainLoop()
 
@@ -261,6 +820,294 @@ class ProcessEvents_TestCase(unittest.TestCase):
 
 
 # TESTING EVENTS
+class BoundedQueue_TestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.signal_counter = 0
+
+    def create_loop(self, **kwargs):
+        return MainLoop(**kwargs)
+
+    def _handler_count(self, signal, data):
+        self.signal_counter += 1
+
+    def _handler_count_and_quit(self, signal, data):
+        self.signal_counter += 1
+        if self.signal_counter == 100:
+            raise ExitMainLoop()
+
+    def _handler_quit(self, signal, data):
+        raise ExitMainLoop()
+
+    def _produce_signals(self, loop):
+        for _ in range(100):
+            loop.enqueue_signal(TestSignal())
+
+    def test_producer_blocked(self):
+        loop = self.create_loop(queue_capacity=5)
+        loop.register_signal_handler(TestSignal, self._handler_count_and_quit)
+        thread = threading.Thread(target=self._produce_signals, args=(loop,))
+        thread.start()
+
+        loop.run()
+        thread.join()
+
+        self.assertEqual(self.signal_counter, 100)
+        self.assertLessEqual(loop.metrics.queue_high_water_mark, 5)
+        self.assertEqual(loop.metrics.dropped_signals, 0)
+
+    def test_producer_signals_dropped(self):
+        loop = self.create_loop(queue_capacity=2, overflow_policy=OverflowPolicy.DROP_NEWEST)
+        loop.register_signal_handler(TestSignal, self._handler_count)
+        loop.register_signal_handler(TestSignal2, self._handler_quit)
+        thread = threading.Thread(target=self._produce_signals, args=(loop,))
+        thread.start()
+        thread.join()
+
+        loop.enqueue_signal_after(0.05, TestSignal2())
+        loop.run()
+
+        self.assertEqual(self.signal_counter, 2)
+        self.assertEqual(loop.metrics.dropped_signals, 98)
+
+
+class SignalAging_TestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.flood_counter = 0
+        self.low_priority_processed = False
+        self.low_priority_counter = 0
+
+    def _handler_flood(self, signal, data):
+        self.flood_counter += 1
+        if self.flood_counter == 10000:
+            raise ExitMainLoop()
+
+        # keep the queue full of signals with higher priority
+        self.loop.enqueue_signal(TestSignal())
+
+    def _handler_low_priority(self, signal, data):
+        self.low_priority_processed = True
+        raise ExitMainLoop()
+
+    def _handler_flood_until_low_priority_processed(self, signal, data):
+        self.flood_counter += 1
+        if self.flood_counter == 200000:
+            raise ExitMainLoop()
+
+        self.loop.enqueue_signal(TestSignal())
+
+    def _handler_count_low_priority(self, signal, data):
+        self.low_priority_counter += 1
+        if self.low_priority_counter == 20:
+            raise ExitMainLoop()
+
+    def _run_flood(self):
+        self.loop.register_signal_handler(TestSignal, self._handler_flood)
+        self.loop.register_signal_handler(TestLowPrioritySignal, self._handler_low_priority)
+        self.loop.enqueue_signal(TestLowPrioritySignal())
+        for _ in range(10):
+            self.loop.enqueue_signal(TestSignal())
+
+        self.loop.run()
+
+    def test_low_priority_starves(self):
+        self.loop = MainLoop()
+        self._run_flood()
+
+        self.assertFalse(self.low_priority_processed)
+        self.assertEqual(self.loop.metrics.aged_signals, 0)
+
+    def test_low_priority_aged(self):
+        self.loop = MainLoop(max_signal_wait=0.01)
+        self._run_flood()
+
+        self.assertTrue(self.low_priority_processed)
+        self.assertLess(self.flood_counter, 10000)
+        self.assertEqual(self.loop.metrics.aged_signals, 1)
+        self.assertGreaterEqual(self.loop.metrics.max_queue_wait[20], 0.01)
+
+    def test_many_low_priority_aged(self):
+        self.loop = MainLoop(max_signal_wait=0.05)
+        self.loop.register_signal_handler(TestSignal, self._handler_flood_until_low_priority_processed)
+        self.loop.register_signal_handler(TestLowPrioritySignal, self._handler_count_low_priority)
+        for _ in range(10):
+            self.loop.enqueue_signal(TestSignal())
+        for _ in range(20):
+            self.loop.enqueue_signal(TestLowPrioritySignal())
+
+        self.loop.run()
+
+        # all waiting signals are aged together and counted only once
+        self.assertEqual(self.low_priority_counter, 20)
+        self.assertLessEqual(self.loop.metrics.aged_signals, 20)
+        self.assertGreaterEqual(self.loop.metrics.max_queue_wait[20], 0.05)
+        self.assertLess(self.loop.metrics.max_queue_wait[20], 0.5)
+
+    def test_exception_not_aged(self):
+        self.loop = MainLoop(max_signal_wait=0)
+        self.loop.register_signal_handler(ExceptionSignal, self._handler_low_priority)
+        self.loop.register_signal_handler(TestLowPrioritySignal, self._handler_flood)
+        self.loop.enqueue_signal(TestLowPrioritySignal())
+        self.loop.enqueue_signal(ExceptionSignal(None))
+
+        self.loop.run()
+
+        self.assertEqual(self.flood_counter, 0)
+
+
+class WaitOnIO_TestCase(unittest.TestCase):
+    """Test wake ups of the main loop waiting on watched file descriptors."""
+
+    def setUp(self):
+        self.loop = MainLoop()
+        self.started = monotonic()
+        self.processed_after = None
+        self._fds = os.pipe()
+        self.addCleanup(os.close, self._fds[0])
+        self.addCleanup(os.close, self._fds[1])
+
+        # the descriptor becomes readable only when the loop was not woken up
+        self._timeout = threading.Timer(2, os.write, args=(self._fds[1], b"\0"))
+        self._timeout.start()
+        self.addCleanup(self._timeout.cancel)
+
+        self.loop.add_reader(self._fds[0], self._reader_quit)
+        self.loop.register_signal_handler(TestSignal, self._handler_record_and_quit)
+
+    def _reader_quit(self, fd, data):
+        raise ExitMainLoop()
+
+    def _handler_record_and_quit(self, signal, data):
+        self.processed_after = monotonic() - self.started
+        raise ExitMainLoop()
+
+    def _run_with_action_after_timers(self, action):
+        """Run the loop and call `action` once after the loop computed the time of its next wake up."""
+        run_expired_timers = self.loop._run_expired_timers
+        actions = [action]
+
+        def _run_expired_timers():
+            timeout = run_expired_timers()
+            if actions:
+                actions.pop()()
+            return timeout
+
+        self.loop._run_expired_timers = _run_expired_timers
+        self.loop.run()
+
+    def test_timer_scheduled_before_wait(self):
+        self._run_with_action_after_timers(lambda: self.loop.enqueue_signal_after(0.05, TestSignal()))
+
+        self.assertIsNotNone(self.processed_after)
+        self.assertLess(self.processed_after, 1)
+
+    def test_buffered_signal_before_wait(self):
+        def _enqueue_from_thread():
+            thread = threading.Thread(target=self.loop.enqueue_signal_buffered, args=(TestSignal(),))
+            thread.start()
+            thread.join()
+
+        self._run_with_action_after_timers(_enqueue_from_thread)
+
+        self.assertIsNotNone(self.processed_after)
+        self.assertLess(self.processed_after, 1)
+
+
+class HostEventLoop_TestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.loop = MainLoop()
+        self.signal_counter = 0
+        self.ready_counter = 0
+
+    def _handler_signal_counter(self, signal, data):
+        self.signal_counter += 1
+
+    def _ready_callback(self):
+        self.ready_counter += 1
+
+    def _is_readable(self, fd, timeout=0):
+        readable, _, _ = select.select([fd], [], [], timeout)
+        return bool(readable)
+
+    def test_ready_fd(self):
+        loop = self.loop
+        loop.register_signal_handler(TestSignal, self._handler_signal_counter)
+        fd = loop.get_ready_fd()
+        self.assertFalse(self._is_readable(fd))
+
+        loop.enqueue_signal(TestSignal())
+        loop.enqueue_signal(TestSignal())
+        self.assertTrue(self._is_readable(fd))
+
+        # signals are left in the queue so the fd stays readable
+        self.assertTrue(loop.process_signals(max_signals=1))
+        self.assertTrue(self._is_readable(fd))
+
+        self.assertFalse(loop.process_signals(max_signals=1))
+        self.assertFalse(self._is_readable(fd))
+        self.assertEqual(self.signal_counter, 2)
+
+    def test_ready_fd_with_queued_signals(self):
+        self.loop.enqueue_signal(TestSignal())
+
+        self.assertTrue(self._is_readable(self.loop.get_ready_fd()))
+
+    def test_ready_fd_enqueue_from_thread(self):
+        loop = self.loop
+        loop.register_signal_handler(TestSignal, self._handler_signal_counter)
+        fd = loop.get_ready_fd()
+        thread = threading.Timer(0.01, loop.enqueue_signal, args=(TestSignal(),))
+        thread.start()
+
+        self.assertTrue(self._is_readable(fd, timeout=5))
+        thread.join()
+
+        self.assertFalse(loop.process_signals(max_time=1))
+        self.assertEqual(self.signal_counter, 1)
+
+    def test_ready_fd_kept_after_readers(self):
+        loop = self.loop
+        fd = loop.get_ready_fd()
+        read_fd, write_fd = os.pipe()
+        self.addCleanup(os.close, read_fd)
+        self.addCleanup(os.close, write_fd)
+
+        loop.add_reader(read_fd, lambda fd, data: None)
+        loop.remove_reader(read_fd)
+        loop.enqueue_signal(TestSignal())
+
+        self.assertTrue(self._is_readable(fd))
+
+    def test_ready_callback(self):
+        loop = self.loop
+        loop.register_signal_handler(TestSignal, self._handler_signal_counter)
+        loop.set_ready_callback(self._ready_callback)
+
+        loop.enqueue_signal(TestSignal())
+        loop.enqueue_signal(TestSignal())
+        loop.enqueue_signal(TestSignal())
+        self.assertEqual(self.ready_counter, 1)
+
+        # the callback is called again when the step leaves signals in the queue
+        self.assertTrue(loop.process_signals(max_signals=2))
+        self.assertEqual(self.ready_counter, 2)
+
+        self.assertFalse(loop.process_signals(max_signals=2))
+        loop.enqueue_signal(TestSignal())
+        self.assertEqual(self.ready_counter, 3)
+        self.assertEqual(self.signal_counter, 3)
+
+    def test_serve_timers_in_step(self):
+        loop = self.loop
+        loop.register_signal_handler(TestSignal, self._handler_signal_counter)
+        loop.enqueue_signal_at(0, TestSignal())
+
+        self.assertFalse(loop.process_signals(max_signals=1))
+        self.assertEqual(self.signal_counter, 1)
+
+
 class TestSignal(AbstractSignal):
 
     def __init__(self):
@@ -282,6 +1129,33 @@ class TestSignal3(AbstractSignal):
         super().__init__(None)
 
 
+class TestSubclassSignal(TestSignal):
+    pass
+
+
+class TestSourceSignal(AbstractSignal):
+    pass
+
+
+class TestCoalescedSignal(AbstractSignal):
+    coalesce_policy = CoalescePolicy.KEEP_LATEST
+
+
+class TestExpiringSignal(AbstractSignal):
+    time_to_live = 0
+
+
+class TestSource(object):
+    pass
+
+
+class TestProducerSignal(AbstractSignal):
+
+    def __init__(self, source, number, priority=0):
+        super().__init__(source, priority)
+        self.number = number
+
+
 class TestPrioritySignal(AbstractSignal):
 
     def __init__(self):
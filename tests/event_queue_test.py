@@ -18,9 +18,12 @@
 #
 
 
+import threading
 import unittest
-from unittest.mock import MagicMock
-from simpleline.event_loop.event_queue import EventQueue, EventQueueError
+from unittest.mock import MagicMock, patch
+from simpleline.event_loop import CoalescePolicy
+from simpleline.event_loop.event_queue import EventQueue, EventQueueError, EventQueueFullError, OverflowPolicy, \
+    URGENT_PRIORITY
 from simpleline.event_loop.signals import AbstractSignal
 
 
@@ -58,6 +61,287 @@ class EventQueue_TestCase(unittest.TestCase):
         self.assertEqual(signal_high_priority, self.e.get())
         self.assertEqual(signal_low_priority, self.e.get())
 
+    def test_fifo_in_the_same_priority(self):
+        signals = [TestSignal(priority=p) for p in (5, 0, 5, 0, 5, -5, 0)]
+
+        for s in signals:
+            self.e.enqueue(s)
+
+        expected = [signals[5], signals[1], signals[3], signals[6], signals[0], signals[2], signals[4]]
+        result = [self.e.get() for _ in signals]
+
+        # compare identity, signals with the same priority are equal
+        self.assertEqual([id(s) for s in expected], [id(s) for s in result])
+        self.assertTrue(self.e.empty())
+
+    def test_get_top_event_if_priority(self):
+        signal_low_priority = TestSignal(priority=10)
+        signal_high_priority = TestSignal(priority=0)
+
+        self.e.enqueue(signal_low_priority)
+        self.e.enqueue(signal_high_priority)
+
+        self.assertIsNone(self.e.get_top_event_if_priority(10))
+        self.assertIs(self.e.get_top_event_if_priority(0), signal_high_priority)
+        self.assertIsNone(self.e.get_top_event_if_priority(0))
+        self.assertIs(self.e.get_top_event_if_priority(10), signal_low_priority)
+        self.assertTrue(self.e.empty())
+
+    def test_get_waits_for_signal(self):
+        signal = TestSignal()
+        thread = threading.Timer(0.05, self.e.enqueue, args=(signal,))
+        thread.start()
+
+        self.assertIs(self.e.get(), signal)
+        thread.join()
+
+    def test_enqueue_signals(self):
+        signals = [TestSignal(priority=p) for p in (1, 0, 1)]
+
+        self.e.enqueue_signals(signals)
+
+        self.assertEqual(self.e.top_priority(), 0)
+        self.assertIs(self.e.get(), signals[1])
+        self.assertIs(self.e.get(), signals[0])
+        self.assertIs(self.e.get(), signals[2])
+        self.assertIsNone(self.e.top_priority())
+
+    def test_drain(self):
+        signals = [TestSignal(priority=p) for p in (1, 0, 1, 1)]
+        self.e.enqueue_signals(signals)
+
+        self.assertEqual(self.e.drain(5), [])
+        batch = self.e.drain(1, max_items=2)
+        self.assertEqual([id(s) for s in batch], [id(signals[0]), id(signals[2])])
+
+        batch = self.e.drain(1)
+        self.assertEqual(len(batch), 1)
+        self.assertIs(batch[0], signals[3])
+
+        self.assertIs(self.e.get(), signals[1])
+        self.assertTrue(self.e.empty())
+
+    def test_requeue(self):
+        signals = [TestSignal(priority=0) for _ in range(4)]
+        self.e.enqueue_signals(signals)
+
+        batch = self.e.drain(0, max_items=3)
+        self.e.requeue(batch[1:])
+
+        result = [self.e.get() for _ in range(3)]
+        self.assertEqual([id(s) for s in result], [id(signals[1]), id(signals[2]), id(signals[3])])
+
+    def test_coalesce_keep_latest(self):
+        source = object()
+        signals = [LatestSignal(source) for _ in range(3)]
+        other = LatestSignal(object())
+
+        self.e.enqueue_signals(signals + [other])
+
+        self.assertIs(self.e.get(), signals[2])
+        self.assertIs(self.e.get(), other)
+        self.assertTrue(self.e.empty())
+        self.assertEqual(self.e._metrics.coalesced_signals, 2)
+
+    def test_coalesce_keep_first(self):
+        source = object()
+        signals = [FirstSignal(source) for _ in range(3)]
+
+        self.e.enqueue_signals(signals)
+        self.assertIs(self.e.get(), signals[0])
+        self.assertTrue(self.e.empty())
+
+        # the processed signal is not merged
+        self.e.enqueue(signals[1])
+        self.assertIs(self.e.get(), signals[1])
+
+    def test_coalesce_replaces_cancelled_signal(self):
+        source = object()
+        signals = [FirstSignal(source) for _ in range(2)]
+
+        self.e.enqueue(signals[0])
+        signals[0].cancel()
+        self.e.enqueue(signals[1])
+
+        self.assertIs(self.e.get(), signals[1])
+        self.assertTrue(self.e.empty())
+
+    def test_coalesce_replaces_expired_signal(self):
+        source = object()
+        signals = [FirstSignal(source) for _ in range(2)]
+
+        self.e.enqueue(signals[0].expire_at(0))
+        self.e.enqueue(signals[1])
+
+        self.assertIs(self.e.get(), signals[1])
+        self.assertTrue(self.e.empty())
+
+    def test_cancel_signals(self):
+        source = object()
+        signals = [TestSignal(), TestSignal(source)]
+
+        self.assertEqual(self.e.cancel_signals(source), 0)
+        self.e.enqueue_signals(signals)
+        self.assertEqual(self.e.cancel_signals(source), 1)
+        self.assertFalse(signals[0].cancelled)
+        self.assertTrue(signals[1].cancelled)
+
+    def test_coalesce_unhashable_key(self):
+        signals = [LatestSignal([]) for _ in range(2)]
+        self.e.enqueue_signals(signals)
+
+        self.assertEqual(len(self.e.drain(20)), 2)
+
+    def test_capacity_drop_newest(self):
+        e = EventQueue(capacity=2, overflow_policy=OverflowPolicy.DROP_NEWEST)
+        signals = [TestSignal() for _ in range(3)]
+        e.enqueue_signals(signals)
+
+        self.assertIs(e.get(), signals[0])
+        self.assertIs(e.get(), signals[1])
+        self.assertTrue(e.empty())
+        self.assertEqual(e._metrics.dropped_signals, 1)
+
+    def test_capacity_drop_oldest(self):
+        e = EventQueue(capacity=2, overflow_policy=OverflowPolicy.DROP_OLDEST)
+        signals = [TestSignal() for _ in range(3)]
+        e.enqueue_signals(signals)
+
+        self.assertIs(e.get(), signals[1])
+        self.assertIs(e.get(), signals[2])
+        self.assertTrue(e.empty())
+
+        # the oldest signal with the lowest priority is dropped if there is none with the same priority
+        e = EventQueue(capacity=2, overflow_policy=OverflowPolicy.DROP_OLDEST)
+        e.enqueue_signals([TestSignal(priority=30), TestSignal(priority=25), TestSignal(priority=0)])
+
+        self.assertEqual([s.priority for s in e.drain(0) + e.drain(25) + e.drain(30)], [0, 25])
+        self.assertEqual(e._metrics.dropped_signals, 1)
+
+    def test_capacity_drop_oldest_keeps_higher_priority(self):
+        # the new signal is dropped if only signals with higher priority are queued
+        e = EventQueue(capacity=2, overflow_policy=OverflowPolicy.DROP_OLDEST)
+        e.enqueue_signals([TestSignal(priority=URGENT_PRIORITY), TestSignal(priority=URGENT_PRIORITY),
+                           TestSignal(priority=10)])
+
+        self.assertEqual([s.priority for s in e.drain(URGENT_PRIORITY) + e.drain(10)],
+                         [URGENT_PRIORITY, URGENT_PRIORITY])
+        self.assertEqual(e._metrics.dropped_signals, 1)
+
+        # urgent signals are never dropped
+        e = EventQueue(capacity=1, overflow_policy=OverflowPolicy.DROP_OLDEST)
+        urgent = TestSignal(priority=URGENT_PRIORITY)
+        e.enqueue_signals([urgent, TestSignal(priority=URGENT_PRIORITY)])
+
+        self.assertEqual(e.drain(URGENT_PRIORITY), [urgent])
+
+    def test_capacity_raise(self):
+        e = EventQueue(capacity=1, overflow_policy=OverflowPolicy.RAISE)
+        e.enqueue(TestSignal())
+
+        with self.assertRaises(EventQueueFullError):
+            e.enqueue(TestSignal())
+
+    def test_capacity_block(self):
+        e = EventQueue(capacity=1)
+        e.enqueue(TestSignal())
+
+        self.assertFalse(e.enqueue(TestSignal(), block=False))
+        self.assertFalse(e.wait_for_space(timeout=0))
+
+        signal = TestSignal()
+        thread = threading.Thread(target=e.enqueue, args=(signal,))
+        thread.start()
+
+        e.get()
+        thread.join()
+        self.assertIs(e.get(), signal)
+
+    def test_capacity_not_applied_to_consumer(self):
+        e = EventQueue(capacity=1, overflow_policy=OverflowPolicy.RAISE)
+        e.enqueue(TestSignal())
+        e.get()
+
+        e.enqueue_signals([TestSignal(), TestSignal()])
+        self.assertEqual(len(e.drain(20)), 2)
+
+    def test_high_water_mark(self):
+        self.e.enqueue_signals([TestSignal() for _ in range(3)])
+        self.e.get()
+        self.e.enqueue(TestSignal())
+
+        self.assertEqual(self.e.high_water_mark, 3)
+        self.assertEqual(self.e._metrics.queue_high_water_mark, 3)
+
+    @patch('simpleline.event_loop.event_queue.monotonic')
+    def test_aging(self, monotonic_mock):
+        e = EventQueue(max_wait=1)
+        monotonic_mock.return_value = 0
+        low = TestSignal(priority=5)
+        e.enqueue(low)
+        monotonic_mock.return_value = 0.5
+        high = [TestSignal(priority=0) for _ in range(2)]
+        e.enqueue_signals(high)
+
+        self.assertIs(e.get(), high[0])
+
+        # the low priority signal waits longer than max_wait
+        monotonic_mock.return_value = 1.5
+        self.assertEqual(e.top_priority(), 5)
+        self.assertIs(e.get(), low)
+        self.assertIs(e.get(), high[1])
+
+        self.assertEqual(e._metrics.aged_signals, 1)
+        self.assertEqual(e._metrics.max_queue_wait, {0: 1, 5: 1.5})
+
+    @patch('simpleline.event_loop.event_queue.monotonic')
+    def test_aging_keeps_urgent_signals_first(self, monotonic_mock):
+        e = EventQueue(max_wait=1)
+        monotonic_mock.return_value = 0
+        low = TestSignal(priority=5)
+        urgent = TestSignal(priority=-20)
+        e.enqueue(low)
+        e.enqueue(urgent)
+
+        monotonic_mock.return_value = 10
+        self.assertIs(e.get(), urgent)
+        self.assertIs(e.get(), low)
+        self.assertEqual(e._metrics.aged_signals, 0)
+
+    @patch('simpleline.event_loop.event_queue.monotonic')
+    def test_aging_of_requeued_signals(self, monotonic_mock):
+        e = EventQueue(max_wait=1)
+        monotonic_mock.return_value = 0
+        low = [TestSignal(priority=5) for _ in range(2)]
+        e.enqueue_signals(low)
+        monotonic_mock.return_value = 0.5
+        high = TestSignal(priority=0)
+        e.enqueue(high)
+
+        monotonic_mock.return_value = 1.5
+        self.assertEqual(e.drain(5), low)
+
+        # the requeued signal keeps its enqueue time and it's counted only once
+        e.requeue(low[1:])
+        monotonic_mock.return_value = 2
+        self.assertEqual(e.top_priority(), 5)
+        self.assertIs(e.get(), low[1])
+        self.assertIs(e.get(), high)
+
+        self.assertEqual(e._metrics.aged_signals, 2)
+        self.assertEqual(e._metrics.max_queue_wait, {0: 1.5, 5: 2})
+
+    def test_no_aging_by_default(self):
+        low = TestSignal(priority=5)
+        high = TestSignal(priority=0)
+        self.e.enqueue(low)
+        self.e.enqueue(high)
+
+        self.assertIs(self.e.get(), high)
+        self.assertIs(self.e.get(), low)
+        self.assertEqual(self.e._metrics.aged_signals, 0)
+        self.assertEqual(set(self.e._metrics.max_queue_wait), {0, 5})
+
     def test_adding_event_source(self):
         fake_source = MagicMock()
         self.e.add_source(fake_source)
@@ -100,3 +384,11 @@ class TestSignal(AbstractSignal):
 
     def __init__(self, source=None, priority=20):  # pylint: disable=useless-super-delegation
         super().__init__(source, priority)
+
+
+class LatestSignal(TestSignal):
+    coalesce_policy = CoalescePolicy.KEEP_LATEST
+
+
+class FirstSignal(TestSignal):
+    coalesce_policy = CoalescePolicy.KEEP_FIRST
@@ -17,9 +17,18 @@
 # Red Hat, Inc.
 #
 
-from tests.event_loop_test import ProcessEvents_TestCase
+import unittest
+
+from simpleline.event_loop import AbstractSignal
+from simpleline.event_loop.glib_event_loop import GLibEventLoop
+from tests.event_loop_test import ProcessEvents_TestCase, BoundedQueue_TestCase
 from tests.glib_tests import GLibUtilityMixin
 
+import gi
+gi.require_version("GLib", "2.0")
+
+from gi.repository import GLib
+
 
 class GLibProcessEvents_TestCase(ProcessEvents_TestCase, GLibUtilityMixin):
     """Run all the tests in ProcessEvents test case but with GLib event loop."""
@@ -30,3 +39,55 @@ class GLibProcessEvents_TestCase(ProcessEvents_TestCase, GLibUtilityMixin):
 
     def create_loop(self):
         self.create_glib_loop()
+
+
+class GLibBoundedQueue_TestCase(BoundedQueue_TestCase):
+    """Run all the tests in BoundedQueue test case but with GLib event loop."""
+
+    def create_loop(self, **kwargs):
+        return GLibEventLoop(**kwargs)
+
+
+class GLibDispatcher_TestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.processed = []
+
+    def _handler_record_priority(self, signal, data):
+        self.processed.append(signal.priority)
+
+    def _record_idle(self, data):
+        self.processed.append("idle")
+        return GLib.SOURCE_REMOVE
+
+    def test_priority_among_glib_sources(self):
+        loop = GLibEventLoop()
+        loop.register_signal_handler(PrioritySignal, self._handler_record_priority)
+        loop.enqueue_signal(PrioritySignal(None, priority=10))
+        loop.enqueue_signal(PrioritySignal(None, priority=-10))
+
+        source = GLib.idle_source_new()
+        source.set_priority(0)
+        source.set_callback(self._record_idle)
+        source.attach(loop.active_main_loop.get_context())
+
+        for _ in range(3):
+            loop.process_signals()
+
+        self.assertEqual(self.processed, [-10, "idle", 10])
+
+    def test_batch_size(self):
+        loop = GLibEventLoop(batch_size=2)
+        loop.register_signal_handler(PrioritySignal, self._handler_record_priority)
+        loop.enqueue_signals([PrioritySignal(None) for _ in range(5)])
+
+        loop.process_signals()
+        self.assertEqual(len(self.processed), 2)
+
+        loop.process_signals()
+        loop.process_signals()
+        self.assertEqual(len(self.processed), 5)
+
+
+class PrioritySignal(AbstractSignal):
+    pass
@@ -0,0 +1,74 @@
+# Standard input reader test classes for GLib implementation.
+#
+# Copyright (C) 2017  Red Hat, Inc.
+#
+# This copyrighted material is made available to anyone wishing to use,
+# modify, copy, or redistribute it subject to the terms and conditions of
+# the GNU General Public License v.2, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY expressed or implied, including the implied warranties of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+# Public License for more details.  You should have received a copy of the
+# GNU General Public License along with this program; if not, write to the
+# Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+# 02110-1301, USA.  Any Red Hat trademarks that are incorporated in the
+# source code or documentation are not subject to the GNU General Public
+# License and may only be used or replicated with the express permission of
+# Red Hat, Inc.
+#
+
+import os
+
+from simpleline import App
+from simpleline.event_loop import AbstractSignal
+from simpleline.event_loop.glib_event_loop import GLibEventLoop
+from simpleline.event_loop.signals import InputReadySignal
+from tests.stdin_reader_test import EventLoopReader_TestCase, StdinReader_TestCase
+
+import gi
+gi.require_version("GLib", "2.0")
+
+from gi.repository import GLib
+
+
+class GLibEventLoopReader_TestCase(EventLoopReader_TestCase):
+    """Run all the tests in EventLoopReader test case but with GLib event loop."""
+
+    def create_loop(self):
+        self.loop = GLibEventLoop()
+
+    def _start_nested_loop_handler(self, signal, data):
+        # This is prevention from running the nested loop indefinitely
+        source = GLib.timeout_source_new_seconds(2)
+        source.set_callback(self._nested_loop_timeout)
+        source.attach(self.loop.active_main_loop.get_context())
+
+    def _nested_loop_timeout(self, data):
+        self.loop.close_loop()
+        return GLib.SOURCE_REMOVE
+
+    def _input_close_loop_handler(self, signal, data):
+        self.received = signal.data
+        self.loop.close_loop()
+
+    def test_reader_in_nested_loop(self):
+        self.received = None
+        self.loop.register_signal_handler(StartSignal, self._start_nested_loop_handler)
+        self.loop.register_signal_handler(InputReadySignal, self._input_close_loop_handler)
+        self.loop.add_reader(self.read_fd, self._reader_callback)
+        os.write(self.write_fd, b"nested")
+
+        self.loop.execute_new_loop(StartSignal(self))
+
+        self.assertEqual(self.received, "nested")
+
+
+class GLibStdinReader_TestCase(StdinReader_TestCase):
+    """Run all the tests in StdinReader test case but with GLib event loop."""
+
+    def initialize_app(self):
+        App.initialize(event_loop=GLibEventLoop())
+
+
+class StartSignal(AbstractSignal):
+    pass
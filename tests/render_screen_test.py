@@ -238,6 +238,16 @@ class InputProcessing_TestCase(unittest.TestCase):
 
         self.assertTrue(screen.prompt_entered)
 
+    def test_input_thread_reused(self, mock_stdin, mock_stdout):
+        mock_stdin.side_effect = ["first", "second"]
+        io_manager = App.get_scheduler().io_manager
+
+        self.assertEqual(io_manager.get_user_input("prompt"), "first")
+        thread = io_manager._input_thread._thread
+        self.assertEqual(io_manager.get_user_input("prompt"), "second")
+
+        self.assertIs(io_manager._input_thread._thread, thread)
+
     @mock.patch('simpleline.event_loop.main_loop.MainLoop.process_signals')
     def test_custom_getpass(self, mock_stdin, mock_stdout, process_signals):
         prompt = mock.MagicMock()
@@ -248,6 +258,31 @@ class InputProcessing_TestCase(unittest.TestCase):
         self.assertTrue(self.pass_called)
         self.assertEqual(self.pass_prompt, prompt)
 
+    def test_getpass_eof(self, mock_stdin, mock_stdout):
+        mock_stdin.side_effect = ["next"]
+        io_manager = App.get_scheduler().io_manager
+        io_manager.set_pass_func(self._getpass_raise(EOFError()))
+
+        self.assertEqual(io_manager.get_user_input("prompt", hidden=True), "")
+        # the next input request is not blocked
+        self.assertEqual(io_manager.get_user_input("prompt"), "next")
+
+    def test_getpass_failed(self, mock_stdin, mock_stdout):
+        mock_stdin.side_effect = ["next"]
+        io_manager = App.get_scheduler().io_manager
+        io_manager.set_pass_func(self._getpass_raise(OSError()))
+
+        with self.assertLogs(level="ERROR"):
+            self.assertEqual(io_manager.get_user_input("prompt", hidden=True), "")
+
+        self.assertEqual(io_manager.get_user_input("prompt"), "next")
+
+    def _getpass_raise(self, exception):
+        def _getpass(prompt):
+            raise exception
+
+        return _getpass
+
 
 # HELPER CLASSES
 
@@ -147,6 +147,53 @@ class Scheduler_TestCase(unittest.TestCase):
         self.assertEqual(self.pop_last_item().ui_screen, screen)
         self.assertTrue(self.stack.empty())
 
+    def test_switch_screen_modal_async(self):
+        self.create_scheduler_with_stack()
+        callback = mock.Mock()
+
+        screen = UIScreen()
+        new_screen = UIScreen()
+        self.scheduler.schedule_screen(screen)
+        future = self.scheduler.push_screen_modal_async(new_screen, args="test", callback=callback)
+
+        test_screen = self.pop_last_item(False)
+        self.assertEqual(test_screen.ui_screen, new_screen)
+        self.assertEqual(test_screen.args, "test")
+        self.assertEqual(test_screen.execute_new_loop, False)
+        self.assertFalse(future.done())
+
+        self.scheduler.close_screen()
+
+        self.assertIs(future.result(timeout=0), new_screen)
+        callback.assert_called_once_with(new_screen)
+        self.assertEqual(self.pop_last_item(False).ui_screen, screen)
+
+    def test_replace_screen_modal_async(self):
+        self.create_scheduler_with_stack()
+
+        screen = UIScreen()
+        new_screen = UIScreen()
+        replaced_screen = UIScreen()
+        self.scheduler.schedule_screen(screen)
+        future = self.scheduler.push_screen_modal_async(new_screen)
+        self.scheduler.replace_screen(replaced_screen)
+        self.scheduler.close_screen()
+
+        # the caller gets the screen which was closed
+        self.assertIs(future.result(timeout=0), replaced_screen)
+
+    def test_close_screen_cancels_signals(self):
+        event_loop = mock.MagicMock()
+        scheduler = ScreenScheduler(event_loop=event_loop, scheduler_stack=ScreenStack())
+
+        screen = UIScreen()
+        new_screen = UIScreen()
+        scheduler.schedule_screen(screen)
+        scheduler.push_screen(new_screen)
+        scheduler.close_screen()
+
+        event_loop.cancel_signals.assert_called_once_with(new_screen)
+
     def test_switch_screen_with_args(self):
         self.create_scheduler_with_stack()
 
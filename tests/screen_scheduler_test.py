@@ -17,6 +17,7 @@
 # Red Hat, Inc.
 #
 
+import sys
 import unittest
 from io import StringIO
 from unittest import mock
@@ -47,6 +48,18 @@ class ScreenScheduler_TestCase(unittest.TestCase, UtilityMixin):
         self.assertEqual(screen.counter, 2)
         self.assertEqual(switched_screen.counter, 1)
 
+    def test_switch_screen_modal_async_chain(self, _):
+        # more modal screens than nested loops could handle
+        depth = sys.getrecursionlimit()
+        closed_screens = []
+        screen = AsyncModalChainScreen(depth, closed_screens)
+
+        self.schedule_screen_and_run(screen)
+
+        self.assertEqual(len(closed_screens), depth + 1)
+        self.assertIs(closed_screens[-1], screen)
+        self.assertIs(screen.child_result, screen.child)
+
     def test_switch_screen_modal_in_render(self, _):
         modal_screen = ModalTestScreen()
         screen = ModalTestScreen(modal_screen_render=modal_screen)
@@ -103,6 +116,36 @@ class ScreenScheduler_TestCase(unittest.TestCase, UtilityMixin):
         self.assertEqual(self.create_output_with_separators(expected), mock_stdout.getvalue())
 
 
+class AsyncModalChainScreen(UIScreen):
+    """Open chain of modal screens without nested loops. Close every screen when its child is closed."""
+
+    def __init__(self, depth, closed_screens):
+        super().__init__()
+        self.input_required = False
+        self.child = None
+        self.child_result = None
+        self._depth = depth
+        self._closed_screens = closed_screens
+
+    def show_all(self):
+        super().show_all()
+        if self.child is not None:
+            return
+
+        if self._depth == 0:
+            self.close()
+        else:
+            self.child = AsyncModalChainScreen(self._depth - 1, self._closed_screens)
+            ScreenHandler.push_screen_modal_async(self.child, callback=self._child_closed)
+
+    def _child_closed(self, child):
+        self.child_result = child
+        self.close()
+
+    def closed(self):
+        self._closed_screens.append(self)
+
+
 class ShowedCounterScreen(UIScreen):
 
     def __init__(self, switch_to_screen=None, replace_screen=None):
@@ -67,6 +67,64 @@ class SignalHandler_TestCase(unittest.TestCase):
 
         self.assertTrue(self.callback_called)
 
+    def _record_signal(self, signal, data):
+        self.received.append(signal)
+
+    def test_emit_rate_limited(self):
+        self.received = []
+        screen = UIScreen()
+        signals = [TestSignal(screen) for _ in range(20)]
+
+        App.initialize(scheduler=MagicMock())
+        screen.connect(TestSignal, self._record_signal)
+        for signal in signals:
+            screen.emit(signal, rate=20)
+
+        # the first signal is delivered immediately and the latest one after the limit
+        App.get_event_loop().process_signals(return_after=TestSignal)
+        App.get_event_loop().process_signals(return_after=TestSignal)
+
+        self.assertEqual([id(s) for s in self.received], [id(signals[0]), id(signals[-1])])
+
+    def test_emit_rate_limited_after_trailing_signal(self):
+        self.received = []
+        screen = UIScreen()
+        signals = [TestSignal(screen) for _ in range(3)]
+
+        App.initialize(scheduler=MagicMock())
+        screen.connect(TestSignal, self._record_signal)
+        screen.emit(signals[0], rate=20)
+        screen.emit(signals[1], rate=20)
+        App.get_event_loop().process_signals(return_after=TestSignal)
+        App.get_event_loop().process_signals(return_after=TestSignal)
+
+        # the trailing signal was already enqueued so a new timer is started
+        screen.emit(signals[2], rate=20)
+        App.get_event_loop().process_signals(return_after=TestSignal)
+
+        self.assertEqual([id(s) for s in self.received], [id(s) for s in signals])
+
+    def test_emit_debounced(self):
+        self.received = []
+        screen = UIScreen()
+        signals = [TestSignal(screen) for _ in range(5)]
+
+        App.initialize(scheduler=MagicMock())
+        screen.connect(TestSignal, self._record_signal)
+        for signal in signals:
+            screen.emit(signal, debounce=0.01)
+
+        App.get_event_loop().process_signals(return_after=TestSignal)
+
+        self.assertEqual(len(self.received), 1)
+        self.assertIs(self.received[0], signals[-1])
+
+    def test_emit_rate_and_debounce(self):
+        App.initialize(scheduler=MagicMock())
+
+        with self.assertRaises(ValueError):
+            UIScreen().emit(TestSignal(self), rate=1, debounce=1)
+
     @patch('sys.stdout')
     def test_connect_react_on_rendering(self, _):
         connect_test_screen = TestRenderConnectHandler()
@@ -0,0 +1,123 @@
+# Standard input reader test classes.
+#
+# Copyright (C) 2017  Red Hat, Inc.
+#
+# This copyrighted material is made available to anyone wishing to use,
+# modify, copy, or redistribute it subject to the terms and conditions of
+# the GNU General Public License v.2, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY expressed or implied, including the implied warranties of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+# Public License for more details.  You should have received a copy of the
+# GNU General Public License along with this program; if not, write to the
+# Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+# 02110-1301, USA.  Any Red Hat trademarks that are incorporated in the
+# source code or documentation are not subject to the GNU General Public
+# License and may only be used or replicated with the express permission of
+# Red Hat, Inc.
+#
+
+import os
+import threading
+import unittest
+from io import StringIO
+from unittest import mock
+
+from simpleline import App
+from simpleline.event_loop.main_loop import MainLoop
+from simpleline.event_loop.signals import InputReadySignal
+
+
+class EventLoopReader_TestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.read_fd, self.write_fd = os.pipe()
+        self.create_loop()
+
+    def tearDown(self):
+        os.close(self.read_fd)
+        os.close(self.write_fd)
+
+    def create_loop(self):
+        self.loop = MainLoop()
+
+    def _reader_callback(self, fd, data):
+        self.loop.remove_reader(fd)
+        self.loop.enqueue_signal(InputReadySignal(self, os.read(fd, 100).decode()))
+
+    def _input_handler(self, signal, data):
+        self.received = signal.data
+
+    def test_reader_callback(self):
+        self.received = None
+        self.loop.register_signal_handler(InputReadySignal, self._input_handler)
+        self.loop.add_reader(self.read_fd, self._reader_callback)
+
+        thread = threading.Timer(0.01, os.write, args=(self.write_fd, b"data"))
+        thread.start()
+
+        self.loop.process_signals(return_after=InputReadySignal)
+        thread.join()
+
+        self.assertEqual(self.received, "data")
+
+    def test_enqueue_wakes_up_reader_wait(self):
+        self.received = None
+        self.loop.register_signal_handler(InputReadySignal, self._input_handler)
+        self.loop.add_reader(self.read_fd, self._reader_callback)
+
+        thread = threading.Timer(0.01, self.loop.enqueue_signal, args=(InputReadySignal(self, "signal"),))
+        thread.start()
+
+        self.loop.process_signals(return_after=InputReadySignal)
+        thread.join()
+        self.loop.remove_reader(self.read_fd)
+
+        self.assertEqual(self.received, "signal")
+
+
+@mock.patch('sys.stdout', new_callable=StringIO)
+class StdinReader_TestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.read_fd, self.write_fd = os.pipe()
+        self.initialize_app()
+        self.io_manager = App.get_scheduler().io_manager
+        self.io_manager.use_stdin_reader(self.read_fd)
+
+    def tearDown(self):
+        os.close(self.read_fd)
+        os.close(self.write_fd)
+
+    def initialize_app(self):
+        App.initialize()
+
+    def test_get_user_input(self, _):
+        os.write(self.write_fd, b"first\nsecond\n")
+
+        self.assertEqual(self.io_manager.get_user_input("prompt"), "first")
+        self.assertEqual(self.io_manager.get_user_input("prompt"), "second")
+        self.assertFalse(self.io_manager._input_thread.running)
+
+    def test_assemble_partial_lines(self, _):
+        os.write(self.write_fd, b"par")
+        thread = threading.Timer(0.01, os.write, args=(self.write_fd, "tiál\r\n".encode()))
+        thread.start()
+
+        self.assertEqual(self.io_manager.get_user_input("prompt"), "partiál")
+        thread.join()
+
+    def test_end_of_input(self, _):
+        os.write(self.write_fd, b"last")
+        os.close(self.write_fd)
+        self.write_fd = os.open(os.devnull, os.O_WRONLY)
+
+        self.assertEqual(self.io_manager.get_user_input("prompt"), "last")
+        self.assertEqual(self.io_manager.get_user_input("prompt"), "")
+
+    def test_prompt_printed(self, stdout_mock):
+        os.write(self.write_fd, b"\n")
+
+        self.io_manager.get_user_input("Question?")
+
+        self.assertEqual(stdout_mock.getvalue(), "Question? ")
@@ -74,6 +74,28 @@ class TicketMachine_TestCase(TestCase):
         self.assertFalse(self._tickets.check_ticket(line_id2, t3))
         self.assertFalse(self._tickets.check_ticket(line_id2, t4))
 
+    def test_ticket_taken_after_mark(self):
+        line_id = "a"
+
+        t1 = self._tickets.take_ticket(line_id)
+        self._tickets.mark_line_to_go(line_id)
+        t2 = self._tickets.take_ticket(line_id)
+
+        self.assertTrue(self._tickets.check_ticket(line_id, t1))
+        self.assertFalse(self._tickets.check_ticket(line_id, t2))
+
+        self._tickets.mark_line_to_go(line_id)
+        self.assertTrue(self._tickets.check_ticket(line_id, t2))
+
+    def test_lines_keyed_by_class(self):
+        class_a = type("Signal", (object,), {})
+        class_b = type("Signal", (object,), {})
+
+        t = self._tickets.take_ticket(class_a)
+        self._tickets.mark_line_to_go(class_b)
+
+        self.assertFalse(self._tickets.check_ticket(class_a, t))
+
     def text_check_re_using(self):
         line_id = "a"
 
@@ -0,0 +1,96 @@
+# Tracing test classes.
+#
+# Copyright (C) 2017  Red Hat, Inc.
+#
+# This copyrighted material is made available to anyone wishing to use,
+# modify, copy, or redistribute it subject to the terms and conditions of
+# the GNU General Public License v.2, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY expressed or implied, including the implied warranties of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+# Public License for more details.  You should have received a copy of the
+# GNU General Public License along with this program; if not, write to the
+# Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+# 02110-1301, USA.  Any Red Hat trademarks that are incorporated in the
+# source code or documentation are not subject to the GNU General Public
+# License and may only be used or replicated with the express permission of
+# Red Hat, Inc.
+#
+
+import json
+import os
+import tempfile
+import threading
+import unittest
+
+from simpleline import tracing
+from simpleline.event_loop import AbstractSignal
+from simpleline.event_loop.main_loop import MainLoop
+
+
+class Tracing_TestCase(unittest.TestCase):
+
+    def tearDown(self):
+        tracing.stop_tracing()
+
+    def _handler(self, signal, data):
+        pass
+
+    def _phases(self, events, name):
+        return [e["ph"] for e in events if e["name"] == name]
+
+    def test_disabled_tracing(self):
+        self.assertIsNone(tracing.get_tracer())
+
+        with tracing.trace_span("test", tracing.CATEGORY_LOOP):
+            pass
+
+        self.assertIsNone(tracing.stop_tracing())
+
+    def test_trace_signal_dispatch(self):
+        recorder = tracing.start_tracing()
+
+        loop = MainLoop()
+        loop.register_signal_handler(TestSignal, self._handler)
+        loop.enqueue_signal(TestSignal(None))
+        loop.process_signals()
+
+        events = recorder.events
+        self.assertEqual(self._phases(events, "TestSignal"), ["B", "E"])
+        self.assertEqual(self._phases(events, "Tracing_TestCase._handler"), ["B", "E"])
+
+        tids = [e["tid"] for e in events if e["ph"] == "M"]
+        self.assertEqual(tids, [threading.get_ident()])
+
+    def test_span_ends_on_exception(self):
+        recorder = tracing.start_tracing()
+
+        with self.assertRaises(ValueError):
+            with tracing.trace_span("failing", tracing.CATEGORY_HANDLER):
+                raise ValueError()
+
+        self.assertEqual(self._phases(recorder.events, "failing"), ["B", "E"])
+
+    def test_save_trace_file(self):
+        fd, path = tempfile.mkstemp(suffix=".json")
+        os.close(fd)
+        self.addCleanup(os.remove, path)
+
+        recorder = tracing.start_tracing(path)
+        self.assertEqual(recorder.file_path, path)
+
+        with tracing.trace_span("test", tracing.CATEGORY_LOOP):
+            pass
+        tracing.stop_tracing()
+
+        with open(path) as f:
+            data = json.load(f)
+
+        events = [e for e in data["traceEvents"] if e["ph"] != "M"]
+        self.assertEqual([e["ph"] for e in events], ["B", "E"])
+        self.assertEqual(events[0]["cat"], tracing.CATEGORY_LOOP)
+        self.assertLessEqual(events[0]["ts"], events[1]["ts"])
+
+
+class TestSignal(AbstractSignal):
+    pass